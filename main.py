@@ -3,7 +3,13 @@ import asyncio
 import logging
 import os
 from src.agent.executor import TradingExecutor
+from src.agent.metrics import MetricsRegistry
 from src.agent.scheduler import AgentScheduler
+from src.agent.shards import ShardCoordinator
+from src.data.cache import ResultCache
+from src.data.database import DatabaseManager
+from src.data.screener import UniverseScreener, load_universe
+from src.data.position_book import PositionBook
 from dotenv import load_dotenv
 
 # Setup Logging
@@ -31,6 +37,23 @@ async def main():
     # Configuration
     # Added from Volatility Report: INOD, PLTR, DUK, TIGR, PAYO, HROW, SGRY
     SYMBOLS = ["NVDA", "TSLA", "AMD", "TQQQ", "SOXL", "INOD", "PLTR", "DUK", "TIGR", "PAYO", "HROW", "SGRY"]
+    # SYMBOLS=AAPL,MSFT,... overrides the list (large universes: see SHARDS below)
+    if os.getenv("SYMBOLS"):
+        SYMBOLS = [s.strip().upper() for s in os.getenv("SYMBOLS").split(",") if s.strip()]
+    # UNIVERSE=screener trades today's top SCREENER_TOP candidates of the pre-market screener
+    # (python -m src.data.screener); it is run here if it has not run yet today
+    elif os.getenv("UNIVERSE") == "screener":
+        db = DatabaseManager()
+        db.create_tables()
+        today = TradingExecutor.trading_date()
+        screened = load_universe(db, today)
+        if not screened:
+            screened = UniverseScreener(db=db).run(top_n=int(os.getenv("SCREENER_TOP", "12")))['symbol'].tolist()
+        if screened:
+            SYMBOLS = screened
+        else:
+            logger.warning("Screener returned no candidates; using the default symbols.")
+        db.close()
     # INVESTMENT_PER_SYMBOL is now calculated dynamically below
     
     logger.info(f"Target Symbols: {SYMBOLS}")
@@ -50,8 +73,32 @@ async def main():
     logger.info(f"💰 Total Buying Power: ${buying_power:,.2f}")
     logger.info(f"⚖️  Allocated per Symbol: ${INVESTMENT_PER_SYMBOL:,.2f} (Total {len(SYMBOLS)} symbols)")
 
-    executor = TradingExecutor(SYMBOLS, INVESTMENT_PER_SYMBOL)
-    scheduler = AgentScheduler(executor)
+    # EVALUATION_MODE=vectorized evaluates the whole universe per tick with one SignalBook pass;
+    # EVALUATION_MODE=event reacts to price changes only (PRICE_SOURCE=poll|stream)
+    # Result cache (data/result_cache.db) is shared with the optimizers, backtesters and dashboard
+    result_cache = ResultCache()
+    # Positions/open orders from the trade_updates stream, reconciled against REST every minute
+    position_book = PositionBook(temp_alpaca)
+    position_book.start(reconcile_interval=60)
+    # Per-stage tick latencies at http://127.0.0.1:$METRICS_PORT/metrics (METRICS_PORT=0 disables)
+    metrics = MetricsRegistry()
+    metrics_port = int(os.getenv("METRICS_PORT", "9108"))
+    if metrics_port:
+        metrics.serve(port=metrics_port)
+    # SHARDS=N splits the universe over N worker processes (event mode) behind one price feed
+    # and one rate-limited order gateway; shard i serves its metrics on METRICS_PORT + 1 + i
+    shards = int(os.getenv("SHARDS", "1"))
+    if shards > 1:
+        executor = ShardCoordinator(SYMBOLS, shards, alpaca=temp_alpaca, position_book=position_book,
+                                    result_cache=result_cache, metrics_port=metrics_port)
+        executor.start()
+    else:
+        executor = TradingExecutor(SYMBOLS, INVESTMENT_PER_SYMBOL, evaluation_mode=os.getenv("EVALUATION_MODE", "loop"),
+                                   result_cache=result_cache, price_source=os.getenv("PRICE_SOURCE", "poll"),
+                                   position_book=position_book, metrics=metrics,
+                                   tick_interval=float(os.getenv("TICK_INTERVAL", "1.0")))
+    # WALK_FORWARD=1 tunes all strategy params with the walk-forward optimizer at 09:00
+    scheduler = AgentScheduler(executor, walk_forward=os.getenv("WALK_FORWARD", "0") == "1")
     
     # Start Scheduler
     # AsyncIOScheduler needs a running loop, which asyncio.run() provides
@@ -66,6 +113,10 @@ async def main():
     except (KeyboardInterrupt, SystemExit):
         logger.info("Shutting down...")
         executor.stop()
+        if isinstance(executor, ShardCoordinator):
+            executor.shutdown()
+        position_book.stop()
+        metrics.shutdown()
 
 if __name__ == "__main__":
     try:
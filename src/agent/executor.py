@@ -1,40 +1,242 @@
 import logging
 import asyncio
+import queue
+import threading
+import time as systime
+from collections import deque
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from typing import List, Dict
+import pytz
+from datetime import datetime, time, timedelta
+from typing import List, Dict, Optional, Any, Callable
 from src.data.alpaca_interface import AlpacaInterface
 from src.data.database import DatabaseManager
+from src.data.cache import ResultCache
 from src.strategy.base import BaseStrategy
 from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
 from src.strategy.bollinger_reversion import BollingerReversionStrategy
 from src.strategy.rsi_momentum import RSIMomentumStrategy
+from src.data.stream import StreamClient
+from src.data.position_book import PositionBook
+from src.data.checkpoint import StateCheckpoint
+from src.data.market_calendar import TradingCalendar
+from src.agent.signal_book import SignalBook
+from src.agent.order_manager import OrderManager
+from src.agent.liquidator import Liquidator
+from src.agent.risk import KillSwitch, RiskGate
+from src.agent.metrics import MetricsRegistry
+from src.agent.tick_scheduler import TickScheduler
+from src.backtest.equity import EquityTracker
 
 logger = logging.getLogger(__name__)
 
+# Equity/risk snapshots are persisted at most this often (samples are taken on the 10s heartbeat)
+RISK_SNAPSHOT_SECONDS = 60
+
+# Calendar days of 1-min bars loaded per symbol for the daily state (longest window: 50-day SMA)
+HISTORY_DAYS = 100
+
+# Heartbeat (market clock, equity sample, latency log) interval in seconds
+HEARTBEAT_SECONDS = 10
+
+# Time-Cut: all positions are liquidated and buying stops this long before the session's close
+# (see AgentScheduler.liquidate_all); TIME_CUT is that time on a regular 16:00 close (backtests)
+TIME_CUT_BEFORE_CLOSE = timedelta(minutes=5)
+TIME_CUT = time(15, 55)
+
+def build_strategies(symbols: List[str]) -> List[BaseStrategy]:
+    """The strategy set traded on every symbol."""
+    strategies: List[BaseStrategy] = []
+    for s in symbols:
+        strategies.append(VolatilityBreakoutStrategy(s))
+        strategies.append(BollingerReversionStrategy(s))
+        strategies.append(RSIMomentumStrategy(s))
+    return strategies
+
 class TradingExecutor:
-    def __init__(self, symbols: List[str], investment_per_symbol: float = 10000.0):
+    def __init__(self, symbols: List[str], investment_per_symbol: float = 10000.0, evaluation_mode: str = "loop",
+                 result_cache: Optional[ResultCache] = None, price_source: str = "poll", poll_interval: float = 1.0,
+                 max_concurrency: int = 8, symbol_timeout: float = 5.0, position_book: Optional[PositionBook] = None,
+                 metrics: Optional[MetricsRegistry] = None, tick_interval: float = 1.0,
+                 checkpoint_path: Optional[str] = "data/checkpoint.json", alpaca: Optional[AlpacaInterface] = None,
+                 price_feed=None, kill_switch: Optional[KillSwitch] = None,
+                 risk_limits: Optional[Dict[str, float]] = None, calendar: Optional[TradingCalendar] = None,
+                 on_realized: Optional[Callable[[str, float], None]] = None):
         self.symbols = symbols
         self.investment_per_symbol = investment_per_symbol
-        self.alpaca = AlpacaInterface()
+        # A shard passes a GatewayClient (same interface, calls served by the coordinator)
+        self.alpaca = alpaca or AlpacaInterface()
         self.db = DatabaseManager()
         
         # Initialize Strategies
-        self.strategies: List[BaseStrategy] = []
-        for s in symbols:
-            self.strategies.append(VolatilityBreakoutStrategy(s))
-            self.strategies.append(BollingerReversionStrategy(s))
-            self.strategies.append(RSIMomentumStrategy(s))
+        self.strategies: List[BaseStrategy] = build_strategies(symbols)
         self.running = False
+        # (symbol, strategy_name) -> input fingerprint of the persisted daily state
+        self.input_hashes: Dict[tuple, str] = {}
+        # (symbol, strategy_name) -> params from WalkForwardOptimizer (override in-sample optimize_k)
+        self.tuned_params: Dict[tuple, Dict] = {}
+        # "loop": per-strategy REST polling, "vectorized": universe-wide SignalBook per tick,
+        # "event": price updates on an asyncio queue, only changed symbols evaluated (run_event_loop)
+        self.evaluation_mode = evaluation_mode
+        self.signal_book: Optional[SignalBook] = None
+        # Event mode: "poll" (one batched latest-trade request per poll_interval), "stream" (websocket trades)
+        # or "feed" (price batches from a coordinator on `price_feed`, a multiprocessing queue)
+        self.price_source = price_source
+        self.price_feed = price_feed
+        self.poll_interval = poll_interval
+        self.price_queue: Optional[asyncio.Queue] = None
+        self.last_prices: Dict[str, float] = {}
+        self.market_open = False
+        # Market hours from the broker calendar, cached locally (no clock request per tick)
+        self.calendar = calendar or TradingCalendar(self.alpaca)
+        self._stream_client: Optional[StreamClient] = None
+        # Trigger-to-order latencies (seconds): price update received -> order acknowledged
+        self.order_latencies: deque = deque(maxlen=1000)
+        # Loop mode: concurrent per-symbol evaluation (bounded) with a per-symbol time budget
+        self.max_concurrency = max_concurrency
+        self.symbol_timeout = symbol_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Worker threads share one SQLite connection: serialize writes
+        self._db_lock = threading.Lock()
+        # Seconds per initialize_day() phase (allocation, reconcile, history, calendar, optimize, persist, total)
+        self.init_timings: Dict[str, float] = {}
+        # Stream-fed positions/open orders (None or not yet synced: ask Alpaca over REST)
+        self.position_book = position_book
+        # Shared on-disk cache for optimize_k searches (None disables caching)
+        self.result_cache = result_cache
+        # Streaming drawdown / Sharpe / exposure / daily P&L, persisted to risk_snapshots.
+        # A shard passes `on_realized` instead: its coordinator owns the account's tracker and
+        # the shard neither restores nor persists one (it only covers the shard's symbols)
+        self.equity = EquityTracker()
+        self.tracks_equity = on_realized is None
+        self._last_risk_snapshot = 0.0
+        # Per-stage latency histograms and counters (served by MetricsRegistry.serve())
+        self.metrics = metrics or MetricsRegistry()
+        self.metrics.describe("stage_seconds", "histogram", "Time spent per tick stage")
+        self.metrics.describe("order_latency_seconds", "histogram", "Price update received to order acknowledged")
+        self.metrics.describe("ticks", "counter", "Evaluation ticks (loop/vectorized) or event batches")
+        self.metrics.describe("signals", "counter", "Strategy signals generated")
+        self.metrics.describe("errors", "counter", "Failed calls per stage")
+        self.metrics.describe("init_phase_seconds", "histogram", "Daily initialization time per phase")
+        self.metrics.describe("symbol_timeouts", "counter", "Per-symbol evaluations that exceeded symbol_timeout")
+        self.metrics.describe("tick_overruns", "counter", "Ticks whose work ran past the next tick's deadline")
+        self.metrics.describe("ticks_skipped", "counter", "Tick deadlines missed because of overruns")
+        self.metrics.describe("jobs_shed", "counter", "Low-priority jobs (heartbeat) deferred because the tick overran")
+        # Loop/vectorized mode: fixed-rate ticks (work time subtracted from the wait, overruns shed the heartbeat)
+        self.tick_scheduler = TickScheduler(tick_interval, metrics=self.metrics)
+        # Intraday state (targets, bands, in-flight orders, equity) for a warm restart (None disables)
+        self.checkpoint = StateCheckpoint(checkpoint_path) if checkpoint_path else None
+        # Pre-trade limits (daily loss, position size, gross exposure, order rate) and the kill switch
+        # shared with the dashboard; `risk_limits` overrides RiskGate's defaults
+        self.risk = RiskGate(kill_switch, metrics=self.metrics, **(risk_limits or {}))
+        # Per-strategy sub-positions, one netted order per symbol per tick, in-flight suppression.
+        # Without fill confirmations an order is treated as settled after a few seconds.
+        self.order_manager = OrderManager(self.alpaca, self.db, position_book,
+                                          order_timeout=30.0 if position_book is not None else 5.0,
+                                          on_realized=on_realized or self.equity.on_fill, db_lock=self._db_lock,
+                                          metrics=self.metrics, risk=self.risk)
 
-    async def initialize_day(self):
-        """Pre-market routine: Optimize K and set Targets."""
+    async def initialize_day(self, allocation: Optional[float] = None):
+        """
+        Pre-market routine: Optimize K and set Targets.
+
+        `allocation` is a per-symbol investment decided by a coordinator (sharded mode); the
+        account-based allocation update is skipped when it is given.
+
+        Runs off the event loop in phases: account/positions and the symbol histories are
+        fetched concurrently, then each symbol's strategies are restored or optimized in
+        their own worker thread. Per-phase timings are logged and kept in `init_timings`.
+        """
         logger.info("Initializing Agent for the day...")
-        
-        # 1. Update Dynamic Allocation based on Account Buying Power
+        self.risk.new_day()
+        halt = self.risk.kill_switch.info()
+        if halt:
+            logger.critical(f"⛔ Kill switch engaged since {halt.get('engaged_at', '?')} ({halt.get('reason')}): "
+                            f"no orders will be sent until it is released (dashboard or {self.risk.kill_switch.path})")
+        timings: Dict[str, float] = {}
+        t_start = systime.perf_counter()
+        today = self.trading_date()
+
+        async def timed(phase: str, coro):
+            t0 = systime.perf_counter()
+            try:
+                return await coro
+            finally:
+                timings[phase] = systime.perf_counter() - t0
+
+        # 1. Allocation, sub-position reconcile, history and calendar loading are independent of each other
+        _, _, daily_frames, _ = await asyncio.gather(
+            timed("allocation", asyncio.to_thread(self._update_allocation, allocation)),
+            timed("reconcile", self._reconcile_sub_positions()),
+            timed("history", self._load_histories(today)),
+            timed("calendar", asyncio.to_thread(self.calendar.load)),
+        )
+
+        # Resume the running equity metrics (peak, rolling returns, contributions) after a restart
+        if self.tracks_equity and self.equity.equity is None:
+            try:
+                state = self.db.load_risk_state()
+                if state:
+                    self.equity.set_state(state)
+            except Exception as e:
+                logger.error(f"Error restoring equity metrics: {e}")
+
+        # 2. Update Market Data is assumed done by Scheduler/Collector separately
+        # Here we just load what we have from DB to optimize K
+        try:
+            persisted = self.db.load_strategy_params(today)
+        except Exception as e:
+            logger.error(f"Error loading persisted strategy params: {e}")
+            persisted = {}
+
+        # 3. Restore or optimize: one worker per symbol (strategies of a symbol share its history)
+        by_symbol: Dict[str, List[BaseStrategy]] = {}
+        for strategy in self.strategies:
+            by_symbol.setdefault(strategy.symbol, []).append(strategy)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def init_symbol(symbol: str, strategies: List[BaseStrategy]):
+            async with semaphore:
+                return await asyncio.to_thread(self._init_symbol, symbol, strategies,
+                                               daily_frames.get(symbol), persisted, today)
+
+        results = await timed("optimize", asyncio.gather(
+            *(init_symbol(symbol, strategies) for symbol, strategies in by_symbol.items())))
+        records = [record for symbol_records, _ in results for record in symbol_records]
+        restored = sum(n for _, n in results)
+
+        t0 = systime.perf_counter()
+        try:
+            with self._db_lock:
+                self.db.save_strategy_params(records)
+        except Exception as e:
+            logger.error(f"Error persisting strategy params: {e}")
+
+        # Mirror the new daily state into the struct-of-arrays view
+        if self.signal_book:
+            self.signal_book.refresh()
+        self.save_checkpoint()
+        timings["persist"] = systime.perf_counter() - t0
+        timings["total"] = systime.perf_counter() - t_start
+
+        self.init_timings = timings
+        for phase, seconds in timings.items():
+            self.metrics.observe("init_phase_seconds", seconds, phase=phase)
+        logger.info(f"Strategy state: {restored} restored from strategy_params, {len(records)} recomputed.")
+        logger.info("⏱️  Initialization: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items()))
+
+    def _update_allocation(self, allocation: Optional[float] = None):
+        """Dynamic Allocation based on Account Buying Power."""
+        if allocation is not None:
+            self.investment_per_symbol = allocation
+            return
         try:
             account = self.alpaca.get_account_info()
             buying_power = float(account.buying_power)
+            self.risk.on_equity(float(account.equity), float(account.last_equity) if account.last_equity else None)
             
             # Allocation Strategy: 90% of Buying Power / Number of Symbols
             allocation_factor = 0.90
@@ -48,162 +250,624 @@ class TradingExecutor:
             logger.error(f"Error updating allocation: {e}")
             # Maintain previous allocation if update fails
 
-        # 2. Update Market Data is assumed done by Scheduler/Collector separately
-        # Here we just load what we have from DB to optimize K
-        
-        for strategy in self.strategies:
-            symbol = strategy.symbol
+    async def _reconcile_sub_positions(self):
+        """Drops strategy sub-positions the broker no longer holds (Time-Cut, manual closes)."""
+        try:
+            self.order_manager.reconcile(await asyncio.to_thread(self.get_positions))
+        except Exception as e:
+            logger.error(f"Error reconciling strategy positions: {e}")
+
+    async def _load_histories(self, today: str) -> Dict[str, Optional[pd.DataFrame]]:
+        """Daily histories of all symbols, loaded concurrently (one read connection per worker, WAL)."""
+        local = threading.local()
+        connections: List[DatabaseManager] = []
+
+        def load(symbol: str) -> Optional[pd.DataFrame]:
+            if not hasattr(local, 'db'):
+                local.db = DatabaseManager(self.db.db_path)
+                connections.append(local.db)
             try:
-                # Load recent daily data for K optimization
-                query = """
-                    SELECT * FROM ohlcv_data 
-                    WHERE symbol = ? 
-                    ORDER BY timestamp DESC 
-                    LIMIT 30
-                """
-                rows = self.db.execute_query(query, (symbol,))
-                if not rows:
-                    logger.warning(f"No data for {symbol}, skipping optimization.")
+                return self.load_daily_history(symbol, today, db=local.db)
+            except Exception as e:
+                logger.error(f"Error loading history for {symbol}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(self.symbols)) or 1,
+                                thread_name_prefix="history") as pool:
+            loop = asyncio.get_running_loop()
+            frames = await asyncio.gather(*(loop.run_in_executor(pool, load, symbol) for symbol in self.symbols))
+        for db in connections:
+            db.close()
+        return dict(zip(self.symbols, frames))
+
+    def _init_symbol(self, symbol: str, strategies: List[BaseStrategy], daily_df: Optional[pd.DataFrame],
+                     persisted: Dict, today: str) -> tuple:
+        """Restores or recomputes one symbol's strategies. Returns (records to persist, restored count)."""
+        if daily_df is None:
+            logger.warning(f"No data for {symbol}, skipping optimization.")
+            return [], 0
+
+        records = []
+        restored = 0
+        for strategy in strategies:
+            try:
+                tuned = self.tuned_params.get((symbol, strategy.name))
+                if tuned:
+                    strategy.set_params(tuned)
+
+                # Skip recomputation if today's state was already derived from identical inputs
+                fingerprint = strategy.input_fingerprint(daily_df, extra=tuned)
+                saved = persisted.get((symbol, strategy.name))
+                if saved and saved['input_hash'] == fingerprint:
+                    strategy.set_state(saved['state'])
+                    self.input_hashes[(symbol, strategy.name)] = fingerprint
+                    restored += 1
                     continue
-                    
-                df = pd.DataFrame([dict(row) for row in rows])
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df.set_index('timestamp', inplace=True)
-                df.sort_index(inplace=True)
-                
-                # Resample to Daily if data is minute-level
-                # Assuming ohlcv_data is 1-min, we need daily for the strategy
-                daily_df = df.resample('D').agg({
-                    'open': 'first', 
-                    'high': 'max', 
-                    'low': 'min', 
-                    'close': 'last'
-                }).dropna()
-
-                # Optimize K (only for VolatilityBreakout)
-                if isinstance(strategy, VolatilityBreakoutStrategy):
-                    best_k = strategy.optimize_k(daily_df)
-                
+
+                # Optimize K (only for VolatilityBreakout, unless walk-forward already tuned it)
+                if isinstance(strategy, VolatilityBreakoutStrategy) and not (tuned and 'k' in tuned):
+                    best_k = strategy.optimize_k(daily_df, cache=self.result_cache)
+
                 # Set Initial State (Range calculation)
                 # We pass the full daily_df so it can pick the last closed day
                 strategy.on_market_open(daily_df)
-                
+
+                self.input_hashes[(symbol, strategy.name)] = fingerprint
+                records.append(self._param_record(strategy, today))
+
             except Exception as e:
                 logger.error(f"Error initializing {symbol}: {e}")
+        return records, restored
+
+    @staticmethod
+    def trading_date() -> str:
+        """Current trading date (US/Eastern) as YYYY-MM-DD."""
+        return datetime.now(pytz.timezone('US/Eastern')).strftime('%Y-%m-%d')
+
+    def load_daily_history(self, symbol: str, today: str, db: Optional[DatabaseManager] = None) -> Optional[pd.DataFrame]:
+        """Loads the last HISTORY_DAYS of bars for a symbol and resamples them to completed daily bars."""
+        query = """
+            SELECT * FROM ohlcv_data 
+            WHERE symbol = ? AND timestamp >= ?
+            ORDER BY timestamp
+        """
+        since = (pd.Timestamp(today) - pd.Timedelta(days=HISTORY_DAYS)).strftime('%Y-%m-%d')
+        rows = (db or self.db).execute_query(query, (symbol, since))
+        if not rows:
+            return None
+
+        df = pd.DataFrame([dict(row) for row in rows])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df.set_index('timestamp', inplace=True)
+        df.sort_index(inplace=True)
+
+        # Resample to Daily if data is minute-level
+        # Assuming ohlcv_data is 1-min, we need daily for the strategy
+        daily_df = df.resample('D').agg({
+            'open': 'first', 
+            'high': 'max', 
+            'low': 'min', 
+            'close': 'last'
+        }).dropna()
+
+        # Drop today's partial bar (late start): state must come from closed days only,
+        # which also keeps the input fingerprint stable across intraday restarts.
+        daily_df = daily_df[daily_df.index.strftime('%Y-%m-%d') < today]
+        return daily_df if not daily_df.empty else None
+
+    def _param_record(self, strategy: BaseStrategy, date: str) -> Dict:
+        return {
+            'date': date,
+            'symbol': strategy.symbol,
+            'strategy_name': strategy.name,
+            'state': strategy.get_state(),
+            'input_hash': self.input_hashes.get((strategy.symbol, strategy.name))
+        }
+
+    def persist_strategy(self, strategy: BaseStrategy):
+        """Saves a single strategy's state (e.g. after the intraday target is set)."""
+        try:
+            with self._db_lock, self.metrics.time("stage_seconds", stage="db_log"):
+                self.db.save_strategy_params([self._param_record(strategy, self.trading_date())])
+        except Exception as e:
+            logger.error(f"Error persisting state for {strategy.symbol} {strategy.name}: {e}")
+        self.save_checkpoint()
+
+    def save_checkpoint(self):
+        """Writes the intraday state to the checkpoint file (atomic replace)."""
+        if self.checkpoint is None:
+            return
+        try:
+            with self.metrics.time("stage_seconds", stage="checkpoint"):
+                self.checkpoint.save({
+                    'date': self.trading_date(),
+                    'saved_at': datetime.now(pytz.utc).isoformat(),
+                    'investment_per_symbol': self.investment_per_symbol,
+                    'strategies': [
+                        {'symbol': s.symbol, 'name': s.name, 'state': s.get_state(),
+                         'input_hash': self.input_hashes.get((s.symbol, s.name))}
+                        for s in self.strategies
+                    ],
+                    'inflight': self.order_manager.export_inflight(),
+                    'equity': self.equity.get_state() if self.tracks_equity else None,
+                })
+        except Exception as e:
+            logger.error(f"Error writing checkpoint: {e}")
+
+    def restore_checkpoint(self) -> bool:
+        """
+        Restores today's checkpoint (warm restart). Returns False when there is none for today
+        or it does not cover every strategy, in which case initialize_day() is needed.
+        """
+        if self.checkpoint is None:
+            return False
+        state = self.checkpoint.load()
+        if not state or state.get('date') != self.trading_date():
+            return False
+        saved = {(e['symbol'], e['name']): e for e in state.get('strategies', [])}
+        if any((s.symbol, s.name) not in saved for s in self.strategies):
+            logger.info("Checkpoint does not cover the current strategies; running a full initialization.")
+            return False
+
+        for strategy in self.strategies:
+            entry = saved[(strategy.symbol, strategy.name)]
+            strategy.set_state(entry['state'])
+            if entry.get('input_hash'):
+                self.input_hashes[(strategy.symbol, strategy.name)] = entry['input_hash']
+        self.investment_per_symbol = state.get('investment_per_symbol', self.investment_per_symbol)
+        if self.equity.equity is None and state.get('equity'):
+            self.equity.set_state(state['equity'])
+        try:
+            self.order_manager.restore_inflight(state.get('inflight', {}))
+        except Exception as e:
+            logger.error(f"Error restoring in-flight orders: {e}")
+        if self.signal_book:
+            self.signal_book.refresh()
+        logger.info(f"♻️  Restored {len(saved)} strategies from checkpoint saved at {state.get('saved_at')}")
+        return True
 
     async def run_loop(self):
         """Main Trading Loop."""
+        if self.evaluation_mode == "event":
+            return await self.run_event_loop()
         self.running = True
-        logger.info("Starting Trading Loop...")
+        ticks = self.tick_scheduler
+        ticks.reset()
+        logger.info(f"Starting Trading Loop ({ticks.interval:g}s ticks)...")
         
         while self.running:
             try:
-                # 0. Check Market Status
-                clock = self.alpaca.get_market_status()
-                if not clock.is_open:
+                ticks.start()
+                # 0. Check Market Status (local calendar; loads in a worker thread on a new day)
+                if self.calendar.stale:
+                    await asyncio.to_thread(self.calendar.load)
+                if not self.calendar.is_open():
                     logger.info("Market is closed. Waiting...")
-                    await asyncio.sleep(60)
+                    await asyncio.sleep(min(60.0, max(1.0, self.calendar.time_to_open() or 60.0)))
+                    ticks.reset()
                     continue
 
-                for strategy in self.strategies:
-                    symbol = strategy.symbol
-                    # 1. Get Real-time Data
-                    # We can use Alpaca's get_latest_trade or bar
-                    # For breakout, we check current price against target
-                    
-                    # Note: Optimization - In a real high-freq scenario we use Websocket.
-                    # For this 'loop' based approach, polling snapshots is easier to implement first.
-                    try:
-                        current_price = self.alpaca.get_latest_price(symbol)
-                    except Exception:
-                        continue
-                    
-                    # Special Case logic removed (redundant)
-
-                    # 2. Update Strategy Target if needed (requires Open price)
-                    if hasattr(strategy, 'update_target') and strategy.target_price is None and strategy.range_k is not None:
-                        # Try to get today's opening bar
-                        # If simple, we can just wait for the first bar. 
-                        # Let's simplify: In paper trading, we might assume Open is available after 9:30
-                        # Try to get today's opening bar using Snapshot (Real-time IEX)
-                        snapshot = self.alpaca.get_snapshot(symbol)
-                        if snapshot and snapshot.daily_bar:
-                            open_price = snapshot.daily_bar.open
-                            strategy.update_target(open_price)
-                    
-                    # 3. Generate Signal
-                    # Improved Position Fetching: Skip on API error instead of assuming zero.
-                    try:
-                        pos = self.alpaca.get_open_position(symbol)
-                        if pos:
-                            current_qty = float(pos.qty)
-                            avg_entry_price = float(pos.avg_entry_price)
-                        else:
-                            current_qty = 0
-                            avg_entry_price = 0.0
-                    except Exception as e:
-                        logger.error(f"⚠️  Skipping {symbol} due to position fetch error: {e}")
-                        continue
-                    
-                    # Calculate RSI if needed
-                    current_rsi = None
-                    if isinstance(strategy, RSIMomentumStrategy):
-                         # TODO: Implement RSI calculation using alpaca.get_bars
-                         # For now, let's skip or try to get basics.
-                         # Real implementation needs historical bars. 
-                         pass
-
-                    signal = strategy.generate_signal(current_price, current_qty, avg_entry_price, current_rsi=current_rsi) if isinstance(strategy, RSIMomentumStrategy) else strategy.generate_signal(current_price, current_qty, avg_entry_price)
-                    
-                    # 4. Execute
-                    if signal:
-                        if signal['action'] == 'BUY':
-                            # Calculate Qty
-                            # quantity = self.investment_per_symbol / current_price
-                            # Round down to int
-                            qty = int(self.investment_per_symbol // current_price)
-                            
-                            if qty > 0:
-                                order = self.alpaca.submit_order(symbol, qty, 'buy')
-                                logger.info(f"EXECUTED BUY {symbol}: {qty} @ {current_price} ({strategy.name})")
-                                self.db.log_trade(symbol, 'BUY', qty, current_price, signal['reason'], str(order.id) if hasattr(order, 'id') else None, strategy.name)
-                        
-                        elif signal['action'] == 'SELL':
-                            order = self.alpaca.submit_order(symbol, current_qty, 'sell')
-                            logger.info(f"EXECUTED SELL {symbol}: {current_qty} @ {current_price} ({strategy.name})")
-                            self.db.log_trade(symbol, 'SELL', current_qty, current_price, signal['reason'], str(order.id) if hasattr(order, 'id') else None, strategy.name)
-
-                await asyncio.sleep(1) # 1 sec Tick
-                
-                # Heartbeat Log every 10 seconds
-                if int(datetime.now().second) % 10 == 0:
-                    current_prices = {}
-                    for s in self.strategies:
-                        if s.symbol not in current_prices:
-                            try:
-                                current_prices[s.symbol] = self.alpaca.get_latest_price(s.symbol)
-                            except:
-                                current_prices[s.symbol] = 0.0
-                        
-                        price = current_prices[s.symbol]
-                        if isinstance(s, VolatilityBreakoutStrategy) and s.target_price:
-                            condition = "BUY" if price >= s.target_price else "WAIT"
-                            logger.info(f"🔍 [{s.symbol}] {s.name}: {price:.2f} vs Target {s.target_price:.2f} -> {condition}")
-                        elif isinstance(s, BollingerReversionStrategy) and s.lower_band:
-                            if price <= s.lower_band: condition = "BUY"
-                            elif price >= s.sma: condition = "SELL"
-                            else: condition = "WAIT"
-                            logger.info(f"🔍 [{s.symbol}] {s.name}: {price:.2f} (Bands: {s.lower_band:.2f} - {s.upper_band:.2f}) -> {condition}")
-                        elif isinstance(s, RSIMomentumStrategy) and s.daily_sma:
-                            logger.info(f"🔍 [{s.symbol}] {s.name}: {price:.2f} (SMA: {s.daily_sma:.2f}) -> WAIT")
-                        else:
-                            logger.info(f"⏳ [{s.symbol}] {s.name}: Initializing...")
-                    await asyncio.sleep(1)
+                with self.metrics.time("stage_seconds", stage="tick"):
+                    if self.evaluation_mode == "vectorized":
+                        await asyncio.to_thread(self._vectorized_tick)
+                    else:
+                        await self._concurrent_tick()
+                self.metrics.inc("ticks")
+
+                # Heartbeat Log every 10 seconds (low priority: shed while ticks overrun)
+                if ticks.due("heartbeat", HEARTBEAT_SECONDS):
+                    await asyncio.to_thread(self._heartbeat)
+
+                await ticks.wait()
 
             except Exception as e:
                 logger.error(f"Error in trading loop: {e}")
                 await asyncio.sleep(5)
+                ticks.reset()
+
+    async def _concurrent_tick(self):
+        """
+        Evaluates every symbol as its own task (at most max_concurrency at once). Each symbol's
+        blocking Alpaca calls run in a worker thread and are given symbol_timeout seconds, so
+        one slow symbol no longer delays the others.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        by_symbol: Dict[str, List[BaseStrategy]] = {}
+        for strategy in self.strategies:
+            by_symbol.setdefault(strategy.symbol, []).append(strategy)
+        await asyncio.gather(*(self._evaluate_symbol_task(symbol, strategies) for symbol, strategies in by_symbol.items()))
+
+    async def _evaluate_symbol_task(self, symbol: str, strategies: List[BaseStrategy]):
+        pending = self._inflight.get(symbol)
+        if pending is not None and not pending.done():
+            # A timed-out evaluation is still blocked in its thread: don't stack another one
+            logger.warning(f"⏱️  [{symbol}] previous evaluation still running, skipping this tick")
+            return
+
+        async with self._semaphore:
+            future = asyncio.ensure_future(asyncio.to_thread(self._evaluate_symbol, symbol, strategies))
+            self._inflight[symbol] = future
+            try:
+                # shield: a thread cannot be cancelled, the timeout only stops waiting for it
+                await asyncio.wait_for(asyncio.shield(future), timeout=self.symbol_timeout)
+            except asyncio.TimeoutError:
+                self.metrics.inc("symbol_timeouts", symbol=symbol)
+                logger.warning(f"⏱️  [{symbol}] evaluation exceeded {self.symbol_timeout:.1f}s, not waiting for it")
+            except Exception as e:
+                logger.error(f"Error evaluating {symbol}: {e}")
+
+    def _evaluate_symbol(self, symbol: str, strategies: List[BaseStrategy]):
+        """All strategies of one symbol (runs in a worker thread), netted into at most one order."""
+        metrics = self.metrics
+        # 1. Get Real-time Data
+        try:
+            with metrics.time("stage_seconds", stage="price_fetch"):
+                current_price = self.alpaca.get_latest_price(symbol)
+        except Exception:
+            metrics.inc("errors", stage="price_fetch")
+            return
+
+        # Improved Position Fetching: Skip on API error instead of assuming zero.
+        try:
+            with metrics.time("stage_seconds", stage="position_fetch"):
+                pos = self.get_position(symbol)
+        except Exception as e:
+            metrics.inc("errors", stage="position_fetch")
+            logger.error(f"⚠️  Skipping {symbol} due to position fetch error: {e}")
+            return
+        self.order_manager.reconcile({symbol: pos} if pos else {}, symbols=[symbol])
+        self.risk.on_position(symbol, float(pos.qty) if pos else 0.0, current_price)
+
+        # 2. Update Strategy Target if needed (requires Open price)
+        for strategy in strategies:
+            self._refresh_target(strategy)
+
+        intents = []
+        with metrics.time("stage_seconds", stage="signal_eval"):
+            for strategy in strategies:
+                # 3. Generate Signal against the strategy's own sub-position
+                # RSI needs intraday bars, which this loop does not fetch (current_rsi=None)
+                current_qty, avg_entry_price = self.order_manager.position(symbol, strategy.name)
+                signal = strategy.generate_signal(current_price, current_qty, avg_entry_price, current_rsi=None)
+                if signal:
+                    intents.append((strategy, signal))
+        if intents:
+            metrics.inc("signals", len(intents))
+
+        # 4. Execute
+        self._submit(symbol, intents, current_price)
+
+    def get_position(self, symbol: str):
+        """Open position for a symbol (None if flat): from the PositionBook when synced, else REST."""
+        if self.position_book is not None and self.position_book.synced:
+            return self.position_book.get_position(symbol)
+        return self.alpaca.get_open_position(symbol)
+
+    def get_positions(self) -> Dict[str, Any]:
+        """All open positions keyed by symbol: from the PositionBook when synced, else REST."""
+        if self.position_book is not None and self.position_book.synced:
+            return self.position_book.get_positions()
+        return self.alpaca.get_positions()
+
+    def _heartbeat(self):
+        """Equity sample, stage latencies and one status line per strategy (one batched price request)."""
+        self.sample_equity()
+        self._enforce_risk()
+        self.save_checkpoint()
+        self._log_stage_summary()
+        try:
+            current_prices = self.alpaca.get_latest_prices(list(dict.fromkeys(s.symbol for s in self.strategies)))
+        except Exception:
+            current_prices = {}
+        for s in self.strategies:
+            price = current_prices.get(s.symbol, 0.0)
+            if isinstance(s, VolatilityBreakoutStrategy) and s.target_price:
+                condition = "BUY" if price >= s.target_price else "WAIT"
+                logger.info(f"🔍 [{s.symbol}] {s.name}: {price:.2f} vs Target {s.target_price:.2f} -> {condition}")
+            elif isinstance(s, BollingerReversionStrategy) and s.lower_band:
+                if price <= s.lower_band: condition = "BUY"
+                elif price >= s.sma: condition = "SELL"
+                else: condition = "WAIT"
+                logger.info(f"🔍 [{s.symbol}] {s.name}: {price:.2f} (Bands: {s.lower_band:.2f} - {s.upper_band:.2f}) -> {condition}")
+            elif isinstance(s, RSIMomentumStrategy) and s.daily_sma:
+                logger.info(f"🔍 [{s.symbol}] {s.name}: {price:.2f} (SMA: {s.daily_sma:.2f}) -> WAIT")
+            else:
+                logger.info(f"⏳ [{s.symbol}] {s.name}: Initializing...")
+
+    def _refresh_target(self, strategy: BaseStrategy):
+        """Sets the VolatilityBreakout target once today's open is known."""
+        if hasattr(strategy, 'update_target') and strategy.target_price is None and strategy.range_k is not None:
+            # Try to get today's opening bar
+            # If simple, we can just wait for the first bar. 
+            # Let's simplify: In paper trading, we might assume Open is available after 9:30
+            # Try to get today's opening bar using Snapshot (Real-time IEX)
+            with self.metrics.time("stage_seconds", stage="snapshot"):
+                snapshot = self.alpaca.get_snapshot(strategy.symbol)
+            if snapshot and snapshot.daily_bar:
+                open_price = snapshot.daily_bar.open
+                strategy.update_target(open_price)
+                self.persist_strategy(strategy)
+                if self.signal_book:
+                    self.signal_book.update(strategy)
+
+    @staticmethod
+    def size_order(investment: float, price: float) -> int:
+        """Whole shares to buy for a BUY signal."""
+        # quantity = self.investment_per_symbol / current_price
+        # Round down to int
+        return int(investment // price)
+
+    def _submit(self, symbol: str, intents: List[tuple], price: float, trigger_time: Optional[float] = None):
+        """Sends one tick's (strategy, signal) intents for a symbol through the OrderManager (at most one order)."""
+        max_qty = min(self.size_order(self.investment_per_symbol, price), self.risk.max_shares(price))
+        order = self.order_manager.submit(symbol, intents, price, max_qty)
+        if order is not None:
+            self._record_latency(trigger_time)
+
+    def _record_latency(self, trigger_time: Optional[float]):
+        if trigger_time is not None:
+            latency = systime.perf_counter() - trigger_time
+            self.order_latencies.append(latency)
+            self.metrics.observe("order_latency_seconds", latency)
+
+    def sample_equity(self):
+        """
+        Feeds the account equity into the risk gate and the EquityTracker, persisting a snapshot
+        every RISK_SNAPSHOT_SECONDS (a shard only updates its risk gate).
+        """
+        try:
+            account = self.alpaca.get_account_info()
+            now = datetime.now(pytz.utc)
+            last_equity = float(account.last_equity) if account.last_equity else None
+            self.risk.on_equity(float(account.equity), last_equity)
+            if not self.tracks_equity:
+                return
+            self.equity.on_equity(now, float(account.equity), float(account.long_market_value or 0.0), last_equity)
+            if now.timestamp() - self._last_risk_snapshot >= RISK_SNAPSHOT_SECONDS:
+                with self._db_lock, self.metrics.time("stage_seconds", stage="db_log"):
+                    self.db.save_risk_snapshot(self.equity.snapshot(), self.equity.get_state())
+                self._last_risk_snapshot = now.timestamp()
+        except Exception as e:
+            logger.error(f"Error sampling equity: {e}")
+
+    def _enforce_risk(self):
+        """Flattens the account once when the risk gate engaged the kill switch (halt loss limit)."""
+        reason = self.risk.pop_trip()
+        if reason is None:
+            status = self.risk.status()
+            if status['kill_switch']:
+                logger.warning("⛔ Kill switch engaged: no orders are sent.")
+            elif status['reduce_only']:
+                logger.warning(f"🛑 Daily loss {status['daily_return'] * 100:.2f}%: reduce-only, no new positions.")
+            return
+        logger.critical(f"⛔ Emergency halt ({reason}): liquidating all positions")
+        try:
+            report = Liquidator(self.alpaca).run()
+            self.on_liquidated(report['remaining'])
+        except Exception as e:
+            logger.error(f"Critical error during emergency liquidation: {e}")
+
+    def _vectorized_tick(self):
+        """
+        One tick over the whole universe: one batched price request, one positions request,
+        one SignalBook evaluation. Only the strategies that fire are touched afterwards.
+        """
+        if self.signal_book is None:
+            self.signal_book = SignalBook(self.strategies)
+        try:
+            with self.metrics.time("stage_seconds", stage="price_fetch"):
+                prices = self.alpaca.get_latest_prices(self.signal_book.symbols)
+        except Exception:
+            self.metrics.inc("errors", stage="price_fetch")
+            raise
+        self._evaluate_prices(prices)
+
+    def _evaluate_prices(self, prices_by_symbol: Dict[str, float], received: Optional[Dict[str, float]] = None) -> bool:
+        """
+        Evaluates the strategies of the symbols in `prices_by_symbol` with one positions request
+        and one SignalBook pass (other symbols get NaN prices and are skipped).
+        `received` maps symbol -> perf_counter() of the triggering update for latency tracking.
+        Returns False if the tick was skipped (position fetch error).
+        """
+        if self.signal_book is None:
+            self.signal_book = SignalBook(self.strategies)
+
+        for strategy in self.strategies:
+            if strategy.symbol in prices_by_symbol:
+                self._refresh_target(strategy)
+
+        book = self.signal_book
+        try:
+            with self.metrics.time("stage_seconds", stage="position_fetch"):
+                positions = self.get_positions()
+        except Exception as e:
+            # Same policy as the per-strategy loop: never assume flat on a fetch error
+            self.metrics.inc("errors", stage="position_fetch")
+            logger.error(f"⚠️  Skipping tick due to position fetch error: {e}")
+            return False
+        self.order_manager.reconcile(positions, symbols=prices_by_symbol)
+        for symbol, price in prices_by_symbol.items():
+            self.risk.on_position(symbol, float(positions[symbol].qty) if symbol in positions else 0.0, price)
+
+        intents: Dict[str, List[tuple]] = {}
+        with self.metrics.time("stage_seconds", stage="signal_eval"):
+            # Each strategy is evaluated against its own sub-position (OrderManager)
+            sub_positions = self.order_manager.positions()
+            prices = book.vector(prices_by_symbol)
+            qty = book.pair_vector({k: v[0] for k, v in sub_positions.items()})
+            avg_entry = book.pair_vector({k: v[1] for k, v in sub_positions.items()})
+
+            for symbol, strategy, action in book.evaluate(prices, qty, avg_entry, per_strategy=True):
+                i = book.symbol_index[symbol]
+                strategy_qty, strategy_entry = self.order_manager.position(symbol, strategy.name)
+                # Re-run the scalar rule for the reason text (and to stay the single source of truth)
+                signal = strategy.generate_signal(prices[i], strategy_qty, strategy_entry)
+                if signal and signal['action'] == action:
+                    intents.setdefault(symbol, []).append((strategy, signal))
+                    self.metrics.inc("signals")
+
+        for symbol, symbol_intents in intents.items():
+            self._submit(symbol, symbol_intents, float(prices[book.symbol_index[symbol]]),
+                         trigger_time=received.get(symbol) if received else None)
+        return True
+
+    # ------------------------------------------------------------------ event mode
+
+    def on_price(self, symbol: str, price: float, received: Optional[float] = None):
+        """Queues a price update; unchanged prices are dropped. Must run on the event loop's thread."""
+        if price is None or self.last_prices.get(symbol) == price or self.price_queue is None:
+            return
+        self.last_prices[symbol] = price
+        self.price_queue.put_nowait({'symbol': symbol, 'price': price,
+                                     'received': received if received is not None else systime.perf_counter()})
+
+    async def _poll_prices(self):
+        """Price producer: one batched latest-trade request per poll_interval while the market is open."""
+        while self.running:
+            started = systime.perf_counter()
+            if self.market_open:
+                try:
+                    prices = await asyncio.to_thread(self.alpaca.get_latest_prices, self.symbols)
+                    received = systime.perf_counter()
+                    self.metrics.observe("stage_seconds", received - started, stage="price_fetch")
+                    for symbol, price in prices.items():
+                        self.on_price(symbol, price, received)
+                except Exception as e:
+                    self.metrics.inc("errors", stage="price_fetch")
+                    logger.error(f"Price poll failed: {e}")
+            await asyncio.sleep(max(0.0, self.poll_interval - (systime.perf_counter() - started)))
+
+    async def _feed_prices(self):
+        """Price producer: {'prices': {symbol: price}} batches put on `price_feed` by a ShardCoordinator."""
+        while self.running:
+            try:
+                batch = await asyncio.to_thread(self.price_feed.get, True, 1.0)
+            except queue.Empty:
+                continue
+            received = systime.perf_counter()
+            for symbol, price in batch['prices'].items():
+                self.on_price(symbol, price, received)
+
+    async def _stream_prices(self):
+        """Price producer: websocket trades. The stream runs its own loop in a worker thread."""
+        loop = asyncio.get_running_loop()
+
+        async def on_trade(trade: Dict[str, Any]):
+            loop.call_soon_threadsafe(self.on_price, trade['symbol'], trade['price'], systime.perf_counter())
+
+        self._stream_client = StreamClient(self.symbols, on_trade)
+        await asyncio.to_thread(self._stream_client.run)
+
+    def _forget(self, batch: Dict[str, Dict[str, Any]]):
+        """
+        Drops a batch that was not evaluated (market not open yet, failed tick) from the
+        dedupe cache, so the symbols' next update is queued even at an unchanged price.
+        """
+        for symbol, update in batch.items():
+            if self.last_prices.get(symbol) == update['price']:
+                del self.last_prices[symbol]
+
+    def _drain(self, first: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Collects everything queued so far, keeping the latest update per symbol."""
+        batch = {first['symbol']: first}
+        while not self.price_queue.empty():
+            update = self.price_queue.get_nowait()
+            batch[update['symbol']] = update
+        return batch
+
+    def _event_heartbeat(self):
+        is_open = self.calendar.is_open()
+        if is_open != self.market_open:
+            logger.info(f"Market is {'open' if is_open else 'closed'}.")
+        self.market_open = is_open
+        if self.market_open:
+            self.sample_equity()
+            self._enforce_risk()
+            self.save_checkpoint()
+        latency = self.latency_summary()
+        if latency['count']:
+            logger.info(f"⏱️  Trigger-to-order latency over {latency['count']} orders: "
+                        f"p50 {latency['p50'] * 1000:.0f}ms, p95 {latency['p95'] * 1000:.0f}ms, max {latency['max'] * 1000:.0f}ms")
+        self._log_stage_summary()
+
+    def _log_stage_summary(self):
+        """One line with mean / p95 bucket per tick stage since start."""
+        stages = self.metrics.stage_summary()
+        if stages:
+            logger.info("⏱️  Stages: " + ", ".join(
+                f"{name} {s['mean'] * 1000:.1f}ms (p95<={s['p95'] * 1000:.0f}ms, n={s['count']})"
+                for name, s in sorted(stages.items())))
+
+    async def run_event_loop(self):
+        """
+        Event-driven trading loop: a producer (batched poll or websocket stream) puts price
+        changes on an asyncio queue; the consumer drains it, coalesces to the latest price
+        per symbol and evaluates only those symbols. Blocking REST calls run in a worker
+        thread, one batch at a time, so the queue keeps filling while orders are submitted.
+        """
+        self.running = True
+        self.price_queue = asyncio.Queue()
+        self.last_prices.clear()
+        logger.info(f"Starting event-driven Trading Loop ({self.price_source} prices)...")
+
+        await asyncio.to_thread(self._event_heartbeat)
+        next_heartbeat = systime.monotonic() + HEARTBEAT_SECONDS
+        producers = {"stream": self._stream_prices, "feed": self._feed_prices}
+        producer = asyncio.create_task(producers.get(self.price_source, self._poll_prices)())
+        try:
+            while self.running:
+                try:
+                    update = await asyncio.wait_for(self.price_queue.get(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    update = None
+
+                try:
+                    if systime.monotonic() >= next_heartbeat:
+                        next_heartbeat = systime.monotonic() + HEARTBEAT_SECONDS
+                        await asyncio.to_thread(self._event_heartbeat)
+                    if update is None:
+                        continue
+                    batch = self._drain(update)
+                    if not self.market_open:
+                        self._forget(batch)
+                        continue
+
+                    evaluated = False
+                    try:
+                        with self.metrics.time("stage_seconds", stage="tick"):
+                            evaluated = await asyncio.to_thread(self._evaluate_prices,
+                                                                {s: u['price'] for s, u in batch.items()},
+                                                                {s: u['received'] for s, u in batch.items()})
+                    finally:
+                        if not evaluated:
+                            self._forget(batch)
+                    self.metrics.inc("ticks")
+                except Exception as e:
+                    logger.error(f"Error in event loop: {e}")
+        finally:
+            if self._stream_client:
+                try:
+                    self._stream_client.stream.stop()
+                except Exception as e:
+                    logger.error(f"Error stopping price stream: {e}")
+                self._stream_client = None
+            producer.cancel()
+            self.price_queue = None
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Trigger-to-order latency percentiles (seconds) over the recent orders."""
+        if not self.order_latencies:
+            return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+        values = np.fromiter(self.order_latencies, dtype=float)
+        return {'count': len(values), 'p50': float(np.percentile(values, 50)),
+                'p95': float(np.percentile(values, 95)), 'max': float(values.max())}
+
+    def on_liquidated(self, remaining: Dict[str, float]):
+        """Aligns the strategies' sub-positions with what is left after a liquidation ({symbol: qty})."""
+        self.order_manager.reconcile({s: SimpleNamespace(qty=q) for s, q in remaining.items()})
 
     def stop(self):
         self.running = False
         logger.info("Stopping Executor...")
+        self.save_checkpoint()
@@ -0,0 +1,184 @@
+import itertools
+import logging
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from src.data.alpaca_interface import AlpacaInterface
+from src.data.position_book import PositionBook
+
+logger = logging.getLogger(__name__)
+
+# Alpaca allows 200 REST requests per minute per account; keep some headroom
+DEFAULT_RATE_PER_MINUTE = 180
+
+# Account-wide reads every shard asks for on its heartbeat: served from a short-lived cache
+CACHED_CALLS = {'get_market_status': 5.0, 'get_account_info': 5.0}
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a request may be sent."""
+    def __init__(self, rate_per_minute: float = DEFAULT_RATE_PER_MINUTE, burst: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, int(self.rate * 5)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes one token; returns the seconds spent waiting for it."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                delay = (1.0 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class OrderGateway:
+    """
+    The single broker connection of a sharded deployment (runs in the coordinator).
+
+    Shards send (shard_id, request_id, method path, args, kwargs) on `requests`; each call
+    runs on a small thread pool after taking a token from the shared rate limiter, and the
+    result or exception goes back on the shard's reply queue. get_positions is answered
+    from the coordinator's PositionBook when it is synced, the market clock and account
+    from a short cache, so N shards cost about one broker request each.
+    """
+    def __init__(self, alpaca: AlpacaInterface, requests, replies: Dict[int, Any],
+                 position_book: Optional[PositionBook] = None, rate_per_minute: float = DEFAULT_RATE_PER_MINUTE,
+                 max_workers: int = 4):
+        self.alpaca = alpaca
+        self.requests = requests
+        self.replies = replies
+        self.position_book = position_book
+        self.bucket = TokenBucket(rate_per_minute)
+        self.max_workers = max_workers
+        self.calls = 0
+        self.throttled_seconds = 0.0
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="gateway")
+        self._thread = threading.Thread(target=self._serve, name="order-gateway", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._pool:
+            self._pool.shutdown(wait=False)
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                message = self.requests.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._pool.submit(self._handle, *message)
+
+    def _handle(self, shard_id: int, request_id: int, path: str, args: tuple, kwargs: dict):
+        try:
+            ok, value = True, self.call(path, *args, **kwargs)
+        except Exception as e:
+            ok, value = False, e
+        try:
+            pickle.dumps(value)
+        except Exception:
+            # Broker exceptions/models that cannot cross the process boundary
+            ok, value = False, RuntimeError(f"{path}: {value!r}")
+        self.replies[shard_id].put((request_id, ok, value))
+
+    def call(self, path: str, *args, **kwargs) -> Any:
+        if path == 'get_positions' and self.position_book is not None and self.position_book.synced:
+            return self.position_book.get_positions()
+        ttl = CACHED_CALLS.get(path)
+        if ttl is not None:
+            with self._lock:
+                cached = self._cache.get(path)
+            if cached and time.monotonic() - cached[0] < ttl:
+                return cached[1]
+
+        waited = self.bucket.acquire()
+        target = self.alpaca
+        for part in path.split('.'):
+            target = getattr(target, part)
+        result = target(*args, **kwargs)
+        with self._lock:
+            self.calls += 1
+            self.throttled_seconds += waited
+            if ttl is not None:
+                self._cache[path] = (time.monotonic(), result)
+        if path == 'submit_order' and self.position_book is not None:
+            self.position_book.track_order(result)
+        return result
+
+class _RemoteAttr:
+    """Attribute path on the coordinator's AlpacaInterface (e.g. trading_client.get_order_by_id)."""
+    def __init__(self, client: 'GatewayClient', path: str):
+        self._client = client
+        self._path = path
+
+    def __getattr__(self, name: str) -> '_RemoteAttr':
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _RemoteAttr(self._client, f"{self._path}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        return self._client.call(self._path, *args, **kwargs)
+
+class GatewayClient:
+    """
+    Stand-in for AlpacaInterface inside a shard process: every method call is forwarded to
+    the coordinator's OrderGateway and blocks until the reply arrives (thread-safe).
+    """
+    def __init__(self, requests, replies, shard_id: int, timeout: float = 30.0):
+        self.requests = requests
+        self.replies = replies
+        self.shard_id = shard_id
+        self.timeout = timeout
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._dispatch, name=f"gateway-replies-{shard_id}", daemon=True).start()
+
+    def __getattr__(self, name: str) -> _RemoteAttr:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _RemoteAttr(self, name)
+
+    def call(self, path: str, *args, **kwargs) -> Any:
+        future: Future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        self.requests.put((self.shard_id, request_id, path, args, kwargs))
+        try:
+            return future.result(timeout=self.timeout)
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+    def _dispatch(self):
+        while True:
+            request_id, ok, value = self.replies.get()
+            with self._lock:
+                future = self._pending.get(request_id)
+            if future is None:
+                continue  # caller timed out
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value if isinstance(value, BaseException) else RuntimeError(value))
@@ -0,0 +1,126 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+from src.data.alpaca_interface import AlpacaInterface
+
+logger = logging.getLogger(__name__)
+
+class Liquidator:
+    """
+    Flattens every open position at once (Time-Cut, emergency halt).
+
+    Pending orders are cancelled, then one closing market order per position is submitted
+    concurrently from a thread pool, so the last order leaves about as early as the first.
+    Positions are polled until the account is flat; a symbol whose order failed, or that is
+    still open with nothing pending, gets a new closing order for the remaining quantity
+    (at most `retries` times). A just-accepted order counts as pending for `settle` seconds,
+    until it shows up in the open orders, so it is never doubled. run() returns a report
+    with the total time-to-flat.
+    """
+    def __init__(self, alpaca: AlpacaInterface, max_workers: int = 16, retries: int = 3,
+                 poll_interval: float = 0.5, settle: float = 2.0, timeout: float = 120.0):
+        self.alpaca = alpaca
+        self.max_workers = max_workers
+        self.retries = retries
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.timeout = timeout
+        self._last_positions: Dict[str, float] = {}
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Returns {'flat', 'time_to_flat' (seconds, None if not flat), 'submit_seconds',
+        'orders', 'failures', 'remaining' {symbol: qty}}.
+        """
+        t_start = time.perf_counter()
+        try:
+            self.alpaca.trading_client.cancel_orders()
+            logger.info("Cancelled all pending orders.")
+        except Exception as e:
+            logger.error(f"Error cancelling pending orders: {e}")
+
+        attempts: Dict[str, int] = {}
+        accepted: Dict[str, float] = {}  # symbol -> perf_counter of its last accepted order
+        orders = failures = 0
+        submit_seconds = None
+        remaining = self._open_positions()
+        pending: Dict[str, float] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="liquidate") as pool:
+            while remaining:
+                # Close what is open and not already covered by a pending closing order
+                now = time.perf_counter()
+                todo = {s: q for s, q in remaining.items()
+                        if abs(q) - pending.get(s, 0.0) > 1e-9 and attempts.get(s, 0) <= self.retries
+                        and now - accepted.get(s, -self.settle) >= self.settle}
+                if todo:
+                    # Remaining qty not covered by a working order (all of it on the first pass)
+                    todo = {s: (abs(q) - pending.get(s, 0.0)) * (1 if q > 0 else -1) for s, q in todo.items()}
+                    results = list(pool.map(lambda item: self._close(*item), todo.items()))
+                    if submit_seconds is None:
+                        submit_seconds = time.perf_counter() - t_start
+                    for symbol, ok in zip(todo, results):
+                        attempts[symbol] = attempts.get(symbol, 0) + 1
+                        if ok:
+                            accepted[symbol] = time.perf_counter()
+                        orders += ok
+                        failures += not ok
+                elif all(attempts.get(s, 0) > self.retries for s in remaining):
+                    break
+
+                if time.perf_counter() - t_start > self.timeout:
+                    break
+                time.sleep(self.poll_interval)
+                remaining = self._open_positions()
+                pending = self._pending_close_qty()
+
+        elapsed = time.perf_counter() - t_start
+        flat = not remaining
+        if flat:
+            logger.info(f"✅ Flat in {elapsed:.2f}s ({orders} orders, {failures} failed submissions)")
+        else:
+            logger.error(f"❌ Liquidation incomplete after {elapsed:.2f}s, still open: {remaining}")
+        return {
+            "flat": flat,
+            "time_to_flat": elapsed if flat else None,
+            "submit_seconds": submit_seconds,
+            "orders": orders,
+            "failures": failures,
+            "remaining": remaining,
+        }
+
+    def _close(self, symbol: str, qty: float) -> bool:
+        side = 'sell' if qty > 0 else 'buy'
+        try:
+            self.alpaca.submit_order(symbol, abs(qty), side)
+            logger.info(f"✅ Liquidation order {side} {abs(qty)} {symbol}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to liquidate {symbol}: {e}")
+            return False
+
+    def _open_positions(self) -> Dict[str, float]:
+        try:
+            positions = self.alpaca.get_positions()
+        except Exception as e:
+            logger.error(f"Error fetching positions during liquidation: {e}")
+            return self._last_positions
+        self._last_positions = {s: float(p.qty) for s, p in positions.items() if abs(float(p.qty)) > 1e-9}
+        return self._last_positions
+
+    def _pending_close_qty(self) -> Dict[str, float]:
+        """Unfilled quantity of open orders per symbol (all of them are closing orders after the cancel)."""
+        from alpaca.trading.requests import GetOrdersRequest
+        from alpaca.trading.enums import QueryOrderStatus
+        try:
+            open_orders = self.alpaca.trading_client.get_orders(
+                filter=GetOrdersRequest(status=QueryOrderStatus.OPEN, limit=500))
+        except Exception as e:
+            logger.error(f"Error fetching open orders during liquidation: {e}")
+            # Unknown: assume the submitted orders are still working rather than doubling them
+            return {s: abs(q) for s, q in self._last_positions.items()}
+        pending: Dict[str, float] = {}
+        for o in open_orders:
+            left = float(o.qty or 0) - float(o.filled_qty or 0)
+            pending[o.symbol] = pending.get(o.symbol, 0.0) + left
+        return pending
@@ -0,0 +1,177 @@
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a sub-millisecond in-memory evaluation up to a stalled REST call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Fixed-bucket histogram: observe() is one bisect and three additions under a lock."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: > largest bucket
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf past the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+class MetricsRegistry:
+    """
+    Labelled histograms and counters rendered in the Prometheus text format.
+
+    serve() exposes them at http://host:port/metrics from a daemon thread, so a scraper
+    (or curl) sees per-stage tick latencies without touching the trading loop.
+    """
+    def __init__(self, prefix: str = "trading"):
+        self.prefix = prefix
+        # name -> (type, help)
+        self.families: Dict[str, Tuple[str, str]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self.families[name] = (kind, help_text)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = tuple(sorted(labels.items()))
+        series = self.histograms.setdefault(name, {})
+        hist = series.get(key)
+        if hist is None:
+            with self._lock:
+                hist = series.setdefault(key, Histogram())
+        return hist
+
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    def time(self, name: str, **labels) -> _Timer:
+        """`with metrics.time('stage_seconds', stage='price_fetch'):` observes the block's duration."""
+        return _Timer(self.histogram(name, **labels))
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def counter(self, name: str, **labels) -> float:
+        return self.counters.get(name, {}).get(tuple(sorted(labels.items())), 0.0)
+
+    # ------------------------------------------------------------------ output
+
+    def stage_summary(self, name: str = "stage_seconds", label: str = "stage") -> Dict[str, Dict[str, float]]:
+        """{label value: {'count', 'mean', 'p50', 'p95'}} for one histogram family (quantiles are bucket bounds)."""
+        out = {}
+        for key, hist in list(self.histograms.get(name, {}).items()):
+            value = dict(key).get(label, "")
+            out[value] = {'count': hist.count, 'mean': hist.sum / hist.count if hist.count else 0.0,
+                          'p50': hist.quantile(0.5), 'p95': hist.quantile(0.95)}
+        return out
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str, default_kind: str):
+            kind, help_text = self.families.get(name, (default_kind, name))
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        for name, series in list(self.histograms.items()):
+            full = header(name, "histogram")
+            for key, hist in list(series.items()):
+                with hist._lock:
+                    counts, total, count = list(hist.counts), hist.sum, hist.count
+                cumulative = 0
+                for bound, c in zip(list(hist.buckets) + ['+Inf'], counts):
+                    cumulative += c
+                    lines.append(f"{full}_bucket{_labels(key, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{full}_sum{_labels(key)} {total}")
+                lines.append(f"{full}_count{_labels(key)} {count}")
+
+        for name, series in list(self.counters.items()):
+            full = header(name, "counter")
+            for key, value in list(series.items()):
+                lines.append(f"{full}_total{_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Starts the /metrics endpoint on a daemon thread (port 0 picks a free port)."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"Metrics endpoint on http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+def _labels(key: LabelKey, *extra: Tuple[str, str]) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
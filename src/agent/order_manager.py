@@ -0,0 +1,321 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from src.data.alpaca_interface import AlpacaInterface
+from src.data.database import DatabaseManager
+from src.data.position_book import PositionBook
+from src.strategy.base import BaseStrategy
+from src.agent.metrics import MetricsRegistry
+from src.agent.risk import RiskGate
+
+logger = logging.getLogger(__name__)
+
+class OrderManager:
+    """
+    Nets the signals of all strategies on a symbol into at most one order per tick.
+
+    Every strategy owns a virtual sub-position (qty, avg entry) of the single broker
+    position, persisted in strategy_positions: a SELL closes only that strategy's shares,
+    and BUYs are capped so the symbol's total stays within the per-symbol allocation.
+    Opposite intents cross internally (e.g. BB sells 10 while VB buys 9 -> one order to
+    sell 1). While an order for a symbol is in flight no new order is sent for it.
+
+    With a PositionBook the sub-positions move on the stream's fills (partial fills
+    pro rata) and the in-flight entry clears when the order closes. Without one they are
+    applied at the signal price on submission and the entry expires after order_timeout.
+
+    With a RiskGate every netted order is checked before it is sent (in memory, no broker
+    call); a rejected order is dropped and the gate learns about fills and closed orders.
+    """
+    def __init__(self, alpaca: AlpacaInterface, db: DatabaseManager, position_book: Optional[PositionBook] = None,
+                 order_timeout: float = 30.0, on_realized: Optional[Callable[[str, float], None]] = None,
+                 db_lock: Optional[threading.Lock] = None, metrics: Optional[MetricsRegistry] = None,
+                 risk: Optional[RiskGate] = None):
+        self.alpaca = alpaca
+        self.db = db
+        self.position_book = position_book
+        self.order_timeout = order_timeout
+        # on_realized(strategy_name, realized_pl) for each closing allocation (e.g. EquityTracker.on_fill)
+        self.on_realized = on_realized
+        self._db_lock = db_lock or threading.Lock()
+        self.metrics = metrics or MetricsRegistry()
+        self.risk = risk
+        self._lock = threading.RLock()
+
+        # (symbol, strategy_name) -> [qty, avg_entry_price]
+        self.sub_positions: Dict[Tuple[str, str], List[float]] = {}
+        # order_id -> {'symbol', 'side', 'qty', 'filled', 'allocations', 'submitted'}
+        self.inflight: Dict[str, Dict[str, Any]] = {}
+        # Stream events that arrived before submit() registered their order (replayed on registration)
+        self._early_events: Dict[str, List[Tuple[str, float, float]]] = {}
+        self.orders_saved = 0  # signals that did not need an order of their own (netted, crossed, suppressed)
+
+        try:
+            self.sub_positions = {k: list(v) for k, v in self.db.load_strategy_positions().items()}
+        except Exception as e:
+            logger.error(f"Error loading strategy positions: {e}")
+        if position_book is not None:
+            position_book.add_listener(self.on_order_event)
+
+    # ------------------------------------------------------------------ lookups
+
+    def position(self, symbol: str, strategy_name: str) -> Tuple[float, float]:
+        qty, avg = self.sub_positions.get((symbol, strategy_name), (0.0, 0.0))
+        return qty, avg
+
+    def positions(self) -> Dict[Tuple[str, str], Tuple[float, float]]:
+        with self._lock:
+            return {k: (v[0], v[1]) for k, v in self.sub_positions.items()}
+
+    def symbol_qty(self, symbol: str) -> float:
+        with self._lock:
+            return sum(v[0] for (s, _), v in self.sub_positions.items() if s == symbol)
+
+    def in_flight(self, symbol: str) -> bool:
+        """True while an order for the symbol is unconfirmed (stale entries expire after order_timeout)."""
+        with self._lock:
+            self._expire()
+            return any(entry['symbol'] == symbol for entry in self.inflight.values())
+
+    def _expire(self):
+        now = time.monotonic()
+        for order_id, entry in list(self.inflight.items()):
+            if now - entry['submitted'] > self.order_timeout:
+                if self.position_book is not None:
+                    logger.warning(f"No fill confirmation for order {order_id} ({entry['symbol']}) "
+                                   f"after {self.order_timeout:.0f}s; releasing it")
+                del self.inflight[order_id]
+                if self.risk is not None:
+                    self.risk.release(entry['symbol'])
+
+    # ------------------------------------------------------------------ orders
+
+    def submit(self, symbol: str, intents: List[Tuple[BaseStrategy, Dict]], price: float, max_qty: int):
+        """
+        Nets one tick's signals for a symbol. `max_qty` is the per-symbol share cap (sizing).
+        Returns the submitted order, or None if nothing had to be sent.
+        """
+        if not intents:
+            return None
+        if self.in_flight(symbol):
+            self.orders_saved += len(intents)
+            logger.info(f"Skipping {len(intents)} signal(s) on {symbol}: an order is still in flight")
+            return None
+
+        with self._lock:
+            allocations: Dict[str, float] = {}
+            reasons: Dict[str, str] = {}
+            projected = self.symbol_qty(symbol)
+            for strategy, signal in intents:
+                qty, _ = self.position(symbol, strategy.name)
+                if signal['action'] == 'SELL' and qty > 0:
+                    allocations[strategy.name] = -qty
+                    reasons[strategy.name] = signal['reason']
+                    projected -= qty
+            for strategy, signal in intents:
+                qty, _ = self.position(symbol, strategy.name)
+                if signal['action'] == 'BUY' and qty <= 0:
+                    buy = max(0, int(max_qty - projected))
+                    if buy > 0:
+                        allocations[strategy.name] = buy
+                        reasons[strategy.name] = signal['reason']
+                        projected += buy
+            net = sum(allocations.values())
+
+        if not allocations:
+            return None
+        if abs(net) < 1e-9:
+            # Fully crossed between strategies: nothing to send to the broker
+            self.orders_saved += len(allocations)
+            logger.info(f"CROSSED {symbol} internally @ {price}: {allocations}")
+            self._apply(symbol, allocations, price, 1.0)
+            self._log(symbol, allocations, price, reasons, None)
+            return None
+
+        side = 'buy' if net > 0 else 'sell'
+        if self.risk is not None:
+            with self.metrics.time("stage_seconds", stage="risk_check"):
+                rejected = self.risk.check(symbol, side, abs(net), price)
+            if rejected:
+                logger.warning(f"RISK REJECTED {side.upper()} {symbol}: {abs(net)} @ {price} ({rejected})")
+                return None
+        try:
+            with self.metrics.time("stage_seconds", stage="order_submit"):
+                order = self.alpaca.submit_order(symbol, abs(net), side)
+        except Exception:
+            self.metrics.inc("errors", stage="order_submit")
+            if self.risk is not None:
+                self.risk.release(symbol)
+            raise
+        self.metrics.inc("orders", side=side)
+        self.orders_saved += len(allocations) - 1
+        order_id = str(order.id) if hasattr(order, 'id') else None
+        logger.info(f"EXECUTED {side.upper()} {symbol}: {abs(net)} @ {price} (allocations: {allocations})")
+        self._log(symbol, allocations, price, reasons, order_id)
+
+        early = []
+        with self._lock:
+            # Without a fill stream the whole order is applied below: nothing is left to replay on restart
+            entry = {'symbol': symbol, 'side': side, 'qty': abs(net),
+                     'filled': 0.0 if self.position_book is not None else abs(net),
+                     'allocations': allocations, 'submitted': time.monotonic()}
+            if order_id:
+                self.inflight[order_id] = entry
+                early = self._early_events.pop(order_id, [])
+        if self.position_book is not None:
+            self.position_book.track_order(order)
+            for event, qty, fill_price in early:
+                self.on_order_event(event, order_id, qty, fill_price)
+        else:
+            # No fill stream: assume the market order fills at the signal price
+            self._apply(symbol, allocations, price, 1.0, {order_id: abs(net)} if order_id else None)
+            if self.risk is not None:
+                self.risk.on_fill(symbol, net, price)
+                self.risk.release(symbol)
+        return order
+
+    def on_order_event(self, event: str, order_id: str, qty: float, price: float):
+        """PositionBook listener: moves sub-positions on fills and releases closed orders."""
+        with self._lock:
+            entry = self.inflight.get(order_id)
+            if entry is None:
+                # Possibly our own order whose fill beat submit()'s return; keep a bounded backlog
+                if len(self._early_events) >= 1000:
+                    self._early_events.pop(next(iter(self._early_events)))
+                self._early_events.setdefault(order_id, []).append((event, qty, price))
+                return
+            if event in ('fill', 'partial_fill') and qty > 0:
+                filled = min(qty, entry['qty'] - entry['filled'])
+                entry['filled'] += qty
+                self._apply(entry['symbol'], entry['allocations'], price, filled / entry['qty'],
+                            {order_id: entry['filled']})
+                if self.risk is not None:
+                    self.risk.on_fill(entry['symbol'], filled if entry['side'] == 'buy' else -filled, price)
+            if event != 'partial_fill':
+                del self.inflight[order_id]
+                if self.risk is not None:
+                    self.risk.release(entry['symbol'])
+
+    def _apply(self, symbol: str, allocations: Dict[str, float], price: float, fraction: float,
+               applied_fills: Optional[Dict[str, float]] = None):
+        """Moves the sub-positions by `fraction` of the allocations; `applied_fills` is persisted with them."""
+        changed = {}
+        realized = []
+        with self._lock:
+            for name, alloc in allocations.items():
+                delta = alloc * fraction
+                qty, avg = self.sub_positions.get((symbol, name), (0.0, 0.0))
+                if delta > 0:
+                    avg = (qty * avg + delta * price) / (qty + delta)
+                    qty += delta
+                else:
+                    realized.append((name, (price - avg) * -delta))
+                    qty += delta
+                    if qty <= 1e-9:
+                        qty, avg = 0.0, 0.0
+                if qty > 0:
+                    self.sub_positions[(symbol, name)] = [qty, avg]
+                else:
+                    self.sub_positions.pop((symbol, name), None)
+                changed[(symbol, name)] = (qty, avg)
+        self._save(changed, applied_fills)
+        if self.on_realized:
+            for name, pnl in realized:
+                self.on_realized(name, pnl)
+
+    def reconcile(self, broker_positions: Dict[str, Any], symbols: Optional[Iterable[str]] = None):
+        """
+        Trims sub-positions that exceed the broker's position (e.g. after the Time-Cut or a
+        manual close), newest allocation first. Only `symbols` are checked when given (all
+        otherwise); symbols with an order in flight are left alone. Broker shares not owned
+        by any strategy stay unattributed.
+        """
+        changed = {}
+        with self._lock:
+            held = {s for s, _ in self.sub_positions}
+            for symbol in held if symbols is None else held.intersection(symbols):
+                if any(e['symbol'] == symbol for e in self.inflight.values()):
+                    continue
+                broker = float(broker_positions[symbol].qty) if symbol in broker_positions else 0.0
+                excess = self.symbol_qty(symbol) - max(broker, 0.0)
+                if excess <= 1e-9:
+                    continue
+                logger.warning(f"Strategy sub-positions on {symbol} exceed the broker position by {excess}; trimming")
+                for key in reversed([k for k in self.sub_positions if k[0] == symbol]):
+                    if excess <= 1e-9:
+                        break
+                    qty, avg = self.sub_positions[key]
+                    cut = min(qty, excess)
+                    excess -= cut
+                    if qty - cut > 1e-9:
+                        self.sub_positions[key] = [qty - cut, avg]
+                        changed[key] = (qty - cut, avg)
+                    else:
+                        del self.sub_positions[key]
+                        changed[key] = (0.0, 0.0)
+        self._save(changed)
+
+    def export_inflight(self) -> Dict[str, Dict[str, Any]]:
+        """In-flight orders as JSON-serializable dicts ('age' in seconds instead of the monotonic stamp)."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire()
+            return {order_id: {**{k: v for k, v in entry.items() if k != 'submitted'}, 'age': now - entry['submitted']}
+                    for order_id, entry in self.inflight.items()}
+
+    def restore_inflight(self, entries: Dict[str, Dict[str, Any]]):
+        """
+        Re-registers in-flight orders from export_inflight() after a restart and applies the
+        fills they received meanwhile (order status over REST); closed orders are released.
+        The applied fill quantity comes from applied_fills (saved with the sub-positions), not
+        from the checkpoint, which may predate the last fills.
+        """
+        now = time.monotonic()
+        try:
+            applied = self.db.load_applied_fills(list(entries))
+        except Exception as e:
+            logger.error(f"Error loading applied order fills: {e}")
+            applied = {}
+        entries = {order_id: {**entry, 'filled': max(entry['filled'], applied.get(order_id, 0.0))}
+                   for order_id, entry in entries.items()}
+        with self._lock:
+            for order_id, entry in entries.items():
+                restored = {k: v for k, v in entry.items() if k != 'age'}
+                restored['submitted'] = now - entry.get('age', 0.0)
+                self.inflight[order_id] = restored
+        for order_id, entry in entries.items():
+            try:
+                order = self.alpaca.trading_client.get_order_by_id(order_id)
+            except Exception as e:
+                logger.error(f"Error fetching restored order {order_id}: {e}")
+                continue
+            status = getattr(order.status, 'value', order.status)
+            new_fill = float(order.filled_qty or 0) - entry['filled']
+            closed = status in ('filled', 'canceled', 'expired', 'rejected', 'replaced', 'done_for_day')
+            if new_fill > 1e-9:
+                self.on_order_event('fill' if closed else 'partial_fill', order_id, new_fill,
+                                    float(order.filled_avg_price or 0))
+            elif closed:
+                self.on_order_event(status, order_id, 0.0, 0.0)
+
+    def _save(self, changed: Dict[Tuple[str, str], Tuple[float, float]],
+              applied_fills: Optional[Dict[str, float]] = None):
+        if not changed and not applied_fills:
+            return
+        try:
+            with self._db_lock, self.metrics.time("stage_seconds", stage="db_log"):
+                self.db.save_strategy_positions(changed, applied_fills)
+        except Exception as e:
+            logger.error(f"Error persisting strategy positions: {e}")
+
+    def _log(self, symbol: str, allocations: Dict[str, float], price: float, reasons: Dict[str, str],
+             order_id: Optional[str]):
+        """One trade_logs row per strategy allocation (same order id for a netted order)."""
+        try:
+            with self._db_lock, self.metrics.time("stage_seconds", stage="db_log"):
+                for name, alloc in allocations.items():
+                    self.db.log_trade(symbol, 'BUY' if alloc > 0 else 'SELL', abs(alloc), price,
+                                      reasons[name], order_id, name)
+        except Exception as e:
+            logger.error(f"Error logging trades for {symbol}: {e}")
@@ -0,0 +1,283 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from src.agent.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Sentinel file seen by every process on the host (executor, shards, dashboard)
+KILL_SWITCH_PATH = "data/KILL_SWITCH"
+
+# Roadmap Phase 2 limits (fractions of account equity)
+DAILY_LOSS_LIMIT = 0.02    # intraday loss at which no new exposure is taken (reduce-only)
+HALT_LOSS_LIMIT = 0.03     # intraday loss at which the kill switch is engaged and the account flattened
+MAX_POSITION_PCT = 0.10    # market value of one symbol's position
+MAX_GROSS_EXPOSURE = 1.0   # sum of |position| market values
+# Runaway-loop guard: orders approved per rolling minute (account-wide it is also capped by the API limit)
+MAX_ORDERS_PER_MINUTE = 120
+
+class KillSwitch:
+    """
+    Global trading halt shared through a sentinel file, so the executor, every shard and the
+    dashboard act on the same switch without a common service.
+
+    engage() creates the file with O_EXCL: only the caller that actually engaged it gets
+    True (and owns the follow-up, e.g. flattening). `engaged` is an in-memory flag that is
+    refreshed from the file at most every `refresh` seconds, so reading it per order costs
+    a clock read; a switch flipped by another process is seen within `refresh`.
+    """
+    def __init__(self, path: str = KILL_SWITCH_PATH, refresh: float = 0.25):
+        self.path = path
+        self.refresh = refresh
+        self._engaged = os.path.exists(path)
+        self._checked = time.monotonic()
+
+    @property
+    def engaged(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked >= self.refresh:
+            self._engaged = os.path.exists(self.path)
+            self._checked = now
+        return self._engaged
+
+    def engage(self, reason: str) -> bool:
+        """Engages the switch; False if it already was (by this or another process)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            self._engaged = True
+            return False
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'reason': reason, 'engaged_at': datetime.now().isoformat(timespec='seconds'),
+                       'pid': os.getpid()}, f)
+        self._engaged = True
+        self._checked = time.monotonic()
+        logger.critical(f"⛔ Kill switch engaged: {reason}")
+        return True
+
+    def release(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._engaged = False
+        self._checked = time.monotonic()
+        logger.warning("Kill switch released: trading may resume.")
+
+    def info(self) -> Optional[Dict[str, Any]]:
+        """{'reason', 'engaged_at', 'pid'} of the engaged switch, None if released."""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            return {'reason': 'unknown'}
+
+class RiskGate:
+    """
+    Pre-trade risk checks against limits and running state held in memory.
+
+    Positions, marks, gross exposure, pending-order reservations and an intraday equity
+    estimate are updated incrementally (position syncs, price updates, fills, the
+    heartbeat's equity samples), so check() is a few dict lookups and comparisons with no
+    broker call. Rules, in order:
+      kill_switch  engaged: nothing is sent
+      order_rate   more than max_orders_per_minute orders approved in the last minute
+      daily_loss   intraday return <= -daily_loss_limit: reduce-only
+      position     position value after the order > max_position_pct of equity
+      exposure     gross exposure after the order > max_gross_exposure x equity
+    Orders that only shrink a position skip the loss and sizing rules. At -halt_loss_limit
+    the gate engages the kill switch itself and pop_trip() hands the flattening to the
+    caller once. Equity-based rules are skipped until the first equity sample.
+    """
+    def __init__(self, kill_switch: Optional[KillSwitch] = None, daily_loss_limit: float = DAILY_LOSS_LIMIT,
+                 halt_loss_limit: float = HALT_LOSS_LIMIT, max_position_pct: float = MAX_POSITION_PCT,
+                 max_gross_exposure: float = MAX_GROSS_EXPOSURE, max_orders_per_minute: int = MAX_ORDERS_PER_MINUTE,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.kill_switch = kill_switch or KillSwitch()
+        self.daily_loss_limit = daily_loss_limit
+        self.halt_loss_limit = halt_loss_limit
+        self.max_position_pct = max_position_pct
+        self.max_gross_exposure = max_gross_exposure
+        self.max_orders_per_minute = max_orders_per_minute
+        self.metrics = metrics or MetricsRegistry()
+        self.metrics.describe("risk_rejections", "counter", "Orders blocked by the pre-trade risk gate per rule")
+        self._lock = threading.Lock()
+
+        self.positions: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+        # symbol -> (signed qty, price) of the order in flight; price 0 for reducing orders (no exposure added)
+        self.pending: Dict[str, Tuple[float, float]] = {}
+        self.gross = 0.0  # sum |qty| * mark
+        self.pending_notional = 0.0
+        self.equity: Optional[float] = None
+        self.day_open_equity: Optional[float] = None
+        self.mark_pl = 0.0  # P&L of mark moves since the last equity sample
+        self.approved: deque = deque()
+        self.rejections: Dict[str, int] = {}
+        self.tripped: Optional[str] = None
+        self._halted = False
+
+    # ------------------------------------------------------------------ state updates
+
+    def new_day(self):
+        """Clears the per-session counters and the halt latch (pre-market)."""
+        with self._lock:
+            self.approved.clear()
+            self.rejections.clear()
+            self.tripped = None
+            self._halted = False
+
+    def on_equity(self, equity: float, day_open_equity: Optional[float] = None):
+        """Account equity sample; `day_open_equity` (Alpaca's last_equity) is the daily-loss baseline."""
+        with self._lock:
+            self.equity = equity
+            if day_open_equity:
+                self.day_open_equity = day_open_equity
+            elif self.day_open_equity is None:
+                self.day_open_equity = equity
+            self.mark_pl = 0.0
+        self._check_halt()
+
+    def on_price(self, symbol: str, price: float):
+        with self._lock:
+            self._mark(symbol, price)
+        self._check_halt()
+
+    def on_position(self, symbol: str, qty: float, price: Optional[float] = None):
+        """Authoritative broker position of a symbol (e.g. the tick's position fetch)."""
+        with self._lock:
+            if price is not None:
+                self._mark(symbol, price)
+            self._set_position(symbol, qty)
+        self._check_halt()
+
+    def on_fill(self, symbol: str, qty: float, price: float):
+        """Signed filled quantity of our order; moves it from the reservation to the position."""
+        with self._lock:
+            self._mark(symbol, price)
+            self._set_position(symbol, self.positions.get(symbol, 0.0) + qty)
+            pending = self.pending.get(symbol)
+            if pending is not None:
+                left = pending[0] - qty
+                self._unreserve(symbol)
+                if left * pending[0] > 1e-9:
+                    self._reserve(symbol, left, pending[1])
+
+    def release(self, symbol: str):
+        """Drops the reservation of the symbol's order (closed, rejected or failed)."""
+        with self._lock:
+            self._unreserve(symbol)
+
+    def _mark(self, symbol: str, price: float):
+        old = self.marks.get(symbol)
+        self.marks[symbol] = price
+        qty = self.positions.get(symbol, 0.0)
+        if qty:
+            self.gross += abs(qty) * (price - (old or 0.0))
+            if old is not None:
+                self.mark_pl += qty * (price - old)
+
+    def _set_position(self, symbol: str, qty: float):
+        self.gross += (abs(qty) - abs(self.positions.get(symbol, 0.0))) * self.marks.get(symbol, 0.0)
+        if abs(qty) > 1e-9:
+            self.positions[symbol] = qty
+        else:
+            self.positions.pop(symbol, None)
+
+    def _reserve(self, symbol: str, qty: float, price: float):
+        self.pending[symbol] = (qty, price)
+        self.pending_notional += abs(qty) * price
+
+    def _unreserve(self, symbol: str):
+        pending = self.pending.pop(symbol, None)
+        if pending is not None:
+            self.pending_notional = max(0.0, self.pending_notional - abs(pending[0]) * pending[1])
+
+    def _check_halt(self):
+        if self._halted or not self.equity or self.daily_return > -self.halt_loss_limit:
+            return
+        self._halted = True
+        reason = f"daily loss {self.daily_return * 100:.2f}% breached the {self.halt_loss_limit * 100:.0f}% halt limit"
+        if self.kill_switch.engage(reason):
+            self.tripped = reason
+
+    # ------------------------------------------------------------------ checks
+
+    @property
+    def daily_return(self) -> float:
+        if not self.equity or not self.day_open_equity:
+            return 0.0
+        return (self.equity + self.mark_pl) / self.day_open_equity - 1
+
+    def max_shares(self, price: float) -> float:
+        """Largest position (shares) the position rule allows at `price` (inf before the first equity sample)."""
+        if not self.equity or price <= 0:
+            return float('inf')
+        return int(self.max_position_pct * self.equity // price)
+
+    def check(self, symbol: str, side: str, qty: float, price: float) -> Optional[str]:
+        """
+        None if the order may be sent (its exposure is then reserved until fill/release),
+        otherwise the name of the rule that rejected it.
+        """
+        signed = qty if side == 'buy' else -qty
+        now = time.monotonic()
+        with self._lock:
+            if self.kill_switch.engaged:
+                return self._reject('kill_switch')
+            approved = self.approved
+            while approved and now - approved[0] > 60.0:
+                approved.popleft()
+            if len(approved) >= self.max_orders_per_minute:
+                return self._reject('order_rate')
+
+            position = self.positions.get(symbol, 0.0) + self.pending.get(symbol, (0.0, 0.0))[0]
+            after = position + signed
+            reducing = abs(after) < abs(position) and after * position >= 0
+            if not reducing and self.equity:
+                if self.daily_return <= -self.daily_loss_limit:
+                    return self._reject('daily_loss')
+                if abs(after) * price > self.max_position_pct * self.equity + 1e-6:
+                    return self._reject('position')
+                added = (abs(after) - abs(position)) * price
+                if self.gross + self.pending_notional + added > self.max_gross_exposure * self.equity + 1e-6:
+                    return self._reject('exposure')
+
+            approved.append(now)
+            self._unreserve(symbol)
+            self._reserve(symbol, signed, 0.0 if reducing else price)
+        return None
+
+    def _reject(self, rule: str) -> str:
+        # Caller holds self._lock (rejections is also read by status() and cleared by new_day())
+        self.rejections[rule] = self.rejections.get(rule, 0) + 1
+        self.metrics.inc("risk_rejections", rule=rule)
+        return rule
+
+    def pop_trip(self) -> Optional[str]:
+        """The reason if this gate engaged the kill switch since the last call (flatten once), else None."""
+        with self._lock:
+            reason, self.tripped = self.tripped, None
+        return reason
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            equity = self.equity
+            return {
+                'kill_switch': self.kill_switch.engaged,
+                'daily_return': self.daily_return,
+                'reduce_only': bool(equity) and self.daily_return <= -self.daily_loss_limit,
+                'gross_exposure': (self.gross + self.pending_notional) / equity if equity else 0.0,
+                'positions': len(self.positions),
+                'rejections': dict(self.rejections),
+            }
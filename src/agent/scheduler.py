@@ -1,61 +1,138 @@
 import logging
 import asyncio
+import time
+from datetime import time as dtime, timedelta
+from typing import Optional, Tuple
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 from pytz import timezone
-from src.agent.executor import TradingExecutor
+from src.agent.executor import TradingExecutor, TIME_CUT_BEFORE_CLOSE
+from src.agent.liquidator import Liquidator
 from src.data.collector import DataCollector
+from src.data.database import DatabaseManager
+from src.backtest.optimizer import WalkForwardOptimizer
 
 logger = logging.getLogger(__name__)
 
+# US/Eastern time at which the calendar is refreshed and the day's jobs are scheduled
+PLAN_TIME = dtime(4, 0)
+# Offsets from the session's real open (09:00 and 09:29 on a regular day)
+INIT_BEFORE_OPEN = timedelta(minutes=30)
+START_BEFORE_OPEN = timedelta(minutes=1)
+
 class AgentScheduler:
-    def __init__(self, executor: TradingExecutor):
+    def __init__(self, executor: TradingExecutor, walk_forward: bool = False):
         self.executor = executor
         self.collector = DataCollector()
+        self.walk_forward = walk_forward
         self.scheduler = AsyncIOScheduler(timezone=timezone('US/Eastern'))
         
     def start(self):
-        # 09:00 - Data Update & Init
-        self.scheduler.add_job(
-            self.daily_initialization,
-            CronTrigger(hour=9, minute=0, day_of_week='mon-fri')
-        )
-        
-        # 09:29 - Start Loop (slightly before open)
-        self.scheduler.add_job(
-            self.start_trading,
-            CronTrigger(hour=9, minute=29, day_of_week='mon-fri')
-        )
-        
-        # 15:55 - Time Cut (Liquidate)
+        # 04:00 daily - Refresh the trading calendar and schedule today's jobs around the real
+        # open/close (init 30 min before the open, loop 1 min before, Time-Cut 5 min before the close;
+        # nothing on holidays, an earlier Time-Cut on half-days)
         self.scheduler.add_job(
-            self.liquidate_all,
-            CronTrigger(hour=15, minute=55, day_of_week='mon-fri')
+            self.plan_day,
+            CronTrigger(hour=PLAN_TIME.hour, minute=PLAN_TIME.minute)
         )
         
         self.scheduler.start()
         logger.info("Agent Scheduler Started.")
         
-        # Check if we missed the start (Late Start)
+        # Plan today and check if we missed the start (Late Start)
         self.scheduler.add_job(self.check_on_startup)
 
+    async def plan_day(self) -> Optional[Tuple]:
+        """Schedules today's initialization, loop start and Time-Cut from the calendar; returns today's (open, close)."""
+        calendar = self.executor.calendar
+        await asyncio.to_thread(calendar.load)
+        session = calendar.session_on()
+        if session is None:
+            upcoming = calendar.next_session()
+            logger.info(f"📅 No trading session today. Next open: {upcoming[0] if upcoming else 'unknown'}")
+            return None
+        market_open, close = session
+        now = calendar.clock()
+        jobs = {
+            'daily_initialization': (self.daily_initialization, market_open - INIT_BEFORE_OPEN),
+            'start_trading': (self.start_trading, market_open - START_BEFORE_OPEN),
+            'liquidate_all': (self.liquidate_all, close - TIME_CUT_BEFORE_CLOSE),
+        }
+        for job_id, (job, run_at) in jobs.items():
+            if run_at > now:
+                self.scheduler.add_job(job, DateTrigger(run_date=run_at), id=job_id, replace_existing=True)
+        logger.info(f"📅 Session {market_open:%H:%M}-{close:%H:%M} ET ({calendar.session_minutes()} min): "
+                    + ", ".join(f"{job_id} {run_at:%H:%M}" for job_id, (_, run_at) in jobs.items()))
+        return session
+
     async def check_on_startup(self):
-        """Checks if the market is already open when the agent starts."""
-        clock = self.executor.alpaca.get_market_status()
-        if clock.is_open:
+        """Plans today and catches up if the agent starts after the day's jobs were due."""
+        calendar = self.executor.calendar
+        session = await self.plan_day()
+        now = calendar.clock()
+        if calendar.is_open(now):
+            if calendar.time_to_close(now) <= TIME_CUT_BEFORE_CLOSE.total_seconds():
+                logger.warning("Agent started after the Time-Cut: flattening, no trading until the next session.")
+                await self.liquidate_all()
+                return
             logger.warning("Agent started during Market Hours! catching up...")
-            await self.daily_initialization()
+            # Warm restart: today's checkpoint has every strategy's intraday state
+            if await asyncio.to_thread(self.executor.restore_checkpoint):
+                await self.start_trading()
+                return
+            # Today's state already persisted -> history was collected before; restore only
+            persisted = self.executor.db.load_strategy_params(self.executor.trading_date())
+            await self.daily_initialization(collect=len(persisted) < len(self.executor.strategies))
             await self.start_trading()
+        elif session and session[0] - INIT_BEFORE_OPEN <= now < session[0]:
+            # Between the initialization time and the open: initialize now (start_trading is still scheduled
+            # unless it is due already)
+            logger.warning("Agent started after the pre-market initialization time: initializing now.")
+            await self.daily_initialization()
+            if now >= session[0] - START_BEFORE_OPEN:
+                await self.start_trading()
         else:
-            logger.info(f"Market is Closed. Next Open: {clock.next_open}")
+            upcoming = calendar.next_session(now)
+            logger.info(f"Market is Closed. Next Open: {upcoming[0] if upcoming else 'unknown'}")
 
-    async def daily_initialization(self):
+    async def daily_initialization(self, collect: bool = True):
         logger.info("Running Daily Initialization...")
-        # 1. Collect last day's data to ensure we are up to date
-        self.collector.collect_historical_data(self.executor.symbols, days=5)
+        t_start = time.perf_counter()
+        # 1. Collect last day's data to ensure we are up to date (in a worker thread: the loop stays responsive)
+        if collect:
+            await asyncio.to_thread(self.collector.collect_historical_data, self.executor.symbols, days=5)
+        else:
+            logger.info("Persisted strategy state found for today. Skipping data collection.")
+        collected = time.perf_counter()
         
-        # 2. Initialize Strategy (Optimize K)
+        # 2. Walk-forward parameter selection (K, bands, RSI/SMA periods)
+        if self.walk_forward:
+            await self.run_walk_forward()
+        tuned = time.perf_counter()
+
+        # 3. Initialize Strategy (Optimize K)
         await self.executor.initialize_day()
+        logger.info(f"⏱️  Daily initialization ready in {time.perf_counter() - t_start:.2f}s "
+                    f"(collect {collected - t_start:.2f}s, walk-forward {tuned - collected:.2f}s, "
+                    f"strategies {self.executor.init_timings.get('total', 0.0):.2f}s)")
+
+    async def run_walk_forward(self):
+        """Runs (or reloads today's) walk-forward optimization in a worker process pool."""
+        today = self.executor.trading_date()
+        db = self.executor.db
+        results = db.load_walk_forward_results(today)
+        if not results:
+            try:
+                optimizer = WalkForwardOptimizer(db=DatabaseManager(db.db_path), cache=self.executor.result_cache)
+                results = await asyncio.to_thread(optimizer.run, self.executor.symbols)
+                db.save_walk_forward_results(today, results)
+            except Exception as e:
+                logger.error(f"Walk-forward optimization failed, falling back to in-sample K: {e}")
+                return
+        else:
+            logger.info(f"Loaded {len(results)} walk-forward results for {today}.")
+        self.executor.tuned_params = WalkForwardOptimizer.to_param_map(results)
 
     async def start_trading(self):
         logger.info("Market Open Soon. Starting Trading Loop...")
@@ -67,26 +144,14 @@ class AgentScheduler:
         self.executor.stop() # Stop buying
         
         try:
-            # 1. Cancel all pending orders first
-            self.executor.alpaca.trading_client.cancel_orders()
-            logger.info("Cancelled all pending orders.")
-            
-            # 2. Fetch all open positions once
-            positions = self.executor.alpaca.trading_client.get_all_positions()
-            
-            if not positions:
-                logger.info("No open positions to liquidate.")
-                return
-
-            for pos in positions:
-                symbol = pos.symbol
-                qty = float(pos.qty)
-                if qty > 0:
-                    try:
-                        self.executor.alpaca.submit_order(symbol, qty, 'sell')
-                        logger.info(f"✅ Liquidated {symbol}: {qty}")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to liquidate {symbol}: {e}")
+            # Cancel pending orders, close every position concurrently, poll until flat
+            report = await asyncio.to_thread(Liquidator(self.executor.alpaca).run)
+            logger.info(f"⏱️  Time-Cut: {report['orders']} closing orders submitted in "
+                        f"{(report['submit_seconds'] or 0) * 1000:.0f}ms, "
+                        + (f"flat after {report['time_to_flat']:.2f}s" if report['flat'] else f"still open: {report['remaining']}"))
+            # Liquidation orders are not strategy orders: drop the strategies' sub-positions to match
+            self.executor.on_liquidated(report['remaining'])
+            return report
         except Exception as e:
             logger.error(f"Critical error during liquidation: {e}")
 
@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import queue
+import time as systime
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import pytz
+from src.agent.executor import HEARTBEAT_SECONDS, RISK_SNAPSHOT_SECONDS, TradingExecutor, build_strategies
+from src.agent.gateway import GatewayClient, OrderGateway, DEFAULT_RATE_PER_MINUTE
+from src.agent.metrics import MetricsRegistry
+from src.agent.risk import MAX_GROSS_EXPOSURE
+from src.backtest.equity import EquityTracker
+from src.data.alpaca_interface import AlpacaInterface
+from src.data.cache import ResultCache
+from src.data.database import DatabaseManager
+from src.data.market_calendar import TradingCalendar
+from src.data.position_book import PositionBook
+from src.strategy.base import BaseStrategy
+
+logger = logging.getLogger(__name__)
+
+# Symbols per latest-trade request of the shared price feed
+FEED_BATCH = 200
+
+def partition(symbols: List[str], n_shards: int) -> List[List[str]]:
+    """Round-robin split: shard sizes differ by at most one symbol, order is stable."""
+    n_shards = max(1, min(n_shards, len(symbols)))
+    return [symbols[i::n_shards] for i in range(n_shards)]
+
+def run_shard(shard_id: int, symbols: List[str], control, status, price_feed, requests, replies, realized,
+              options: Dict[str, Any]):
+    """Shard process entry point: one event-mode TradingExecutor driven by the coordinator."""
+    logging.basicConfig(level=logging.INFO,
+                        format=f'%(asctime)s [%(levelname)s] shard-{shard_id} %(name)s: %(message)s')
+    try:
+        asyncio.run(_shard_main(shard_id, symbols, control, status, price_feed, requests, replies, realized, options))
+    except KeyboardInterrupt:
+        pass
+
+async def _shard_main(shard_id: int, symbols: List[str], control, status, price_feed, requests, replies, realized,
+                      options: Dict[str, Any]):
+    client = GatewayClient(requests, replies, shard_id)
+    metrics = MetricsRegistry()
+    if options.get('metrics_port'):
+        metrics.serve(port=options['metrics_port'] + 1 + shard_id)
+    executor = TradingExecutor(symbols, evaluation_mode="event", price_source="feed", price_feed=price_feed,
+                               alpaca=client, metrics=metrics, result_cache=ResultCache() if options.get('result_cache') else None,
+                               checkpoint_path=f"data/checkpoint-shard{shard_id}.json",
+                               # Each shard sees only its own positions: its share of the account-wide cap
+                               risk_limits={'max_gross_exposure': MAX_GROSS_EXPOSURE * options.get('exposure_share', 1.0)},
+                               # Realized P&L goes to the coordinator's account-wide EquityTracker
+                               on_realized=lambda strategy, pl: realized.put((strategy, pl)))
+    loop_task: Optional[asyncio.Task] = None
+    logger.info(f"Shard {shard_id} ready with {len(symbols)} symbols")
+    while True:
+        command, payload = await asyncio.to_thread(control.get)
+        result: Any = True
+        try:
+            if command == 'initialize':
+                executor.tuned_params = payload['tuned_params']
+                await executor.initialize_day(allocation=payload['allocation'])
+                result = executor.init_timings
+            elif command == 'restore':
+                result = executor.restore_checkpoint()
+            elif command == 'start':
+                if loop_task is None or loop_task.done():
+                    loop_task = asyncio.create_task(executor.run_loop())
+            elif command == 'stop':
+                executor.stop()
+            elif command == 'liquidated':
+                executor.on_liquidated(payload)
+            elif command == 'shutdown':
+                executor.stop()
+                if loop_task:
+                    await asyncio.wait([loop_task], timeout=5)
+                status.put((shard_id, command, True))
+                return
+        except Exception as e:
+            logger.error(f"Shard {shard_id} failed to {command}: {e}")
+            result = None
+        status.put((shard_id, command, result))
+
+class ShardCoordinator:
+    """
+    Runs the symbol universe as `n_shards` worker processes, each with its own event-mode
+    TradingExecutor over a slice of the symbols, so per-tick work stays bounded as the
+    universe grows.
+
+    The coordinator owns everything account-wide: the single price feed (batched
+    latest-trade polls fanned out to the shards), the OrderGateway every shard's broker
+    calls go through (one rate limit for the account), the allocation (buying power split
+    over the whole universe), the equity metrics (one EquityTracker fed with every shard's
+    realized P&L, persisted to risk_snapshots / risk_state) and the Time-Cut liquidation.
+    It exposes the executor methods
+    AgentScheduler uses, so it can stand in for a TradingExecutor there.
+    """
+    def __init__(self, symbols: List[str], n_shards: int, alpaca: Optional[AlpacaInterface] = None,
+                 position_book: Optional[PositionBook] = None, result_cache: Optional[ResultCache] = None,
+                 poll_interval: float = 1.0, rate_per_minute: float = DEFAULT_RATE_PER_MINUTE,
+                 command_timeout: float = 600.0, metrics_port: int = 0):
+        self.symbols = symbols
+        self.alpaca = alpaca or AlpacaInterface()
+        self.db = DatabaseManager()
+        self.position_book = position_book
+        self.result_cache = result_cache
+        self.poll_interval = poll_interval
+        self.command_timeout = command_timeout
+        self.metrics_port = metrics_port
+        self.tuned_params: Dict[tuple, Dict] = {}
+        self.init_timings: Dict[str, float] = {}
+        self.investment_per_symbol = 0.0
+        self.running = False
+        self.last_prices: Dict[str, float] = {}
+        # Loaded pre-market; its cache file is what the shards' executors read
+        self.calendar = TradingCalendar(self.alpaca)
+        # Only used for counts (e.g. persisted state coverage): the shards own the live strategies
+        self.strategies: List[BaseStrategy] = build_strategies(symbols)
+        # Account-wide drawdown / Sharpe / exposure / P&L attribution (shards report realized P&L)
+        self.equity = EquityTracker()
+        self._last_equity_sample = 0.0
+        self._last_risk_snapshot = 0.0
+
+        self.shard_symbols = partition(symbols, n_shards)
+        self.shard_of = {s: i for i, shard in enumerate(self.shard_symbols) for s in shard}
+        ctx = mp.get_context("spawn")
+        self._ctx = ctx
+        self.requests = ctx.Queue()
+        self.status = ctx.Queue()
+        self.replies = {i: ctx.Queue() for i in range(len(self.shard_symbols))}
+        self.controls = {i: ctx.Queue() for i in range(len(self.shard_symbols))}
+        self.price_feeds = {i: ctx.Queue() for i in range(len(self.shard_symbols))}
+        # (strategy_name, realized_pl) of closing fills, from every shard
+        self.realized = ctx.Queue()
+        self.gateway = OrderGateway(self.alpaca, self.requests, self.replies, position_book, rate_per_minute)
+        self.processes: List[mp.Process] = []
+
+    trading_date = staticmethod(TradingExecutor.trading_date)
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        """Starts the gateway and the shard processes."""
+        self.gateway.start()
+        options = {'metrics_port': self.metrics_port, 'result_cache': self.result_cache is not None}
+        for i, symbols in enumerate(self.shard_symbols):
+            process = self._ctx.Process(
+                target=run_shard, name=f"shard-{i}", daemon=True,
+                args=(i, symbols, self.controls[i], self.status, self.price_feeds[i], self.requests,
+                      self.replies[i], self.realized, {**options, 'exposure_share': len(symbols) / len(self.symbols)}))
+            process.start()
+            self.processes.append(process)
+        logger.info(f"Started {len(self.processes)} shards: " + ", ".join(f"{len(s)} symbols" for s in self.shard_symbols))
+
+    def shutdown(self):
+        self.running = False
+        self._broadcast('shutdown', timeout=10)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.gateway.stop()
+
+    # ------------------------------------------------------------------ executor interface
+
+    async def initialize_day(self):
+        """Computes the universe-wide allocation, then initializes all shards in parallel."""
+        t_start = systime.perf_counter()
+        await asyncio.to_thread(self.calendar.load)
+        try:
+            account = await asyncio.to_thread(self.alpaca.get_account_info)
+            # Allocation Strategy: 90% of Buying Power / Number of Symbols (whole universe)
+            self.investment_per_symbol = float(account.buying_power) * 0.90 / len(self.symbols)
+            logger.info(f"💰 Allocation: ${self.investment_per_symbol:,.2f} per symbol ({len(self.symbols)} symbols)")
+        except Exception as e:
+            logger.error(f"Error updating allocation: {e}")
+        # Resume the running equity metrics (peak, rolling returns, contributions) after a restart
+        if self.equity.equity is None:
+            try:
+                state = self.db.load_risk_state()
+                if state:
+                    self.equity.set_state(state)
+            except Exception as e:
+                logger.error(f"Error restoring equity metrics: {e}")
+        results = await asyncio.to_thread(self._broadcast, 'initialize',
+                                          {'allocation': self.investment_per_symbol or None,
+                                           'tuned_params': self.tuned_params})
+        slowest = max((r.get('total', 0.0) for r in results.values() if r), default=0.0)
+        self.init_timings = {'slowest_shard': slowest, 'total': systime.perf_counter() - t_start}
+        logger.info(f"⏱️  {len(results)} shards initialized in {self.init_timings['total']:.2f}s (slowest shard {slowest:.2f}s)")
+
+    def restore_checkpoint(self) -> bool:
+        """Warm restart: True only if every shard restored its checkpoint."""
+        results = self._broadcast('restore')
+        return len(results) == len(self.shard_symbols) and all(results.values())
+
+    async def run_loop(self):
+        """Starts the shards' event loops and runs the shared price feed until stop()."""
+        self.running = True
+        self._broadcast('start', wait=False)
+        await self._feed()
+
+    def stop(self):
+        self.running = False
+        self._broadcast('stop', wait=False)
+
+    def on_liquidated(self, remaining: Dict[str, float]):
+        """Forwards the post-liquidation positions so each shard trims its sub-positions."""
+        for i, symbols in enumerate(self.shard_symbols):
+            self.controls[i].put(('liquidated', {s: q for s, q in remaining.items() if s in symbols}))
+
+    # ------------------------------------------------------------------ internals
+
+    async def _feed(self):
+        """
+        One batched latest-trade poll per poll_interval while the market is open; changed prices
+        go to their shard's queue. The account equity is sampled every HEARTBEAT_SECONDS.
+        """
+        while self.running:
+            started = systime.perf_counter()
+            if self.calendar.stale:
+                await asyncio.to_thread(self.calendar.load)
+            if self.calendar.is_open():
+                try:
+                    prices = await asyncio.to_thread(self._poll_prices)
+                    self._fan_out(prices)
+                except Exception as e:
+                    logger.error(f"Price feed poll failed: {e}")
+                if systime.monotonic() - self._last_equity_sample >= HEARTBEAT_SECONDS:
+                    self._last_equity_sample = systime.monotonic()
+                    await asyncio.to_thread(self.sample_equity)
+            await asyncio.sleep(max(0.0, self.poll_interval - (systime.perf_counter() - started)))
+
+    def sample_equity(self):
+        """
+        Books the shards' realized P&L, feeds the account equity into the EquityTracker and
+        persists a snapshot every RISK_SNAPSHOT_SECONDS (the only writer of risk_snapshots).
+        """
+        while True:
+            try:
+                strategy, pl = self.realized.get_nowait()
+            except queue.Empty:
+                break
+            self.equity.on_fill(strategy, pl)
+        try:
+            account = self.gateway.call('get_account_info')
+            now = datetime.now(pytz.utc)
+            last_equity = float(account.last_equity) if account.last_equity else None
+            self.equity.on_equity(now, float(account.equity), float(account.long_market_value or 0.0), last_equity)
+            if now.timestamp() - self._last_risk_snapshot >= RISK_SNAPSHOT_SECONDS:
+                self.db.save_risk_snapshot(self.equity.snapshot(), self.equity.get_state())
+                self._last_risk_snapshot = now.timestamp()
+        except Exception as e:
+            logger.error(f"Error sampling equity: {e}")
+
+    def _poll_prices(self) -> Dict[str, float]:
+        prices: Dict[str, float] = {}
+        for i in range(0, len(self.symbols), FEED_BATCH):
+            prices.update(self.gateway.call('get_latest_prices', self.symbols[i:i + FEED_BATCH]))
+        return prices
+
+    def _fan_out(self, prices: Dict[str, float]):
+        batches: Dict[int, Dict[str, float]] = {}
+        for symbol, price in prices.items():
+            if price is None or self.last_prices.get(symbol) == price or symbol not in self.shard_of:
+                continue
+            self.last_prices[symbol] = price
+            batches.setdefault(self.shard_of[symbol], {})[symbol] = price
+        for i, batch in batches.items():
+            self.price_feeds[i].put({'prices': batch})
+
+    def _broadcast(self, command: str, payload: Any = None, wait: bool = True,
+                   timeout: Optional[float] = None) -> Dict[int, Any]:
+        """Sends a command to every shard; with `wait`, returns {shard_id: result} of those that answered."""
+        for control in self.controls.values():
+            control.put((command, payload))
+        if not wait:
+            return {}
+        results: Dict[int, Any] = {}
+        deadline = systime.monotonic() + (timeout or self.command_timeout)
+        while len(results) < len(self.controls):
+            try:
+                shard_id, answered, result = self.status.get(timeout=max(0.0, deadline - systime.monotonic()))
+            except queue.Empty:
+                logger.error(f"Shards {sorted(set(self.controls) - set(results))} did not answer '{command}'")
+                break
+            if answered == command:
+                results[shard_id] = result
+        return results
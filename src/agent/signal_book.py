@@ -0,0 +1,109 @@
+import logging
+from typing import List, Dict, Tuple, Optional, Type
+import numpy as np
+from src.strategy.base import BaseStrategy, HOLD, ACTION_NAMES, indicator_array
+
+logger = logging.getLogger(__name__)
+
+class _StrategyGroup:
+    """All strategies of one class: contiguous state arrays, one row per strategy."""
+    def __init__(self, cls: Type[BaseStrategy], strategies: List[BaseStrategy], symbol_index: Dict[str, int],
+                 offset: int = 0):
+        self.cls = cls
+        self.strategies = strategies
+        self.row_of = {id(s): i for i, s in enumerate(strategies)}
+        self.symbol_idx = np.array([symbol_index[s.symbol] for s in strategies], dtype=np.intp)
+        # Rows of this group's strategies in SignalBook.pairs (per-strategy position vectors)
+        self.pair_idx = np.arange(offset, offset + len(strategies), dtype=np.intp)
+        # compute_signals(prices, positions, avg_entry_prices, *inputs): state fields come from the
+        # strategy objects, anything else (e.g. current_rsi) is a real-time per-symbol input.
+        self.inputs = cls.SIGNAL_INPUTS
+        self.state_fields = [f for f in self.inputs if f in cls.STATE_FIELDS]
+        self.state = {f: np.full(len(strategies), np.nan) for f in self.state_fields}
+        self.refresh()
+
+    def refresh(self):
+        for f in self.state_fields:
+            self.state[f][:] = [indicator_array(getattr(s, f, None)) for s in self.strategies]
+
+    def update(self, strategy: BaseStrategy):
+        row = self.row_of[id(strategy)]
+        for f in self.state_fields:
+            self.state[f][row] = indicator_array(getattr(strategy, f, None))
+
+    def evaluate(self, prices: np.ndarray, positions: np.ndarray, avg_entry_prices: np.ndarray,
+                 inputs: Dict[str, np.ndarray], per_strategy: bool = False) -> np.ndarray:
+        idx = self.symbol_idx
+        pos_idx = self.pair_idx if per_strategy else idx
+        args = []
+        for f in self.inputs:
+            if f in self.state:
+                args.append(self.state[f])
+            elif f in inputs:
+                args.append(inputs[f][idx])
+            else:
+                args.append(np.nan)
+        return self.cls.compute_signals(prices[idx], positions[pos_idx], avg_entry_prices[pos_idx], *args)
+
+class SignalBook:
+    """
+    Struct-of-arrays view over every (symbol, strategy) pair.
+
+    Strategy thresholds (targets, bands, SMAs) are mirrored into contiguous NumPy arrays
+    grouped by strategy class, so one tick is a handful of vectorized comparisons against
+    a price vector instead of a Python loop with isinstance branches.
+    Call refresh() after the strategies' daily state changes and update() after a single
+    strategy changes intraday (e.g. VolatilityBreakout target set at the open).
+    """
+    def __init__(self, strategies: List[BaseStrategy]):
+        self.symbols: List[str] = list(dict.fromkeys(s.symbol for s in strategies))
+        self.symbol_index = {s: i for i, s in enumerate(self.symbols)}
+
+        by_class: Dict[Type[BaseStrategy], List[BaseStrategy]] = {}
+        for s in strategies:
+            by_class.setdefault(type(s), []).append(s)
+        self.groups = []
+        offset = 0
+        for cls, members in by_class.items():
+            self.groups.append(_StrategyGroup(cls, members, self.symbol_index, offset))
+            offset += len(members)
+        self._group_of = {id(s): g for g in self.groups for s in g.strategies}
+        # Every strategy in group order; per-strategy vectors (pair_vector) are aligned with this
+        self.pairs: List[BaseStrategy] = [s for g in self.groups for s in g.strategies]
+
+    def refresh(self):
+        for group in self.groups:
+            group.refresh()
+
+    def update(self, strategy: BaseStrategy):
+        self._group_of[id(strategy)].update(strategy)
+
+    def vector(self, values: Dict[str, float], default: float = np.nan) -> np.ndarray:
+        """{symbol: value} -> array aligned with self.symbols."""
+        out = np.full(len(self.symbols), default, dtype=np.float64)
+        for symbol, value in values.items():
+            i = self.symbol_index.get(symbol)
+            if i is not None and value is not None:
+                out[i] = value
+        return out
+
+    def pair_vector(self, values: Dict[Tuple[str, str], float], default: float = 0.0) -> np.ndarray:
+        """{(symbol, strategy_name): value} -> array aligned with self.pairs."""
+        return np.array([values.get((s.symbol, s.name), default) for s in self.pairs], dtype=np.float64)
+
+    def evaluate(self, prices: np.ndarray, positions: np.ndarray, avg_entry_prices: np.ndarray,
+                 inputs: Optional[Dict[str, np.ndarray]] = None, per_strategy: bool = False) -> List[Tuple[str, BaseStrategy, str]]:
+        """
+        Evaluates all strategies against per-symbol price/position vectors (aligned with self.symbols).
+        With per_strategy=True, positions / avg_entry_prices are per-strategy (aligned with self.pairs).
+        NaN prices are skipped. Returns only the (symbol, strategy, action) triples that fire.
+        """
+        inputs = inputs or {}
+        fired = []
+        for group in self.groups:
+            actions = group.evaluate(prices, positions, avg_entry_prices, inputs, per_strategy)
+            rows = np.flatnonzero((actions != HOLD) & ~np.isnan(prices[group.symbol_idx]))
+            for row in rows:
+                strategy = group.strategies[row]
+                fired.append((strategy.symbol, strategy, ACTION_NAMES[int(actions[row])]))
+        return fired
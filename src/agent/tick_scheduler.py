@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Callable, Dict, Optional
+from src.agent.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+class TickScheduler:
+    """
+    Fixed-rate tick cadence against a monotonic clock.
+
+    Deadlines sit on a fixed grid (start + k * interval), so the time spent working is
+    subtracted from the wait and the period does not drift. A tick whose work runs past
+    its deadline is an overrun: the next tick starts immediately and the grid points it
+    missed are skipped rather than replayed in a burst. Low-priority periodic work asks
+    due() and is shed while ticks overrun (but never deferred past `max_defer` periods).
+    """
+    def __init__(self, interval: float = 1.0, max_defer: float = 3.0, metrics: Optional[MetricsRegistry] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.max_defer = max_defer
+        self.clock = clock
+        self.metrics = metrics or MetricsRegistry()
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0  # grid points missed because of overruns
+        self.shed = 0  # due() calls refused because the last tick overran
+        self.overran = False
+        self.last_lag = 0.0  # seconds the last tick ran past its deadline (0 if on time)
+        self._next = None
+        self._jobs: Dict[str, float] = {}
+
+    def reset(self):
+        """Restarts the grid at the current time (after a pause such as market closed)."""
+        self._next = None
+        self.overran = False
+
+    def start(self):
+        """Marks the start of a tick (first call starts the grid)."""
+        if self._next is None:
+            self._next = self.clock() + self.interval
+
+    def delay(self) -> float:
+        """
+        Ends the current tick: returns the seconds to wait before the next one and
+        records whether the tick overran its deadline.
+        """
+        self.start()
+        now = self.clock()
+        self.ticks += 1
+        lag = now - self._next
+        if lag <= 0:
+            self.overran = False
+            self.last_lag = 0.0
+            wait = self._next - now
+            self._next += self.interval
+            return wait
+
+        missed = math.floor(lag / self.interval)
+        self.overran = True
+        self.last_lag = lag
+        self.overruns += 1
+        self.skipped += missed
+        self.metrics.inc("tick_overruns")
+        if missed:
+            self.metrics.inc("ticks_skipped", missed)
+        # Next grid point after now; this tick's successor starts immediately
+        self._next += (missed + 1) * self.interval
+        logger.warning(f"⏱️  Tick overran its {self.interval:.2f}s period by {lag * 1000:.0f}ms"
+                       + (f" ({missed} tick(s) skipped)" if missed else ""))
+        return 0.0
+
+    async def wait(self):
+        """Sleeps until the next tick's deadline (returns at once after an overrun)."""
+        await asyncio.sleep(self.delay())
+
+    def due(self, name: str, period: float) -> bool:
+        """
+        True when low-priority job `name` should run now (every `period` seconds). While
+        ticks overrun the job is shed, unless it is already `max_defer` periods late.
+        """
+        now = self.clock()
+        last = self._jobs.get(name)
+        if last is not None and now - last < period:
+            return False
+        if last is not None and self.overran and now - last < period * self.max_defer:
+            self.shed += 1
+            self.metrics.inc("jobs_shed", job=name)
+            return False
+        self._jobs[name] = now
+        return True
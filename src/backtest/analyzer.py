@@ -1,73 +1,139 @@
+import logging
+import threading
+import numpy as np
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Union, Optional
 from datetime import datetime
 import pytz
+from src.data.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+FILL_COLUMNS = ['timestamp', 'symbol', 'side', 'qty', 'price', 'order_id', 'strategy']
+ROUND_TRIP_COLUMNS = ['symbol', 'strategy', 'exit_strategy', 'entry_time', 'exit_time', 'holding_time',
+                      'qty', 'entry_price', 'exit_price', 'pnl', 'entry_order_id', 'exit_order_id']
 
 class PerformanceAnalyzer:
     @staticmethod
-    def calculate_daily_performance(orders: list, strategy_map: Dict[str, str] = None) -> pd.DataFrame:
+    def orders_to_fills(orders: list, strategy_map: Dict[str, str] = None) -> pd.DataFrame:
         """
-        Calculate daily P/L per symbol based on closed orders.
-        Assumption: Intraday strategy (Flat at EOD). 
-        P/L = (Sell Amount) - (Buy Amount)
-        
-        Returns: DataFrame with columns [Date, Symbol, Strategy, P/L, Trades, Win]
+        Alpaca order objects -> one row per order with a fill (FILL_COLUMNS).
+        Uses the filled quantity, so partially filled (and then canceled) orders count for what executed.
         """
-        if not orders:
-            return pd.DataFrame()
-
-        data = []
-        
-        # 1. Digest Orders
+        strategy_map = strategy_map or {}
+        rows = []
         for o in orders:
-            if o.status != 'filled':
+            filled_qty = float(o.filled_qty) if getattr(o, 'filled_qty', None) else 0.0
+            if filled_qty <= 0 or not o.filled_avg_price or o.filled_at is None:
                 continue
-            
-            # Timestamp to Date (US/Eastern)
-            dt = o.filled_at.astimezone(pytz.timezone('US/Eastern'))
-            date_str = dt.strftime('%Y-%m-%d')
-            
-            # Amount
-            price = float(o.filled_avg_price) if o.filled_avg_price else 0.0
-            qty = float(o.qty)
-            amount = price * qty
-            
-            # Strategy Lookup
-            strategy = "Unknown"
-            if strategy_map:
-                # Try ID then ClientOrderID
-                strategy = strategy_map.get(str(o.id)) or strategy_map.get(str(o.client_order_id)) or "Unknown"
-
-            # Side effect
-            # BUY: Cost (negative flow), SELL: Revenue (positive flow)
-            flow = -amount if o.side == 'buy' else amount
-            
-            data.append({
-                'Date': date_str,
-                'Symbol': o.symbol,
-                'Strategy': strategy,
-                'Flow': flow,
-                'Side': o.side,
-                'Qty': qty
-            })
-            
-        if not data:
+            side = getattr(o.side, 'value', o.side)
+            # Try ID then ClientOrderID
+            strategy = strategy_map.get(str(o.id)) or strategy_map.get(str(o.client_order_id)) or "Unknown"
+            rows.append((o.filled_at, o.symbol, side, filled_qty, float(o.filled_avg_price), str(o.id), strategy))
+
+        fills = pd.DataFrame(rows, columns=FILL_COLUMNS)
+        fills['timestamp'] = pd.to_datetime(fills['timestamp'], utc=True)
+        return fills
+
+    @staticmethod
+    def match_round_trips(fills: pd.DataFrame) -> pd.DataFrame:
+        """
+        FIFO lot matching of buy and sell fills per symbol, fully vectorized.
+
+        Each symbol's buys and sells are laid out as intervals on a cumulative-quantity axis;
+        every overlap of a buy interval with a sell interval is one round trip (a partial lot
+        when quantities differ). Sells not covered by earlier buys (position opened before the
+        first order in `fills`) are dropped, and buys not yet sold stay open (not returned).
+        """
+        if fills.empty:
+            return _empty_round_trips()
+
+        df = fills.sort_values(['symbol', 'timestamp'], kind='stable').reset_index(drop=True)
+        codes, _ = pd.factorize(df['symbol'])
+        is_buy = (df['side'] == 'buy').to_numpy()
+        qty = df['qty'].to_numpy(dtype=np.float64)
+
+        # Running position floored at zero: the excess of a sell over the position is unmatched.
+        # floor(cumsum) = S_t - min(0, min_{u<=t} S_u), so the unmatched part is the change in that deficit.
+        by_symbol = pd.Series(codes)
+        running = pd.Series(np.where(is_buy, qty, -qty)).groupby(by_symbol).cumsum()
+        deficit = -np.minimum(running.groupby(by_symbol).cummin().to_numpy(), 0.0)
+        prev_deficit = pd.Series(deficit).groupby(by_symbol).shift(1, fill_value=0.0).to_numpy()
+        matched = np.where(is_buy, qty, qty - (deficit - prev_deficit))
+
+        # Cumulative-quantity intervals; symbols are offset so they never overlap
+        buy_qty = np.where(is_buy, qty, 0.0)
+        sell_qty = np.where(is_buy, 0.0, matched)
+        total_buys = np.bincount(codes, weights=buy_qty)
+        base = np.concatenate([[0.0], np.cumsum(total_buys)[:-1]])[codes]
+        buy_end_all = base + pd.Series(buy_qty).groupby(by_symbol).cumsum().to_numpy()
+        sell_end_all = base + pd.Series(sell_qty).groupby(by_symbol).cumsum().to_numpy()
+
+        buys = np.flatnonzero(is_buy & (qty > 0))
+        sells = np.flatnonzero(~is_buy & (matched > 0))
+        if len(buys) == 0 or len(sells) == 0:
+            return _empty_round_trips()
+        buy_end, buy_start = buy_end_all[buys], buy_end_all[buys] - qty[buys]
+        sell_end, sell_start = sell_end_all[sells], sell_end_all[sells] - matched[sells]
+
+        points = np.unique(np.concatenate([buy_start, buy_end, sell_start, sell_end]))
+        lo, hi = points[:-1], points[1:]
+        mid = (lo + hi) / 2
+        bi = np.minimum(np.searchsorted(buy_end, mid, side='right'), len(buys) - 1)
+        si = np.minimum(np.searchsorted(sell_end, mid, side='right'), len(sells) - 1)
+        keep = (buy_start[bi] <= mid) & (mid < buy_end[bi]) & (sell_start[si] <= mid) & (mid < sell_end[si]) & (hi - lo > 1e-9)
+        entry, exit_ = buys[bi[keep]], sells[si[keep]]
+        lot = (hi - lo)[keep]
+
+        price = df['price'].to_numpy(dtype=np.float64)
+        timestamp = pd.DatetimeIndex(df['timestamp'])
+        trips = pd.DataFrame({
+            'symbol': df['symbol'].to_numpy()[entry],
+            'strategy': df['strategy'].to_numpy()[entry],
+            'exit_strategy': df['strategy'].to_numpy()[exit_],
+            'entry_time': timestamp[entry],
+            'exit_time': timestamp[exit_],
+            'qty': lot,
+            'entry_price': price[entry],
+            'exit_price': price[exit_],
+            'pnl': (price[exit_] - price[entry]) * lot,
+            'entry_order_id': df['order_id'].to_numpy()[entry],
+            'exit_order_id': df['order_id'].to_numpy()[exit_],
+        })
+        trips['holding_time'] = trips['exit_time'] - trips['entry_time']
+        return trips[ROUND_TRIP_COLUMNS]
+
+    @staticmethod
+    def calculate_daily_performance(orders: Union[list, pd.DataFrame], strategy_map: Dict[str, str] = None) -> pd.DataFrame:
+        """
+        Calculate daily realized P/L per symbol and strategy from FIFO-matched round trips.
+        P/L is booked on the exit date (US/Eastern) and attributed to the strategy that opened the lot,
+        so positions held across days and partial fills are priced correctly.
+        `orders` are Alpaca order objects or a fills DataFrame (FILL_COLUMNS).
+
+        Returns: DataFrame with columns [Date, Symbol, Strategy, Net_PL, Order_Count, Win]
+        """
+        if orders is None or len(orders) == 0:
             return pd.DataFrame()
-            
-        df = pd.DataFrame(data)
-        
-        # 2. Group by Date, Symbol, and Strategy
-        # Sum of Flow = Net P/L (for completed round trips)
-        daily_stats = df.groupby(['Date', 'Symbol', 'Strategy']).agg({
-            'Flow': 'sum',
-            'Side': 'count' # Total orders (Buy+Sell)
-        }).reset_index()
-        
-        daily_stats.rename(columns={'Flow': 'Net_PL', 'Side': 'Order_Count'}, inplace=True)
-        
-        # 3. Determine Win/Loss
+
+        fills = orders if isinstance(orders, pd.DataFrame) else PerformanceAnalyzer.orders_to_fills(orders, strategy_map)
+        trips = PerformanceAnalyzer.match_round_trips(fills)
+        if trips.empty:
+            return pd.DataFrame()
+
+        trips['Date'] = trips['exit_time'].dt.tz_convert(pytz.timezone('US/Eastern')).dt.tz_localize(None).dt.normalize()
+
+        # Group by exit Date, Symbol, and (entry) Strategy
+        grouped = trips.groupby(['Date', 'symbol', 'strategy'])
+        daily_stats = grouped['pnl'].sum().to_frame('Net_PL')
+        # Orders involved (Buy+Sell)
+        daily_stats['Order_Count'] = grouped['entry_order_id'].nunique() + grouped['exit_order_id'].nunique()
+        daily_stats = daily_stats.reset_index().rename(columns={'symbol': 'Symbol', 'strategy': 'Strategy'})
+        daily_stats['Date'] = daily_stats['Date'].dt.strftime('%Y-%m-%d')
+
+        # Determine Win/Loss
         daily_stats['Win'] = daily_stats['Net_PL'] > 0
-        
+
         return daily_stats
 
     @staticmethod
@@ -118,3 +184,117 @@ class PerformanceAnalyzer:
             "total_trades": total_trades,
             "avg_pl": avg_pl
         }
+
+class IncrementalAnalyzer:
+    """
+    Performance analytics maintained incrementally in the local DB.
+
+    Open FIFO lots, round trips, daily aggregates and per-strategy totals live in the
+    analytics_* tables together with a cursor (last processed fill), so each update only
+    matches the new fills against the stored open lots instead of recomputing history.
+    """
+    def __init__(self, db: DatabaseManager = None):
+        self.db = db or DatabaseManager()
+        self.db.create_tables()
+        self._lock = threading.Lock()
+
+    def cursor(self) -> Optional[datetime]:
+        """filled_at of the newest processed fill (None before the first update)."""
+        row = self.db.get_analytics_cursor()
+        if not row or not row['last_filled_at']:
+            return None
+        return pd.Timestamp(row['last_filled_at']).to_pydatetime()
+
+    def update(self, orders: Union[list, pd.DataFrame], strategy_map: Dict[str, str] = None) -> int:
+        """Processes fills not seen before. Returns the number of new fills."""
+        fills = orders if isinstance(orders, pd.DataFrame) else PerformanceAnalyzer.orders_to_fills(orders or [], strategy_map)
+        if fills.empty:
+            return 0
+
+        with self._lock:
+            fills = fills.drop_duplicates('order_id')
+            new_ids = self.db.filter_new_order_ids(fills['order_id'].tolist())
+            fills = fills[fills['order_id'].isin(new_ids)].sort_values('timestamp', kind='stable')
+            if fills.empty:
+                return 0
+
+            symbols = sorted(fills['symbol'].unique())
+            lots = pd.DataFrame([dict(r) for r in self.db.load_open_lots(symbols)],
+                                columns=['order_id', 'timestamp', 'symbol', 'qty', 'price', 'strategy'])
+            lots['timestamp'] = pd.to_datetime(lots['timestamp'], utc=True)
+            lots['side'] = 'buy'
+            combined = pd.concat([lots[FILL_COLUMNS], fills[FILL_COLUMNS]], ignore_index=True)
+
+            trips = PerformanceAnalyzer.match_round_trips(combined)
+
+            # Remaining quantity of every buy after matching becomes the new open lots
+            buys = combined[combined['side'] == 'buy']
+            used = trips.groupby('entry_order_id')['qty'].sum()
+            remaining = buys['qty'].to_numpy() - buys['order_id'].map(used).fillna(0.0).to_numpy()
+            open_lots = buys.assign(qty=remaining)[remaining > 1e-9]
+
+            dates = np.datetime_as_string(trips['exit_time'].dt.tz_convert(pytz.timezone('US/Eastern')).dt.tz_localize(None)
+                                          .to_numpy().astype('datetime64[D]'))
+            last = fills.iloc[-1]
+            self.db.save_analytics_increment(
+                fills=list(zip(fills['order_id'], _iso(fills['timestamp']), fills['symbol'], fills['side'],
+                               fills['qty'].astype(float), fills['price'].astype(float), fills['strategy'])),
+                round_trips=list(zip(dates, trips['symbol'], trips['strategy'], trips['exit_strategy'],
+                                     _iso(trips['entry_time']), _iso(trips['exit_time']), trips['qty'].astype(float),
+                                     trips['entry_price'].astype(float), trips['exit_price'].astype(float),
+                                     trips['pnl'].astype(float), trips['entry_order_id'], trips['exit_order_id'])),
+                symbols=symbols,
+                open_lots=list(zip(open_lots['order_id'], _iso(open_lots['timestamp']), open_lots['symbol'],
+                                   open_lots['qty'].astype(float), open_lots['price'].astype(float), open_lots['strategy'])),
+                cursor={'last_filled_at': _iso(fills['timestamp'])[-1], 'last_order_id': last['order_id'],
+                        'processed_orders': len(fills)},
+            )
+        logger.info(f"Analytics: processed {len(fills)} new fills, {len(trips)} round trips.")
+        return len(fills)
+
+    def update_from_orders(self, overlap: pd.Timedelta = pd.Timedelta(days=1)) -> int:
+        """
+        Processes final orders from the local `orders` table (see OrderSync) filled since the cursor.
+        `overlap` re-reads recent fills that may have been mirrored late; processed orders are skipped by id.
+        """
+        cursor = self.cursor()
+        after = (pd.Timestamp(cursor) - overlap).tz_convert('UTC').strftime('%Y-%m-%dT%H:%M:%S.%f+00:00') if cursor else None
+        rows = self.db.load_order_fills(after)
+        fills = pd.DataFrame([tuple(r) for r in rows], columns=FILL_COLUMNS)
+        fills['timestamp'] = pd.to_datetime(fills['timestamp'], utc=True)
+        return self.update(fills)
+
+    def daily_performance(self) -> pd.DataFrame:
+        """Same columns as PerformanceAnalyzer.calculate_daily_performance, for the full history."""
+        rows = self.db.execute_query("SELECT date, symbol, strategy, net_pl, order_count, win FROM analytics_daily ORDER BY date, symbol, strategy")
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame([tuple(r) for r in rows], columns=['Date', 'Symbol', 'Strategy', 'Net_PL', 'Order_Count', 'Win'])
+        df['Win'] = df['Win'].astype(bool)
+        return df
+
+    def strategy_metrics(self) -> pd.DataFrame:
+        """Same columns as PerformanceAnalyzer.get_metrics_by_strategy, from the stored totals."""
+        rows = self.db.execute_query("SELECT strategy, net_pl, wins, total_days FROM analytics_strategy_totals ORDER BY strategy")
+        if not rows:
+            return pd.DataFrame()
+        grouped = pd.DataFrame([tuple(r) for r in rows], columns=['Strategy', 'Net_PL', 'Win', 'Total_Days'])
+        grouped['Win_Rate'] = (grouped['Win'] / grouped['Total_Days'] * 100).fillna(0)
+        grouped['Avg_PL'] = (grouped['Net_PL'] / grouped['Total_Days']).fillna(0)
+        return grouped
+
+    def round_trips(self, limit: int = 1000) -> pd.DataFrame:
+        rows = self.db.execute_query("SELECT * FROM analytics_round_trips ORDER BY exit_time DESC LIMIT ?", (limit,))
+        return pd.DataFrame([dict(r) for r in rows])
+
+def _empty_round_trips() -> pd.DataFrame:
+    trips = pd.DataFrame(columns=ROUND_TRIP_COLUMNS)
+    for column in ('entry_time', 'exit_time'):
+        trips[column] = pd.Series(dtype='datetime64[ns, UTC]')
+    trips['holding_time'] = pd.Series(dtype='timedelta64[ns]')
+    return trips
+
+def _iso(timestamps: pd.Series) -> List[str]:
+    """UTC ISO-8601 strings (sortable as text in SQLite)."""
+    utc = pd.DatetimeIndex(timestamps).tz_convert('UTC').tz_localize(None).values.astype('datetime64[us]')
+    return list(np.char.add(np.datetime_as_string(utc), '+00:00'))
@@ -0,0 +1,293 @@
+import logging
+import time
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.agent.executor import TradingExecutor, TIME_CUT
+from src.data.cache import ResultCache, fingerprint
+from src.data.database import DatabaseManager
+from src.data.history import load_minute_bars, regular_session, resample_daily
+from src.strategy import indicators
+from src.strategy.base import BaseStrategy
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+from src.strategy.bollinger_reversion import BollingerReversionStrategy
+from src.strategy.rsi_momentum import RSIMomentumStrategy
+
+logger = logging.getLogger(__name__)
+
+EASTERN = 'US/Eastern'
+FILL_COLUMNS = ['timestamp', 'symbol', 'side', 'qty', 'price', 'fee', 'strategy', 'reason', 'realized_pl']
+
+class SimulatedBroker:
+    """
+    Minimal broker for backtests: market orders fill immediately at the given price
+    adjusted by slippage, with per-share and notional fees. One net position per symbol
+    shared by all strategies, attributed to the strategy that opened it; unlike the live
+    OrderManager there are no per-strategy sub-positions.
+    """
+    def __init__(self, initial_cash: float = 100000.0, slippage_bps: float = 5.0,
+                 fee_per_share: float = 0.0, fee_rate: float = 0.0):
+        self.initial_cash = initial_cash
+        self.cash = initial_cash
+        self.slippage = slippage_bps / 10000.0
+        self.fee_per_share = fee_per_share
+        self.fee_rate = fee_rate
+        # symbol -> [qty, avg_entry_price, strategy that opened the position]
+        self.positions: Dict[str, list] = {}
+        self.fills: List[tuple] = []
+
+    def get_position(self, symbol: str) -> Tuple[float, float]:
+        pos = self.positions.get(symbol)
+        return (pos[0], pos[1]) if pos else (0, 0.0)
+
+    def submit_order(self, symbol: str, qty: float, side: str, price: float, timestamp,
+                     strategy: str = None, reason: str = None) -> Optional[tuple]:
+        """Fills a market order. Sells are capped at the held quantity. Returns the fill tuple."""
+        if qty <= 0:
+            return None
+        pos = self.positions.get(symbol)
+        realized = 0.0
+
+        if side == 'buy':
+            fill_price = price * (1 + self.slippage)
+            fee = qty * self.fee_per_share + qty * fill_price * self.fee_rate
+            if pos:
+                total = pos[0] + qty
+                pos[1] = (pos[0] * pos[1] + qty * fill_price) / total
+                pos[0] = total
+            else:
+                self.positions[symbol] = [qty, fill_price, strategy]
+            self.cash -= qty * fill_price + fee
+        else:
+            if not pos:
+                return None
+            qty = min(qty, pos[0])
+            fill_price = price * (1 - self.slippage)
+            fee = qty * self.fee_per_share + qty * fill_price * self.fee_rate
+            realized = (fill_price - pos[1]) * qty - fee
+            # P&L is attributed to the strategy that opened the position
+            strategy = pos[2]
+            pos[0] -= qty
+            if pos[0] <= 0:
+                del self.positions[symbol]
+            self.cash += qty * fill_price - fee
+
+        fill = (timestamp, symbol, side, qty, fill_price, fee, strategy, reason, realized)
+        self.fills.append(fill)
+        return fill
+
+    def fills_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.fills, columns=FILL_COLUMNS)
+
+class BacktestEngine:
+    """
+    Event-driven minute-bar backtest that replays ohlcv_data through the live strategy
+    classes: daily K optimization + on_market_open on the previous days, target from the
+    day's first regular-session open, signal checks on every bar close,
+    TradingExecutor.size_order sizing and the TIME_CUT liquidation.
+
+    It does not reproduce live execution exactly. Strategies share one net position per
+    symbol: a strategy sees it as its own, and any SELL closes all of it. The live
+    OrderManager instead keeps per-strategy sub-positions, sells only the signalling
+    strategy's shares and nets the strategies' orders. Unlike the live loop (which has no
+    intraday RSI yet), RSIMomentum receives an RSI computed over the day's minute closes
+    when intraday_rsi=True.
+    With a `cache`, runs on identical bars and settings (and each day's optimize_k) are reused.
+    """
+    def __init__(self, symbols: List[str], db: DatabaseManager = None, investment_per_symbol: float = 10000.0,
+                 initial_cash: float = 100000.0, slippage_bps: float = 5.0, fee_per_share: float = 0.0,
+                 fee_rate: float = 0.0, lookback_days: int = 30, intraday_rsi: bool = True,
+                 strategy_params: Optional[Dict[str, Dict[str, Any]]] = None, cache: Optional[ResultCache] = None):
+        self.symbols = symbols
+        self.db = db
+        self.investment_per_symbol = investment_per_symbol
+        self.broker_args = dict(initial_cash=initial_cash, slippage_bps=slippage_bps,
+                                fee_per_share=fee_per_share, fee_rate=fee_rate)
+        self.lookback_days = lookback_days
+        self.intraday_rsi = intraday_rsi
+        # strategy name -> fixed params (set_params); a fixed 'k' disables the daily optimize_k
+        self.strategy_params = strategy_params or {}
+        self.cache = cache
+
+    def make_strategies(self, symbol: str) -> List[BaseStrategy]:
+        """Same strategy set per symbol as TradingExecutor."""
+        strategies = [VolatilityBreakoutStrategy(symbol), BollingerReversionStrategy(symbol), RSIMomentumStrategy(symbol)]
+        for strategy in strategies:
+            strategy.set_params(self.strategy_params.get(strategy.name, {}))
+        return strategies
+
+    def load_bars(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """Minute bars per symbol, including `lookback_days` of warm-up history before start."""
+        db = self.db or DatabaseManager()
+        warmup_start = None
+        if start:
+            warmup_start = (pd.Timestamp(start) - pd.Timedelta(days=self.lookback_days * 2)).strftime('%Y-%m-%d')
+        return {s: load_minute_bars(db, s, warmup_start, end) for s in self.symbols}
+
+    def run(self, start: Optional[str] = None, end: Optional[str] = None,
+            bars: Optional[Dict[str, pd.DataFrame]] = None, quiet: bool = True) -> Dict[str, Any]:
+        """
+        Replays [start, end) (ET dates). `bars` maps symbol -> minute OHLC(V) DataFrame indexed by
+        timestamp and may contain earlier warm-up days; they are loaded from ohlcv_data if omitted.
+        """
+        t_start = time.perf_counter()
+        if bars is None:
+            bars = self.load_bars(start, end)
+
+        key = None
+        if self.cache is not None:
+            key = self.cache_key(bars, start, end)
+            cached = self.cache.get("backtest", key)
+            if cached is not None:
+                logger.info(f"Backtest served from cache: P/L ${cached['total_pl']:,.2f} over {cached['n_trades']} trades")
+                return cached
+
+        strategy_logger = logging.getLogger('src.strategy')
+        previous_level = strategy_logger.level
+        if quiet:
+            strategy_logger.setLevel(logging.WARNING)
+
+        broker = SimulatedBroker(**self.broker_args)
+        n_bars = 0
+        try:
+            for symbol in self.symbols:
+                df = bars.get(symbol)
+                if df is None or df.empty:
+                    logger.warning(f"No minute bars for {symbol}, skipping.")
+                    continue
+                n_bars += self._run_symbol(symbol, df, broker, start, end)
+        finally:
+            strategy_logger.setLevel(previous_level)
+
+        elapsed = time.perf_counter() - t_start
+        result = self._summarize(broker, n_bars, elapsed)
+        logger.info(f"Backtest: {n_bars:,} bars in {elapsed:.2f}s ({result['bars_per_sec']:,.0f} bars/s), "
+                    f"P/L ${result['total_pl']:,.2f} over {result['n_trades']} trades")
+        if key is not None:
+            self.cache.put("backtest", key, result)
+        return result
+
+    def cache_key(self, bars: Dict[str, pd.DataFrame], start: Optional[str], end: Optional[str]) -> str:
+        """Fingerprint of the input bars, date range, settings and strategy class versions."""
+        settings = {
+            "symbols": self.symbols, "start": start, "end": end, "investment": self.investment_per_symbol,
+            "broker": self.broker_args, "lookback_days": self.lookback_days, "intraday_rsi": self.intraday_rsi,
+            "strategy_params": self.strategy_params,
+        }
+        frames = [bars[s][['open', 'high', 'low', 'close']] for s in self.symbols if s in bars and not bars[s].empty]
+        return fingerprint(settings, [VolatilityBreakoutStrategy, BollingerReversionStrategy, RSIMomentumStrategy], frames)
+
+    def _run_symbol(self, symbol: str, df: pd.DataFrame, broker: SimulatedBroker,
+                    start: Optional[str], end: Optional[str]) -> int:
+        # Regular session only: the first bar of a day is the 9:30 open (the breakout target's base)
+        df = regular_session(df)
+        if df.empty:
+            return 0
+        index = df.index.tz_convert(EASTERN) if df.index.tz is not None else df.index.tz_localize('UTC').tz_convert(EASTERN)
+        days = index.normalize().tz_localize(None).values.astype('datetime64[D]')
+        minute_of_day = (index.hour * 60 + index.minute).to_numpy()
+        # Fills carry epoch-ns timestamps; converted once in _summarize (Timestamp boxing per fill is slow)
+        ts_ns = index.as_unit('ns').asi8
+        opens = df['open'].to_numpy(dtype=np.float64)
+        closes = df['close'].to_numpy(dtype=np.float64)
+
+        daily = resample_daily(df)
+        daily_days = daily.index.tz_localize(None).values.astype('datetime64[D]') if daily.index.tz is not None \
+            else daily.index.values.astype('datetime64[D]')
+
+        cut = TIME_CUT.hour * 60 + TIME_CUT.minute
+        first_day = np.datetime64(start, 'D') if start else None
+        last_day = np.datetime64(end, 'D') if end else None
+
+        strategies = self.make_strategies(symbol)
+        # Either may be missing when make_strategies returns a subset (e.g. VectorizedBacktester.cross_check)
+        vb = next((s for s in strategies if isinstance(s, VolatilityBreakoutStrategy)), None)
+        rsi_strat = next((s for s in strategies if isinstance(s, RSIMomentumStrategy)), None)
+
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        starts = np.concatenate([[0], bounds])
+        ends = np.concatenate([bounds, [len(days)]])
+        n_bars = 0
+
+        for lo, hi in zip(starts, ends):
+            day = days[lo]
+            if (first_day is not None and day < first_day) or (last_day is not None and day >= last_day):
+                continue
+
+            # Pre-market: previous closed days only
+            k = np.searchsorted(daily_days, day)
+            history = daily.iloc[max(0, k - self.lookback_days):k]
+            if history.empty:
+                continue
+            for strategy in strategies:
+                strategy.on_market_close()
+            if vb is not None and 'k' not in self.strategy_params.get(vb.name, {}):
+                vb.optimize_k(history, cache=self.cache)
+            for strategy in strategies:
+                strategy.on_market_open(history)
+            if vb is not None:
+                vb.update_target(opens[lo])
+
+            rsi_values = [None] * (hi - lo)
+            if self.intraday_rsi and rsi_strat is not None:
+                rsi_values = [None if v != v else v for v in indicators.rsi(closes[lo:hi], rsi_strat.rsi_period)]
+
+            cut_index = None
+            for j in range(lo, hi):
+                if minute_of_day[j] >= cut:
+                    cut_index = j
+                    break
+                price = closes[j]
+                current_rsi = rsi_values[j - lo]
+                for strategy in strategies:
+                    qty, avg_entry = broker.get_position(symbol)
+                    signal = strategy.generate_signal(price, qty, avg_entry, current_rsi=current_rsi)
+                    if not signal:
+                        continue
+                    if signal['action'] == 'BUY':
+                        buy_qty = TradingExecutor.size_order(self.investment_per_symbol, price)
+                        if buy_qty > 0:
+                            broker.submit_order(symbol, buy_qty, 'buy', price, ts_ns[j], strategy.name, signal['reason'])
+                    elif signal['action'] == 'SELL':
+                        broker.submit_order(symbol, qty, 'sell', price, ts_ns[j], strategy.name, signal['reason'])
+            n_bars += (cut_index if cut_index is not None else hi) - lo
+
+            # Time-Cut: flatten at the first bar at/after TIME_CUT (or the day's last bar)
+            qty, _ = broker.get_position(symbol)
+            if qty > 0:
+                j = cut_index if cut_index is not None else hi - 1
+                broker.submit_order(symbol, qty, 'sell', closes[j], ts_ns[j], None, 'Time Cut')
+
+        return n_bars
+
+    def _summarize(self, broker: SimulatedBroker, n_bars: int, elapsed: float) -> Dict[str, Any]:
+        fills = broker.fills_frame()
+        fills['timestamp'] = pd.to_datetime(fills['timestamp'].astype('int64'), unit='ns', utc=True)
+        sells = fills[fills['side'] == 'sell']
+        if not fills.empty:
+            dates = pd.to_datetime(fills['timestamp'], utc=True).dt.tz_convert(EASTERN).dt.date
+            daily_pl = fills.assign(Date=dates, Net_PL=np.where(fills['side'] == 'sell', fills['realized_pl'], 0.0)) \
+                .groupby('Date')['Net_PL'].sum()
+        else:
+            daily_pl = pd.Series(dtype=float)
+
+        return {
+            "fills": fills,
+            "daily_pl": daily_pl,
+            "total_pl": float(sells['realized_pl'].sum()) if not sells.empty else 0.0,
+            "fees": float(fills['fee'].sum()) if not fills.empty else 0.0,
+            "n_trades": int(len(sells)),
+            "win_rate": float((sells['realized_pl'] > 0).mean() * 100) if not sells.empty else 0.0,
+            "final_cash": broker.cash,
+            "bars": n_bars,
+            "elapsed": elapsed,
+            "bars_per_sec": n_bars / elapsed if elapsed > 0 else 0.0,
+        }
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    symbols = ["NVDA", "TSLA", "AMD", "TQQQ", "SOXL", "INOD", "PLTR", "DUK", "TIGR", "PAYO", "HROW", "SGRY"]
+    engine = BacktestEngine(symbols, cache=ResultCache())
+    result = engine.run()
+    print(f"Bars: {result['bars']:,} | Throughput: {result['bars_per_sec']:,.0f} bars/s | "
+          f"P/L: ${result['total_pl']:,.2f} | Trades: {result['n_trades']} | Win Rate: {result['win_rate']:.1f}%")
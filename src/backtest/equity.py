@@ -0,0 +1,162 @@
+import math
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional
+import pytz
+
+EASTERN = pytz.timezone('US/Eastern')
+
+class EquityTracker:
+    """
+    Streaming equity-curve metrics with O(1) work per equity sample or fill.
+
+    Tracks the running peak / drawdown, intraday P&L against the day's opening equity
+    (for the daily-loss rule), rolling Sharpe/Sortino over the last `window` daily returns
+    (running sums, no history rescans), current and time-weighted exposure, and realized
+    P&L contribution per strategy. get_state()/set_state() round-trip everything as JSON
+    so the tracker survives restarts via its persisted snapshots.
+    """
+    def __init__(self, window: int = 20, periods_per_year: int = 252):
+        self.window = window
+        self.periods_per_year = periods_per_year
+
+        self.equity: Optional[float] = None
+        self.timestamp: Optional[float] = None  # epoch seconds of the last sample
+        self.day: Optional[str] = None  # trading date (US/Eastern) of the last sample
+        self.day_open_equity: Optional[float] = None
+        self.peak: Optional[float] = None
+        self.max_drawdown = 0.0
+
+        self.returns: deque = deque()
+        self.sum_r = 0.0
+        self.sum_r2 = 0.0
+        self.sum_down2 = 0.0
+
+        self.exposure = 0.0
+        self.exposure_time = 0.0  # integral of exposure over time (seconds)
+        self.elapsed = 0.0
+
+        self.contributions: Dict[str, float] = {}
+        self.realized_pl = 0.0
+
+    # ------------------------------------------------------------------ updates
+
+    def on_equity(self, timestamp: datetime, equity: float, market_value: Optional[float] = None,
+                  day_open_equity: Optional[float] = None):
+        """
+        Adds one equity sample. `market_value` (long market value) updates exposure;
+        `day_open_equity` (e.g. Alpaca's last_equity) overrides the first sample of the day
+        as the daily P&L baseline.
+        """
+        ts = timestamp.timestamp()
+        day = timestamp.astimezone(EASTERN).strftime('%Y-%m-%d')
+
+        if self.day != day:
+            # Close the previous day: its return goes into the rolling window
+            if self.equity is not None and self.day_open_equity:
+                self._push_return(self.equity / self.day_open_equity - 1)
+            self.day = day
+            self.day_open_equity = day_open_equity or self.equity or equity
+        elif day_open_equity:
+            self.day_open_equity = day_open_equity
+
+        if self.timestamp is not None and ts > self.timestamp:
+            self.exposure_time += self.exposure * (ts - self.timestamp)
+            self.elapsed += ts - self.timestamp
+
+        self.equity = equity
+        self.timestamp = ts
+        self.peak = equity if self.peak is None else max(self.peak, equity)
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+        if market_value is not None and equity > 0:
+            self.exposure = market_value / equity
+
+    def on_fill(self, strategy: str, realized_pl: float):
+        """Books the realized P&L of a closing fill to `strategy`."""
+        self.contributions[strategy] = self.contributions.get(strategy, 0.0) + realized_pl
+        self.realized_pl += realized_pl
+
+    def _push_return(self, r: float):
+        self.returns.append(r)
+        self.sum_r += r
+        self.sum_r2 += r * r
+        self.sum_down2 += min(r, 0.0) ** 2
+        if len(self.returns) > self.window:
+            old = self.returns.popleft()
+            self.sum_r -= old
+            self.sum_r2 -= old * old
+            self.sum_down2 -= min(old, 0.0) ** 2
+
+    # ------------------------------------------------------------------ metrics
+
+    @property
+    def drawdown(self) -> float:
+        if not self.peak:
+            return 0.0
+        return self.equity / self.peak - 1
+
+    @property
+    def daily_pl(self) -> float:
+        if self.equity is None or self.day_open_equity is None:
+            return 0.0
+        return self.equity - self.day_open_equity
+
+    @property
+    def daily_return(self) -> float:
+        return self.daily_pl / self.day_open_equity if self.day_open_equity else 0.0
+
+    @property
+    def sharpe(self) -> float:
+        n = len(self.returns)
+        if n < 2:
+            return 0.0
+        mean = self.sum_r / n
+        var = max(self.sum_r2 - n * mean * mean, 0.0) / (n - 1)
+        return mean / math.sqrt(var) * math.sqrt(self.periods_per_year) if var > 0 else 0.0
+
+    @property
+    def sortino(self) -> float:
+        n = len(self.returns)
+        if n < 2:
+            return 0.0
+        downside = math.sqrt(max(self.sum_down2, 0.0) / n)
+        return (self.sum_r / n) / downside * math.sqrt(self.periods_per_year) if downside > 0 else 0.0
+
+    @property
+    def avg_exposure(self) -> float:
+        return self.exposure_time / self.elapsed if self.elapsed > 0 else self.exposure
+
+    def daily_loss_breached(self, limit: float = 0.02) -> bool:
+        """True once today's equity is down more than `limit` (fraction) from the day's open."""
+        return self.daily_return <= -limit
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp, pytz.utc).isoformat() if self.timestamp else None,
+            "equity": self.equity,
+            "peak": self.peak,
+            "drawdown": self.drawdown,
+            "max_drawdown": self.max_drawdown,
+            "daily_pl": self.daily_pl,
+            "daily_return": self.daily_return,
+            "sharpe": self.sharpe,
+            "sortino": self.sortino,
+            "exposure": self.exposure,
+            "avg_exposure": self.avg_exposure,
+            "realized_pl": self.realized_pl,
+            "contributions": dict(self.contributions),
+        }
+
+    # ------------------------------------------------------------------ persistence
+
+    def get_state(self) -> Dict[str, Any]:
+        state = {k: v for k, v in vars(self).items() if k != 'returns'}
+        state['returns'] = list(self.returns)
+        return state
+
+    def set_state(self, state: Dict[str, Any]):
+        for k, v in state.items():
+            if k == 'returns':
+                self.returns = deque(v)
+            elif hasattr(self, k):
+                setattr(self, k, v)
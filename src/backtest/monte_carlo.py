@@ -0,0 +1,139 @@
+import logging
+import multiprocessing
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('bootstrap', 'permutation')
+PERCENTILES = [5, 25, 50, 75, 95]
+
+def returns_from_round_trips(trips: pd.DataFrame) -> np.ndarray:
+    """Per-trade returns (pnl / cost basis) of PerformanceAnalyzer.match_round_trips output, in exit order."""
+    if trips.empty:
+        return np.empty(0)
+    trips = trips.sort_values('exit_time', kind='stable')
+    basis = (trips['entry_price'] * trips['qty']).to_numpy(dtype=float)
+    return trips['pnl'].to_numpy(dtype=float) / basis
+
+def returns_from_backtest(result: Dict[str, Any]) -> np.ndarray:
+    """Per-trade returns of a BacktestEngine.run() result: each sell's realized P/L over its cost basis."""
+    fills = result['fills']
+    sells = fills[fills['side'] == 'sell']
+    if sells.empty:
+        return np.empty(0)
+    proceeds = (sells['qty'] * sells['price'] - sells['fee']).to_numpy(dtype=float)
+    pnl = sells['realized_pl'].to_numpy(dtype=float)
+    return pnl / (proceeds - pnl)
+
+def _simulate(returns: np.ndarray, n_sims: int, method: str, fraction: float, ruin_level: float,
+              seed) -> Dict[str, np.ndarray]:
+    """One batch: (n_sims, n_trades) resampled trade sequences -> terminal equity, max drawdown, ruin flags."""
+    rng = np.random.default_rng(seed)
+    n = len(returns)
+    if method == 'bootstrap':
+        sampled = returns[rng.integers(0, n, size=(n_sims, n))]
+    else:
+        sampled = returns[rng.permuted(np.broadcast_to(np.arange(n), (n_sims, n)), axis=1)]
+
+    # Equity path as a multiple of the starting capital, `fraction` of equity at risk per trade
+    paths = np.cumprod(1.0 + fraction * sampled, axis=1)
+    np.maximum(paths, 0.0, out=paths)
+    peaks = np.maximum(np.maximum.accumulate(paths, axis=1), 1.0)
+    drawdown = (paths / peaks - 1.0).min(axis=1)
+    return {
+        "terminal": paths[:, -1],
+        "max_drawdown": np.minimum(drawdown, 0.0),
+        "ruin": paths.min(axis=1) <= ruin_level,
+    }
+
+def _simulate_task(args) -> Dict[str, np.ndarray]:
+    return _simulate(*args)
+
+class MonteCarloAnalyzer:
+    """
+    Resamples per-trade returns to put confidence intervals on a strategy's results.
+
+    'bootstrap' draws trades with replacement (uncertainty in the trade distribution);
+    'permutation' reshuffles the realized trades (sequence risk: same total, different drawdowns).
+    All simulations of a batch are one (n_sims, n_trades) NumPy computation; with
+    max_workers > 1 the batches run across a process pool. Ruin is equity falling to
+    `1 - ruin_threshold` of the starting capital at any point.
+    """
+    def __init__(self, n_sims: int = 10000, method: str = 'bootstrap', fraction: float = 1.0,
+                 ruin_threshold: float = 0.5, batch_size: int = 2000, max_workers: Optional[int] = 1,
+                 seed: Optional[int] = None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+        self.n_sims = n_sims
+        self.method = method
+        self.fraction = fraction
+        self.ruin_threshold = ruin_threshold
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.seed = seed
+
+    def run(self, returns: Union[np.ndarray, pd.Series, pd.DataFrame], initial_equity: float = 1.0) -> Dict[str, Any]:
+        """
+        `returns` is an array of per-trade returns or a round-trips DataFrame.
+        Returns the terminal equity / max drawdown distributions, risk of ruin and a percentile summary.
+        """
+        if isinstance(returns, pd.DataFrame):
+            returns = returns_from_round_trips(returns)
+        returns = np.asarray(returns, dtype=float)
+        returns = returns[np.isfinite(returns)]
+        if len(returns) == 0:
+            raise ValueError("No trade returns to resample")
+
+        t_start = time.perf_counter()
+        ruin_level = 1.0 - self.ruin_threshold
+        sizes = [min(self.batch_size, self.n_sims - i) for i in range(0, self.n_sims, self.batch_size)]
+        # Independent streams per batch: results don't depend on how batches are distributed
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        tasks = [(returns, size, self.method, self.fraction, ruin_level, seed) for size, seed in zip(sizes, seeds)]
+
+        if (self.max_workers is not None and self.max_workers <= 1) or len(tasks) == 1:
+            batches = [_simulate_task(t) for t in tasks]
+        else:
+            # Spawned workers, like WalkForwardOptimizer's pool (never fork a threaded process)
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                batches = list(pool.map(_simulate_task, tasks))
+
+        terminal = np.concatenate([b['terminal'] for b in batches]) * initial_equity
+        max_drawdown = np.concatenate([b['max_drawdown'] for b in batches])
+        ruin = np.concatenate([b['ruin'] for b in batches])
+        elapsed = time.perf_counter() - t_start
+
+        summary = pd.DataFrame({
+            'terminal_equity': np.percentile(terminal, PERCENTILES),
+            'total_return': np.percentile(terminal / initial_equity - 1.0, PERCENTILES),
+            'max_drawdown': np.percentile(max_drawdown, PERCENTILES),
+        }, index=pd.Index([f"p{p}" for p in PERCENTILES], name='percentile'))
+
+        logger.info(f"Monte Carlo ({self.method}): {self.n_sims:,} x {len(returns)} trades in {elapsed:.2f}s, "
+                    f"median return {summary.loc['p50', 'total_return'] * 100:+.2f}%, risk of ruin {ruin.mean() * 100:.2f}%")
+        return {
+            "terminal": terminal,
+            "max_drawdown": max_drawdown,
+            "ruin": ruin,
+            "risk_of_ruin": float(ruin.mean()),
+            "prob_loss": float((terminal < initial_equity).mean()),
+            "summary": summary,
+            "n_trades": len(returns),
+            "elapsed": elapsed,
+        }
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from src.backtest.engine import BacktestEngine
+    from src.data.cache import ResultCache
+    symbols = ["NVDA", "TSLA", "AMD", "TQQQ", "SOXL", "INOD", "PLTR", "DUK", "TIGR", "PAYO", "HROW", "SGRY"]
+    result = BacktestEngine(symbols, cache=ResultCache()).run()
+    # Roadmap sizing: 10% of capital per position
+    for method in METHODS:
+        mc = MonteCarloAnalyzer(method=method, fraction=0.1, seed=0).run(returns_from_backtest(result))
+        print(f"\n{method}: risk of ruin {mc['risk_of_ruin'] * 100:.2f}%, P(loss) {mc['prob_loss'] * 100:.1f}%")
+        print(mc['summary'].to_string(float_format=lambda v: f"{v:.4f}"))
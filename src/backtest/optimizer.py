@@ -0,0 +1,225 @@
+import itertools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import List, Dict, Any, Optional, Tuple, Type
+import numpy as np
+import pandas as pd
+from src.data.cache import ResultCache, fingerprint
+from src.data.database import DatabaseManager
+from src.data.history import load_daily_bars
+from src.strategy.base import BaseStrategy
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+from src.strategy.bollinger_reversion import BollingerReversionStrategy
+from src.strategy.rsi_momentum import RSIMomentumStrategy
+
+logger = logging.getLogger(__name__)
+
+# Strategy name (BaseStrategy.name) -> class
+STRATEGY_CLASSES: Dict[str, Type[BaseStrategy]] = {
+    "VolatilityBreakout": VolatilityBreakoutStrategy,
+    "BollingerReversion": BollingerReversionStrategy,
+    "RSIMomentum": RSIMomentumStrategy,
+}
+
+# Worker-side view of the shared OHLC block: (SharedMemory, array[4, total_days], {symbol: (start, end)})
+_SHARED: Optional[Tuple[Any, np.ndarray, Dict[str, Tuple[int, int]]]] = None
+
+def _attach_shared(name: str, shape: Tuple[int, int], offsets: Dict[str, Tuple[int, int]]):
+    """Process pool initializer: map the parent's shared OHLC block without copying."""
+    global _SHARED
+    # Spawned workers inherit the parent's resource tracker, which unlinks the block once via the parent.
+    shm = shared_memory.SharedMemory(name=name)
+    _SHARED = (shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf), offsets)
+
+def _optimize_task(symbol: str, strategy_name: str, grid: Dict[str, List[Any]],
+                   train_days: int, test_days: int, cost: float) -> Dict[str, Any]:
+    """Walk-forward search for one (symbol, strategy) on the shared OHLC block."""
+    _, ohlc, offsets = _SHARED
+    start, end = offsets[symbol]
+    open_, high, low, close = ohlc[:, start:end]
+    return walk_forward(STRATEGY_CLASSES[strategy_name], open_, high, low, close,
+                        grid, train_days, test_days, cost, symbol=symbol)
+
+def walk_forward(strategy_cls: Type[BaseStrategy], open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 grid: Dict[str, List[Any]], train_days: int, test_days: int, cost: float = 0.0,
+                 symbol: str = None) -> Dict[str, Any]:
+    """
+    Rolling train/test parameter selection.
+
+    Every combination is simulated once over the full history (indicators only look back),
+    so each train/test window is just an O(1) slice of the cumulative log returns.
+    The returned `params` are the best on the most recent `train_days` (what to trade today);
+    `oos_*` stats are from the concatenated out-of-sample test windows.
+    """
+    keys = list(grid.keys())
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    n_days = len(close)
+
+    returns = np.vstack([strategy_cls.daily_returns(open_, high, low, close, cost=cost, **c) for c in combos])
+    returns = np.nan_to_num(returns, nan=0.0)
+    log_ret = np.log1p(np.maximum(returns, -0.999999))
+    cum = np.concatenate([np.zeros((len(combos), 1)), np.cumsum(log_ret, axis=1)], axis=1)
+
+    oos = []
+    n_windows = 0
+    t0 = train_days
+    while t0 < n_days:
+        t1 = min(t0 + test_days, n_days)
+        best = int(np.argmax(cum[:, t0] - cum[:, t0 - train_days]))
+        oos.append(returns[best, t0:t1])
+        n_windows += 1
+        t0 = t1
+
+    # Parameters for the next session: best over the latest training window
+    lookback = min(train_days, n_days)
+    train_score = cum[:, n_days] - cum[:, n_days - lookback]
+    best = int(np.argmax(train_score))
+
+    oos_returns = np.concatenate(oos) if oos else np.array([])
+    oos_std = oos_returns.std() if len(oos_returns) > 1 else 0.0
+    return {
+        "symbol": symbol,
+        "strategy_name": _strategy_name(strategy_cls),
+        "params": {k: _builtin(v) for k, v in combos[best].items()},
+        "train_return": float(np.expm1(train_score[best])),
+        "oos_return": float(np.prod(1 + oos_returns) - 1) if len(oos_returns) else 0.0,
+        "oos_sharpe": float(oos_returns.mean() / oos_std * np.sqrt(252)) if oos_std > 0 else 0.0,
+        "n_windows": n_windows,
+    }
+
+def _strategy_name(strategy_cls: Type[BaseStrategy]) -> str:
+    for name, cls in STRATEGY_CLASSES.items():
+        if cls is strategy_cls:
+            return name
+    return strategy_cls.__name__
+
+def _builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+class WalkForwardOptimizer:
+    """
+    Walk-forward parameter optimization for every (symbol, strategy) pair.
+    Work fans out over a process pool; the daily bars live in one shared-memory block
+    that workers map at startup, so only (symbol, strategy) names are pickled per task.
+    With a `cache`, pairs whose bars, grid and settings are unchanged are not recomputed.
+    """
+    def __init__(self, db: DatabaseManager = None, train_days: int = 120, test_days: int = 20,
+                 cost: float = 0.0005, max_workers: Optional[int] = None,
+                 strategies: Optional[List[str]] = None, cache: Optional[ResultCache] = None):
+        self.db = db or DatabaseManager()
+        self.train_days = train_days
+        self.test_days = test_days
+        self.cost = cost
+        self.max_workers = max_workers
+        self.strategies = strategies or list(STRATEGY_CLASSES.keys())
+        self.cache = cache
+
+    def run(self, symbols: List[str], history: Optional[Dict[str, pd.DataFrame]] = None,
+            start: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Optimizes all strategies for all symbols.
+        `history` (symbol -> daily OHLC DataFrame) is loaded from ohlcv_data if not given.
+        """
+        global _SHARED
+        t_start = time.perf_counter()
+        if history is None:
+            history = load_daily_bars(self.db, symbols, start=start)
+
+        # Pack all symbols into one contiguous [4, total_days] block
+        offsets: Dict[str, Tuple[int, int]] = {}
+        chunks = []
+        pos = 0
+        for symbol in symbols:
+            df = history.get(symbol)
+            if df is None or len(df) < 2:
+                logger.warning(f"Not enough history for {symbol}, skipping walk-forward.")
+                continue
+            chunks.append(df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64).T)
+            offsets[symbol] = (pos, pos + len(df))
+            pos += len(df)
+
+        if not offsets:
+            return []
+
+        packed = np.ascontiguousarray(np.concatenate(chunks, axis=1))
+        tasks = [(symbol, name, STRATEGY_CLASSES[name].PARAM_GRID) for symbol in offsets for name in self.strategies]
+
+        results = []
+        keys: Dict[Tuple[str, str], str] = {}
+        if self.cache is not None:
+            pending = []
+            for symbol, name, grid in tasks:
+                start_, end_ = offsets[symbol]
+                key = fingerprint(STRATEGY_CLASSES[name], grid, self.train_days, self.test_days, self.cost,
+                                  packed[:, start_:end_])
+                cached = self.cache.get("walk_forward", key)
+                if cached is not None:
+                    results.append(dict(cached, symbol=symbol))
+                else:
+                    keys[(symbol, name)] = key
+                    pending.append((symbol, name, grid))
+            tasks = pending
+            if not tasks:
+                logger.info(f"Walk-forward optimization: all {len(results)} pairs served from cache.")
+                return results
+
+        shm = shared_memory.SharedMemory(create=True, size=packed.nbytes)
+        shared = None
+        computed = []
+        try:
+            shared = np.ndarray(packed.shape, dtype=np.float64, buffer=shm.buf)
+            shared[:] = packed
+            initargs = (shm.name, packed.shape, offsets)
+
+            if self.max_workers is not None and self.max_workers <= 1:
+                _SHARED = (shm, shared, offsets)
+                for symbol, name, grid in tasks:
+                    computed.append(_optimize_task(symbol, name, grid, self.train_days, self.test_days, self.cost))
+            else:
+                # Spawned (not forked) workers: the executor process runs threads (feed, scheduler, DB)
+                # whose locks a fork would copy mid-use. Workers import this module and attach the
+                # block by name, so only the initargs (name, shape, offsets) are pickled.
+                with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_attach_shared, initargs=initargs) as pool:
+                    futures = {
+                        pool.submit(_optimize_task, symbol, name, grid, self.train_days, self.test_days, self.cost): (symbol, name)
+                        for symbol, name, grid in tasks
+                    }
+                    for future in as_completed(futures):
+                        symbol, name = futures[future]
+                        try:
+                            computed.append(future.result())
+                        except Exception as e:
+                            logger.error(f"Walk-forward failed for {symbol} {name}: {e}")
+        finally:
+            # Drop every view of the buffer before closing it
+            _SHARED = None
+            shared = None
+            shm.close()
+            shm.unlink()
+
+        if self.cache is not None:
+            for r in computed:
+                self.cache.put("walk_forward", keys[(r['symbol'], r['strategy_name'])], r)
+        cached = len(results)
+        results.extend(computed)
+
+        elapsed = time.perf_counter() - t_start
+        logger.info(f"Walk-forward optimization: {len(results)} (symbol, strategy) pairs "
+                    f"({cached} cached), {pos} symbol-days in {elapsed:.2f}s")
+        return results
+
+    @staticmethod
+    def to_param_map(results: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """results -> {(symbol, strategy_name): params} for TradingExecutor.tuned_params."""
+        return {(r['symbol'], r['strategy_name']): r['params'] for r in results}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    symbols = ["NVDA", "TSLA", "AMD", "TQQQ", "SOXL", "INOD", "PLTR", "DUK", "TIGR", "PAYO", "HROW", "SGRY"]
+    optimizer = WalkForwardOptimizer(cache=ResultCache())
+    for r in sorted(optimizer.run(symbols), key=lambda r: (r['symbol'], r['strategy_name'])):
+        print(f"{r['symbol']:6} {r['strategy_name']:20} {r['params']} OOS={r['oos_return']:+.2%} Sharpe={r['oos_sharpe']:.2f} ({r['n_windows']} windows)")
@@ -0,0 +1,386 @@
+import itertools
+import logging
+import time
+from typing import List, Dict, Any, Optional, Type
+import numpy as np
+import pandas as pd
+from src.agent.executor import TIME_CUT
+from src.backtest.engine import BacktestEngine, EASTERN
+from src.backtest.optimizer import STRATEGY_CLASSES
+from src.data.cache import ResultCache, fingerprint
+from src.data.database import DatabaseManager
+from src.data.history import regular_session, resample_daily
+from src.strategy import indicators
+from src.strategy.base import BaseStrategy, BUY, SELL
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+from src.strategy.bollinger_reversion import BollingerReversionStrategy
+from src.strategy.rsi_momentum import RSIMomentumStrategy
+
+logger = logging.getLogger(__name__)
+
+# Evaluation order per bar, same as BacktestEngine
+STRATEGY_ORDER: List[Type[BaseStrategy]] = [VolatilityBreakoutStrategy, BollingerReversionStrategy, RSIMomentumStrategy]
+STRATEGY_NAMES = {cls: name for name, cls in STRATEGY_CLASSES.items()}
+
+class VectorizedBacktester:
+    """
+    NumPy portfolio backtest over minute-bar matrices for parameter sweeps.
+
+    Every (symbol, day) session is one row of a [sessions x bars] matrix and every parameter
+    combination is one more leading axis, so a whole sweep advances one bar column at a time
+    with array operations: entries/exits/stops/take-profits come from each strategy's
+    compute_signals(), followed by the TIME_CUT liquidation. Rules, sizing, slippage and fees
+    mirror BacktestEngine, including its single net position per symbol (not the live
+    per-strategy sub-positions); cross_check() replays sample days through it to validate.
+    With a `cache`, sweep batches already simulated on the same sessions are reused.
+    """
+    def __init__(self, symbols: List[str], db: DatabaseManager = None, investment_per_symbol: float = 10000.0,
+                 slippage_bps: float = 5.0, fee_per_share: float = 0.0, fee_rate: float = 0.0,
+                 lookback_days: int = 30, strategies: Optional[List[str]] = None, cache: Optional[ResultCache] = None):
+        self.symbols = symbols
+        self.db = db
+        self.investment_per_symbol = investment_per_symbol
+        self.slippage = slippage_bps / 10000.0
+        self.slippage_bps = slippage_bps
+        self.fee_per_share = fee_per_share
+        self.fee_rate = fee_rate
+        self.lookback_days = lookback_days
+        names = strategies or list(STRATEGY_NAMES.values())
+        self.strategy_classes = [cls for cls in STRATEGY_ORDER if STRATEGY_NAMES[cls] in names]
+        self.cache = cache
+        self.bars: Optional[Dict[str, pd.DataFrame]] = None
+        self.data_key: Optional[str] = None
+        self._stat_cache: Dict[tuple, np.ndarray] = {}
+
+    # ------------------------------------------------------------------ data layout
+
+    def prepare(self, start: Optional[str] = None, end: Optional[str] = None,
+                bars: Optional[Dict[str, pd.DataFrame]] = None):
+        """Lays out [start, end) sessions as padded matrices. Reused by every run()/sweep()."""
+        if bars is None:
+            bars = BacktestEngine(self.symbols, db=self.db, lookback_days=self.lookback_days).load_bars(start, end)
+        self.bars = bars
+        self._stat_cache = {}
+
+        first_day = np.datetime64(start, 'D') if start else None
+        last_day = np.datetime64(end, 'D') if end else None
+        rows = []
+        self.daily = {}
+
+        for sym_id, symbol in enumerate(self.symbols):
+            df = bars.get(symbol)
+            if df is None or df.empty:
+                continue
+            df = regular_session(df)  # same session mask as BacktestEngine._run_symbol
+            if df.empty:
+                continue
+            index = df.index.tz_convert(EASTERN) if df.index.tz is not None else df.index.tz_localize('UTC').tz_convert(EASTERN)
+            days = index.normalize().tz_localize(None).values.astype('datetime64[D]')
+            minute_of_day = (index.hour * 60 + index.minute).to_numpy()
+            opens = df['open'].to_numpy(dtype=np.float64)
+            closes = df['close'].to_numpy(dtype=np.float64)
+
+            daily = resample_daily(df)
+            daily_days = daily.index.tz_localize(None).values.astype('datetime64[D]') if daily.index.tz is not None \
+                else daily.index.values.astype('datetime64[D]')
+            self.daily[sym_id] = {c: daily[c].to_numpy(dtype=np.float64) for c in ('open', 'high', 'low', 'close')}
+
+            bounds = np.flatnonzero(np.diff(days)) + 1
+            for lo, hi in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(days)]])):
+                day = days[lo]
+                if (first_day is not None and day < first_day) or (last_day is not None and day >= last_day):
+                    continue
+                k = int(np.searchsorted(daily_days, day))
+                if k == 0:
+                    continue
+                rows.append((sym_id, day, k, opens[lo], closes[lo:hi], minute_of_day[lo:hi]))
+
+        n_sessions = len(rows)
+        n_bars = max((len(r[4]) for r in rows), default=0)
+        self.close = np.full((n_sessions, n_bars), np.nan)
+        self.minute = np.full((n_sessions, n_bars), -1, dtype=np.int32)
+        self.sym_id = np.array([r[0] for r in rows], dtype=np.intp)
+        self.dates = np.array([r[1] for r in rows], dtype='datetime64[D]')
+        self.k = np.array([r[2] for r in rows], dtype=np.intp)
+        self.first_open = np.array([r[3] for r in rows], dtype=np.float64)
+        for i, r in enumerate(rows):
+            self.close[i, :len(r[4])] = r[4]
+            self.minute[i, :len(r[5])] = r[5]
+        self.valid = ~np.isnan(self.close)
+        self.n_rows_bars = int(self.valid.sum())
+        # Days of history the strategies see (BacktestEngine passes at most lookback_days)
+        self.hist_len = np.minimum(self.k, self.lookback_days)
+        last = np.maximum(self.valid.sum(axis=1) - 1, 0)
+        self.last_close = self.close[np.arange(n_sessions), last]
+        if self.cache is not None:
+            self.data_key = fingerprint(
+                {"symbols": self.symbols, "investment": self.investment_per_symbol, "slippage": self.slippage_bps,
+                 "fee_per_share": self.fee_per_share, "fee_rate": self.fee_rate, "lookback_days": self.lookback_days},
+                self.strategy_classes, self.close, self.minute, self.first_open, self.k, self.sym_id,
+                [np.vstack(list(self.daily[i].values())) for i in sorted(self.daily)])
+        logger.info(f"Prepared {n_sessions} sessions x {n_bars} bars ({self.n_rows_bars:,} bars)")
+
+    def _daily_stat(self, name: str, fn, *args) -> np.ndarray:
+        """Per-session value of a daily indicator at the previous closed day (index k-1)."""
+        key = (name,) + args
+        if key not in self._stat_cache:
+            out = np.full(len(self.k), np.nan)
+            for sym_id, daily in self.daily.items():
+                rows = np.flatnonzero(self.sym_id == sym_id)
+                if len(rows):
+                    out[rows] = fn(daily, *args)[self.k[rows] - 1]
+            self._stat_cache[key] = out
+        return self._stat_cache[key]
+
+    def _auto_k(self) -> np.ndarray:
+        """Per-session K as VolatilityBreakoutStrategy.optimize_k picks it on the lookback window."""
+        if ('auto_k',) in self._stat_cache:
+            return self._stat_cache[('auto_k',)]
+        grid = VolatilityBreakoutStrategy.PARAM_GRID['k']
+        out = np.full(len(self.k), 0.5)
+        for sym_id, d in self.daily.items():
+            returns = np.vstack([VolatilityBreakoutStrategy.daily_returns(d['open'], d['high'], d['low'], d['close'], k=k) for k in grid])
+            for row in np.flatnonzero(self.sym_id == sym_id):
+                k, n = self.k[row], self.hist_len[row]
+                window = returns[:, k - n:k].copy()
+                window[:, 0] = 0.0  # first day of the window has no previous range
+                cum = np.prod(1 + window, axis=1)
+                cum = np.where(np.isnan(cum), -np.inf, cum)
+                out[row] = grid[int(np.argmax(cum))]
+        self._stat_cache[('auto_k',)] = out
+        return out
+
+    # ------------------------------------------------------------------ per-combo strategy state
+
+    def _strategy_inputs(self, cls: Type[BaseStrategy], combos: List[Dict[str, Dict[str, Any]]]):
+        """compute_signals() inputs for one strategy class, shaped (combos, sessions) or per-bar callables."""
+        name = STRATEGY_NAMES[cls]
+        params = [c.get(name, {}) for c in combos]
+        hist_len = self.hist_len
+
+        if cls is VolatilityBreakoutStrategy:
+            auto = self._auto_k()
+            k = np.vstack([np.full(len(auto), p['k']) if 'k' in p else auto for p in params])
+            prev_high = self._daily_stat('high', lambda d: d['high'])
+            prev_low = self._daily_stat('low', lambda d: d['low'])
+            target = self.first_open + (prev_high - prev_low) * k
+            sma = self._daily_stat('sma', lambda d, n: indicators.rolling_mean(d['close'], n), 20)
+            sma_20 = np.where(hist_len >= 20, sma, 0.0)
+            return [target, sma_20]
+
+        if cls is BollingerReversionStrategy:
+            rows = []
+            for p in params:
+                period, std_dev = p.get('period', 20), p.get('std_dev', 2.0)
+                sma = self._daily_stat('sma', lambda d, n: indicators.rolling_mean(d['close'], n), period)
+                std = self._daily_stat('std', lambda d, n: indicators.rolling_std(d['close'], n), period)
+                ready = hist_len >= period
+                rows.append((sma, np.where(ready, sma + std * std_dev, np.nan), np.where(ready, sma - std * std_dev, np.nan)))
+            return [np.vstack([r[i] for r in rows]) for i in range(3)]
+
+        if cls is RSIMomentumStrategy:
+            rsi_periods = [p.get('rsi_period', 14) for p in params]
+            smas = []
+            for p, rsi_period in zip(params, rsi_periods):
+                sma_period = p.get('sma_period', 20)
+                sma = self._daily_stat('sma', lambda d, n: indicators.rolling_mean(d['close'], n), sma_period)
+                smas.append(np.where(hist_len >= max(sma_period, rsi_period), sma, np.nan))
+            unique = sorted(set(rsi_periods))
+            intraday = np.stack([indicators.rsi(self.close, n) for n in unique])
+            which = np.array([unique.index(n) for n in rsi_periods])
+            return [lambda t: intraday[which, :, t], np.vstack(smas)]
+
+        raise ValueError(f"Unsupported strategy {cls.__name__}")
+
+    # ------------------------------------------------------------------ simulation
+
+    def run(self, combos: Optional[List[Dict[str, Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """
+        Simulates every combo (strategy name -> params, BacktestEngine.strategy_params format;
+        omit VolatilityBreakout 'k' to use the daily optimize_k) over the prepared sessions.
+        """
+        if self.bars is None:
+            self.prepare()
+        combos = combos or [{}]
+        t_start = time.perf_counter()
+        n_combos, (n_sessions, n_bars) = len(combos), self.close.shape
+        shape = (n_combos, n_sessions)
+
+        inputs = [(cls, self._strategy_inputs(cls, combos)) for cls in self.strategy_classes]
+        qty = np.zeros(shape)
+        avg = np.zeros(shape)
+        owner = np.full(shape, -1, dtype=np.int8)
+        pnl = np.zeros(shape)
+        fees = np.zeros(shape)
+        fills = np.zeros(shape, dtype=np.int32)
+        sells = np.zeros(shape, dtype=np.int32)
+        wins = np.zeros(shape, dtype=np.int32)
+        strategy_pnl = np.zeros((n_combos, len(self.strategy_classes)))
+        done = np.zeros(n_sessions, dtype=bool)
+        cut = TIME_CUT.hour * 60 + TIME_CUT.minute
+
+        def sell(mask, price):
+            fill_price = np.broadcast_to(price * (1 - self.slippage), shape)[mask]
+            q = qty[mask]
+            fee = q * self.fee_per_share + q * fill_price * self.fee_rate
+            realized = (fill_price - avg[mask]) * q - fee
+            pnl[mask] += realized
+            fees[mask] += fee
+            fills[mask] += 1
+            sells[mask] += 1
+            wins[mask] += realized > 0
+            rows = np.nonzero(mask)[0]
+            np.add.at(strategy_pnl, (rows, owner[mask]), realized)
+            qty[mask] = 0
+            avg[mask] = 0.0
+            owner[mask] = -1
+
+        for t in range(n_bars):
+            price = self.close[:, t]
+            valid = self.valid[:, t] & ~done
+
+            # Time-Cut: first bar at/after TIME_CUT flattens and ends the session
+            cut_now = valid & (self.minute[:, t] >= cut)
+            if cut_now.any():
+                mask = cut_now & (qty > 0)
+                if mask.any():
+                    sell(mask, price)
+                done |= cut_now
+                valid &= ~cut_now
+            if not valid.any():
+                continue
+
+            with np.errstate(invalid='ignore'):
+                buy_qty = np.floor_divide(self.investment_per_symbol, price)
+            for si, (cls, args) in enumerate(inputs):
+                args = [a(t) if callable(a) else a for a in args]
+                with np.errstate(invalid='ignore'):
+                    actions = cls.compute_signals(price, qty, avg, *args)
+
+                mask = (actions == SELL) & valid & (qty > 0)
+                if mask.any():
+                    sell(mask, price)
+
+                mask = (actions == BUY) & valid & (buy_qty > 0)
+                if mask.any():
+                    fill_price = np.broadcast_to(price * (1 + self.slippage), shape)[mask]
+                    q = np.broadcast_to(buy_qty, shape)[mask]
+                    fee = q * self.fee_per_share + q * fill_price * self.fee_rate
+                    qty[mask] = q
+                    avg[mask] = fill_price
+                    owner[mask] = si
+                    fees[mask] += fee
+                    fills[mask] += 1
+
+        # Sessions without a bar at/after TIME_CUT are flattened at their last bar
+        mask = ~done & (qty > 0)
+        if mask.any():
+            sell(mask, self.last_close)
+
+        # Like SimulatedBroker, realized P/L is per sell (price difference minus the sell fee);
+        # buy fees only show up in `fees`.
+        elapsed = time.perf_counter() - t_start
+        n_trades = sells
+        summary = pd.DataFrame([_flatten(c) for c in combos])
+        summary['total_pl'] = pnl.sum(axis=1)
+        summary['fees'] = fees.sum(axis=1)
+        summary['n_trades'] = n_trades.sum(axis=1)
+        summary['win_rate'] = np.where(summary['n_trades'] > 0, wins.sum(axis=1) / np.maximum(summary['n_trades'], 1) * 100, 0.0)
+        for si, cls in enumerate(self.strategy_classes):
+            summary[f"pl_{STRATEGY_NAMES[cls]}"] = strategy_pnl[:, si]
+
+        cells = n_combos * self.n_rows_bars
+        logger.info(f"Vectorized backtest: {n_combos} combos x {self.n_rows_bars:,} bars in {elapsed:.2f}s "
+                    f"({cells / elapsed if elapsed > 0 else 0:,.0f} bar-combos/s)")
+        return {
+            "summary": summary,
+            "pnl": pnl,
+            "fills": fills,
+            "sessions": pd.DataFrame({'symbol': [self.symbols[i] for i in self.sym_id], 'date': self.dates}),
+            "elapsed": elapsed,
+            "bars_per_sec": cells / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def sweep(self, grid: Dict[str, Dict[str, List[Any]]], batch_size: int = 64) -> pd.DataFrame:
+        """
+        Full factorial sweep, e.g. {'VolatilityBreakout': {'k': [0.4, 0.5]}, 'BollingerReversion': {'std_dev': [2, 2.5]}}.
+        Returns one summary row per combination, best total P/L first.
+        """
+        if self.bars is None:
+            self.prepare()
+        axes = [(name, param, values) for name, params in grid.items() for param, values in params.items()]
+        combos = []
+        for values in itertools.product(*(a[2] for a in axes)):
+            combo: Dict[str, Dict[str, Any]] = {}
+            for (name, param, _), value in zip(axes, values):
+                combo.setdefault(name, {})[param] = value
+            combos.append(combo)
+
+        frames = []
+        for i in range(0, len(combos), batch_size):
+            batch = combos[i:i + batch_size]
+            if self.cache is not None and self.data_key is not None:
+                key = fingerprint(self.data_key, batch)
+                frames.append(self.cache.get_or_compute("vectorized_sweep", key, lambda: self.run(batch)['summary']))
+            else:
+                frames.append(self.run(batch)['summary'])
+        return pd.concat(frames, ignore_index=True).sort_values('total_pl', ascending=False).reset_index(drop=True)
+
+    def cross_check(self, sample_days: int = 5, strategy_params: Optional[Dict[str, Dict[str, Any]]] = None,
+                    seed: int = 0, tolerance: float = 1e-6) -> pd.DataFrame:
+        """
+        Validates the vectorized path against the event-driven BacktestEngine on sample days:
+        per (symbol, day) realized P/L and fill counts must agree. This checks the two
+        backtesters against each other, not against live TradingExecutor execution.
+        """
+        if self.bars is None:
+            self.prepare()
+        vector = self.run([strategy_params or {}])
+        sessions = vector['sessions'].assign(vector_pl=vector['pnl'][0], vector_fills=vector['fills'][0])
+
+        unique_days = np.unique(self.dates)
+        rng = np.random.default_rng(seed)
+        days = np.sort(rng.choice(unique_days, size=min(sample_days, len(unique_days)), replace=False))
+
+        engine = BacktestEngine(self.symbols, investment_per_symbol=self.investment_per_symbol,
+                                slippage_bps=self.slippage_bps, fee_per_share=self.fee_per_share,
+                                fee_rate=self.fee_rate, lookback_days=self.lookback_days,
+                                strategy_params=strategy_params)
+        names = [STRATEGY_NAMES[cls] for cls in self.strategy_classes]
+        engine.make_strategies = _strategy_subset(engine.make_strategies, names)
+
+        rows = []
+        for day in days:
+            result = engine.run(start=str(day), end=str(day + np.timedelta64(1, 'D')), bars=self.bars)
+            fills = result['fills']
+            for symbol in self.symbols:
+                f = fills[fills['symbol'] == symbol]
+                rows.append({'symbol': symbol, 'date': day, 'event_pl': f['realized_pl'].sum(), 'event_fills': len(f)})
+
+        event = pd.DataFrame(rows)
+        merged = event.merge(sessions, on=['symbol', 'date'], how='left').fillna({'vector_pl': 0.0, 'vector_fills': 0})
+        merged['match'] = (np.abs(merged['event_pl'] - merged['vector_pl']) <= tolerance * np.maximum(1.0, np.abs(merged['event_pl']))) \
+            & (merged['event_fills'] == merged['vector_fills'])
+        if merged['match'].all():
+            logger.info(f"Cross-check passed on {len(days)} days x {len(self.symbols)} symbols.")
+        else:
+            logger.warning(f"Cross-check mismatches:\n{merged[~merged['match']]}")
+        return merged
+
+def _strategy_subset(make_strategies, names: List[str]):
+    def make(symbol: str) -> List[BaseStrategy]:
+        return [s for s in make_strategies(symbol) if s.name in names]
+    return make
+
+def _flatten(combo: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {f"{name}.{param}": value for name, params in combo.items() for param, value in params.items()}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    symbols = ["NVDA", "TSLA", "AMD", "TQQQ", "SOXL", "INOD", "PLTR", "DUK", "TIGR", "PAYO", "HROW", "SGRY"]
+    backtester = VectorizedBacktester(symbols, cache=ResultCache())
+    backtester.prepare()
+    grid = {name: cls.PARAM_GRID for name, cls in STRATEGY_CLASSES.items()}
+    print(backtester.sweep(grid).head(20).to_string())
+    report = backtester.cross_check()
+    print(f"Cross-check: {int(report['match'].sum())}/{len(report)} (symbol, day) pairs match")
@@ -23,9 +23,11 @@ from datetime import datetime
 import pytz
 from src.data.alpaca_interface import AlpacaInterface
 from src.data.database import DatabaseManager
-from src.backtest.analyzer import PerformanceAnalyzer
-from alpaca.trading.requests import GetOrdersRequest
-from alpaca.trading.enums import QueryOrderStatus
+from src.data.order_sync import OrderSync
+from src.data.cache import ResultCache
+from src.agent.liquidator import Liquidator
+from src.agent.risk import KillSwitch, DAILY_LOSS_LIMIT
+from src.backtest.analyzer import PerformanceAnalyzer, IncrementalAnalyzer
 from streamlit_autorefresh import st_autorefresh
 
 # Page Config
@@ -83,9 +85,38 @@ def get_alpaca():
 def get_db():
     return DatabaseManager()
 
+@st.cache_resource
+def get_order_sync():
+    # One background sync per dashboard process: full backfill once, then incremental every 60s
+    sync = OrderSync(get_alpaca(), DatabaseManager())
+    sync.start(interval=60)
+    return sync
+
+@st.cache_resource
+def get_analytics():
+    # Incremental analytics state (analytics_* tables) shared by all viewers
+    return IncrementalAnalyzer(DatabaseManager())
+
+@st.cache_resource
+def get_result_cache():
+    # Same on-disk cache the agent, optimizers and backtesters use
+    return ResultCache()
+
+@st.cache_data(ttl=300)
+def get_portfolio_history(period, timeframe):
+    # Equity history only changes bar-by-bar; refetch at most every 5 minutes
+    history = get_alpaca().get_portfolio_history(period=period, timeframe=timeframe)
+    if not history or not history.timestamp:
+        return None
+    return pd.DataFrame({
+        'timestamp': [datetime.fromtimestamp(ts, pytz.timezone('US/Eastern')) for ts in history.timestamp],
+        'equity': history.equity
+    })
+
 try:
     alpaca = get_alpaca()
     db = get_db()
+    get_order_sync()
 except Exception as e:
     st.error(f"Failed to connect to services: {e}")
     st.stop()
@@ -106,6 +137,24 @@ try:
     m1.metric("Total Equity", f"${equity:,.2f}", f"{change:+.2f}")
     m2.metric("Cash Balance", f"${float(account.cash):,.2f}")
     m3.metric("Buying Power", f"${float(account.buying_power):,.2f}")
+
+    # Risk metrics streamed by the agent (EquityTracker -> risk_snapshots)
+    risk = db.load_latest_risk_snapshot()
+    if risk:
+        r1, r2, r3, r4, r5 = st.columns(5)
+        daily_limit = -DAILY_LOSS_LIMIT  # Roadmap rule: no new positions at -2% daily loss (RiskGate)
+        r1.metric("Daily P/L", f"${risk['daily_pl']:+,.2f}", f"{risk['daily_return'] * 100:+.2f}%",
+                  help=f"Daily loss limit: {daily_limit * 100:.0f}%")
+        r2.metric("Drawdown", f"{risk['drawdown'] * 100:.2f}%", f"max {risk['max_drawdown'] * 100:.2f}%", delta_color="off")
+        r3.metric("Sharpe / Sortino", f"{risk['sharpe']:.2f} / {risk['sortino']:.2f}")
+        r4.metric("Exposure", f"{risk['exposure'] * 100:.1f}%", f"avg {risk['avg_exposure'] * 100:.1f}%", delta_color="off")
+        r5.metric("Realized P/L", f"${risk['realized_pl']:+,.2f}")
+        if risk['daily_return'] <= daily_limit:
+            st.error(f"Daily loss limit breached ({risk['daily_return'] * 100:.2f}%).")
+        if risk['contributions']:
+            st.caption("Realized P/L by strategy: " + " | ".join(
+                f"{name} ${pl:+,.2f}" for name, pl in sorted(risk['contributions'].items())))
+        st.caption(f"Risk snapshot: {pd.Timestamp(risk['timestamp']).tz_convert('US/Eastern').strftime('%Y-%m-%d %H:%M:%S')} ET")
     
     st.divider()
 
@@ -128,14 +177,9 @@ try:
     timeframe = tf_map.get(period, "1D")
 
     # Fetch History
-    history = alpaca.get_portfolio_history(period=period, timeframe=timeframe)
+    df_hist = get_portfolio_history(period, timeframe)
     
-    if history and history.timestamp:
-        # Convert to DataFrame
-        df_hist = pd.DataFrame({
-            'timestamp': [datetime.fromtimestamp(ts, pytz.timezone('US/Eastern')) for ts in history.timestamp],
-            'equity': history.equity
-        })
+    if df_hist is not None:
         # Plot with Altair for better control (Dynamic Y-axis)
         import altair as alt
         
@@ -245,19 +289,20 @@ with tab1:
     
     st.subheader("Recent Orders (Live)")
     try:
-        req = GetOrdersRequest(status=QueryOrderStatus.ALL, limit=50)
-        orders = alpaca.trading_client.get_orders(filter=req)
+        # Local mirror (OrderSync), joined to trade_logs for the strategy
+        orders = db.load_orders(limit=50)
         
         if orders:
             order_data = []
             for o in orders:
                 order_data.append({
-                    "Time": o.created_at.astimezone(pytz.timezone('US/Eastern')).strftime('%Y-%m-%d %H:%M:%S'),
-                    "Symbol": o.symbol,
-                    "Side": o.side.value.upper(),
-                    "Qty": float(o.qty),
-                    "Filled": f"${float(o.filled_avg_price):.2f}" if o.filled_avg_price else "-",
-                    "Status": o.status.value.upper()
+                    "Time": pd.Timestamp(o['submitted_at']).tz_convert('US/Eastern').strftime('%Y-%m-%d %H:%M:%S'),
+                    "Symbol": o['symbol'],
+                    "Side": o['side'].upper(),
+                    "Qty": float(o['qty']) if o['qty'] is not None else 0.0,
+                    "Filled": f"${o['filled_avg_price']:.2f}" if o['filled_avg_price'] else "-",
+                    "Status": o['status'].upper(),
+                    "Strategy": o['strategy_name']
                 })
             
             df_orders = pd.DataFrame(order_data)
@@ -284,19 +329,12 @@ with tab1:
 with tab2:
     st.subheader("Performance Scorecard (Paper Trading)")
     try:
-        req_closed = GetOrdersRequest(status=QueryOrderStatus.CLOSED, limit=500)
-        closed_orders = alpaca.trading_client.get_orders(filter=req_closed)
-        
-        # Fetch Strategy Map from DB
-        try:
-            strat_rows = db.execute_query("SELECT order_id, strategy_name FROM trade_logs WHERE order_id IS NOT NULL")
-            strategy_map = {row['order_id']: row['strategy_name'] for row in strat_rows}
-        except Exception as e:
-            # Log error but proceed (might be empty table)
-            print(f"Strategy map fetch failed: {e}")
-            strategy_map = {}
+        # Fills come from the local orders table (strategy joined from trade_logs); only orders
+        # filled after the analytics cursor are matched, history lives in the DB.
+        analytics = get_analytics()
+        analytics.update_from_orders()
 
-        daily_stats = PerformanceAnalyzer.calculate_daily_performance(closed_orders, strategy_map)
+        daily_stats = analytics.daily_performance()
         metrics = PerformanceAnalyzer.get_summary_metrics(daily_stats)
         
         # Metrics Top Row
@@ -315,7 +353,7 @@ with tab2:
             st.line_chart(daily_pl_sum)
             
             st.subheader("Strategy Comparison")
-            strat_metrics = PerformanceAnalyzer.get_metrics_by_strategy(daily_stats)
+            strat_metrics = analytics.strategy_metrics()
             if not strat_metrics.empty:
                  c1, c2 = st.columns(2)
                  with c1:
@@ -353,15 +391,41 @@ with tab3:
 # --- TAB 4: System ---
 with tab4:
     st.subheader("Control Panel")
+    # Same sentinel file the agent's RiskGate checks before every order
+    kill_switch = KillSwitch()
+    halt = kill_switch.info()
+    if halt:
+        st.error(f"⛔ Kill switch engaged since {halt.get('engaged_at', '?')}: {halt.get('reason')}. No orders are sent.")
+        if st.button("▶️ Release Kill Switch (Resume Trading)"):
+            kill_switch.release()
+            st.rerun()
     if st.button("⛔ EMERGENCY HALT (Liquidate All)", type="primary"):
         st.warning("Executing Emergency Liquidation...")
         try:
-            alpaca.trading_client.cancel_orders()
-            positions = alpaca.trading_client.get_all_positions()
-            for p in positions:
-                alpaca.submit_order(p.symbol, float(p.qty), 'sell')
-            st.success("Halt Signal Sent.")
+            # Stop the agent first so it cannot reopen positions while they are being closed
+            kill_switch.engage("emergency halt from the dashboard")
+            report = Liquidator(alpaca, timeout=30).run()
+            if report['flat']:
+                st.success(f"Flat in {report['time_to_flat']:.2f}s ({report['orders']} orders).")
+            else:
+                st.error(f"Still open after 30s: {report['remaining']}")
             time.sleep(2)
             st.rerun()
         except Exception as e:
-            st.error(f"Halt Failed: {e}") 
+            st.error(f"Halt Failed: {e}")
+
+    st.divider()
+    st.subheader("Result Cache")
+    try:
+        result_cache = get_result_cache()
+        totals = result_cache.stats_summary()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Hit Rate", f"{totals['hit_rate']:.1f}%")
+        c2.metric("Entries", f"{totals['entries']}")
+        c3.metric("Size", f"{totals['bytes'] / 1024 / 1024:.1f} MB")
+        st.dataframe(result_cache.stats().style.format({"hit_rate": "{:.1f}%"}), use_container_width=True)
+        if st.button("🗑️ Clear Result Cache"):
+            result_cache.clear()
+            st.rerun()
+    except Exception as e:
+        st.error(f"Cache stats unavailable: {e}") 
@@ -1,6 +1,6 @@
 import os
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import List, Optional, Dict, Any
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
@@ -81,6 +81,15 @@ class AlpacaInterface:
             logger.error(f"Error fetching market clock: {e}")
             return None
 
+    def get_calendar(self, start: date, end: date):
+        """Market sessions (date, open, close in US/Eastern, early closes included) between two dates."""
+        from alpaca.trading.requests import GetCalendarRequest
+        try:
+            return self.trading_client.get_calendar(GetCalendarRequest(start=start, end=end))
+        except Exception as e:
+            logger.error(f"Error fetching market calendar: {e}")
+            raise
+
     def get_snapshot(self, symbol: str):
         """Fetch snapshot data which includes daily bar (Open, High, Low, Close)."""
         from alpaca.data.requests import StockSnapshotRequest
@@ -103,6 +112,25 @@ class AlpacaInterface:
             logger.error(f"Error fetching latest price for {symbol}: {e}")
             raise
 
+    def get_latest_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Fetch the latest trade price for many symbols in one request."""
+        from alpaca.data.requests import StockLatestTradeRequest
+        try:
+            request_params = StockLatestTradeRequest(symbol_or_symbols=symbols, feed='iex')
+            trades = self.data_client.get_stock_latest_trade(request_params)
+            return {symbol: trade.price for symbol, trade in trades.items()}
+        except Exception as e:
+            logger.error(f"Error fetching latest prices for {len(symbols)} symbols: {e}")
+            raise
+
+    def get_positions(self) -> Dict[str, Any]:
+        """Fetch all open positions in one request, keyed by symbol."""
+        try:
+            return {p.symbol: p for p in self.trading_client.get_all_positions()}
+        except Exception as e:
+            logger.error(f"Error fetching positions: {e}")
+            raise
+
     def get_portfolio_history(self, period="1M", timeframe="1D"):
         """Fetch portfolio equity history."""
         from alpaca.trading.requests import GetPortfolioHistoryRequest
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Content hash of backtest inputs. Accepts DataFrames/Series (index + values),
+    NumPy arrays, strategy classes (name + VERSION) and anything JSON-serializable.
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        _feed(h, part)
+    return h.hexdigest()
+
+def _feed(h, part: Any):
+    if isinstance(part, (pd.DataFrame, pd.Series)):
+        h.update(b'frame')
+        if isinstance(part.index, pd.DatetimeIndex):
+            h.update(np.asarray(part.index.astype('int64')).tobytes())
+        else:
+            h.update(json.dumps([str(i) for i in part.index]).encode())
+        columns = list(part.columns) if isinstance(part, pd.DataFrame) else [part.name]
+        h.update(json.dumps([str(c) for c in columns]).encode())
+        h.update(np.ascontiguousarray(part.to_numpy(dtype=np.float64)).tobytes())
+    elif isinstance(part, np.ndarray):
+        h.update(f"array{part.dtype}{part.shape}".encode())
+        h.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(part, type):
+        h.update(json.dumps({"class": part.__name__, "version": getattr(part, 'VERSION', None)}).encode())
+    elif isinstance(part, (list, tuple)) and any(isinstance(p, (pd.DataFrame, pd.Series, np.ndarray, type)) for p in part):
+        for p in part:
+            _feed(h, p)
+    else:
+        h.update(json.dumps(part, sort_keys=True, default=str).encode())
+
+class ResultCache:
+    """
+    Content-addressed, size-bounded on-disk cache for backtest/optimization results.
+
+    Entries live in a small SQLite file (shared by the agent, the optimizers and the dashboard,
+    WAL mode) as pickled blobs keyed by (namespace, fingerprint of the inputs). Reads refresh
+    last_access; writes evict least-recently-used entries beyond `max_bytes`.
+    Hit/miss counters are kept per namespace in the same file.
+    """
+    def __init__(self, path: str = "data/result_cache.db", max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode = WAL;")
+        self.conn.execute("PRAGMA synchronous = NORMAL;")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT,
+                key TEXT,
+                value BLOB,
+                size INTEGER,
+                created_at REAL,
+                last_access REAL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries (last_access)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_stats (
+                namespace TEXT PRIMARY KEY,
+                hits INTEGER DEFAULT 0,
+                misses INTEGER DEFAULT 0
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+            hit = row is not None
+            if hit:
+                self.conn.execute("UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?", (time.time(), namespace, key))
+            self._count(namespace, hit)
+            self.conn.commit()
+        if not hit:
+            return default
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {namespace}/{key}: {e}")
+            self.delete(namespace, key)
+            return default
+
+    def put(self, namespace: str, key: str, value: Any):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            logger.warning(f"Result for {namespace}/{key} ({len(blob):,} bytes) exceeds the cache size, not stored.")
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, blob, len(blob), now, now))
+            self._evict()
+            self.conn.commit()
+
+    def get_or_compute(self, namespace: str, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(namespace, key, value)
+        return value
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            self.conn.commit()
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock:
+            if namespace is None:
+                self.conn.execute("DELETE FROM cache_entries")
+                self.conn.execute("DELETE FROM cache_stats")
+            else:
+                self.conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+                self.conn.execute("DELETE FROM cache_stats WHERE namespace = ?", (namespace,))
+            self.conn.commit()
+
+    def stats(self) -> pd.DataFrame:
+        """Per-namespace hits, misses, hit rate (%), entries and bytes."""
+        with self._lock:
+            counts = {r[0]: (r[1], r[2]) for r in self.conn.execute("SELECT namespace, hits, misses FROM cache_stats")}
+            sizes = {r[0]: (r[1], r[2]) for r in self.conn.execute(
+                "SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries GROUP BY namespace")}
+        rows = []
+        for namespace in sorted(set(counts) | set(sizes)):
+            hits, misses = counts.get(namespace, (0, 0))
+            entries, size = sizes.get(namespace, (0, 0))
+            lookups = hits + misses
+            rows.append({
+                "namespace": namespace, "hits": hits, "misses": misses,
+                "hit_rate": hits / lookups * 100 if lookups else 0.0,
+                "entries": entries, "bytes": size,
+            })
+        return pd.DataFrame(rows, columns=["namespace", "hits", "misses", "hit_rate", "entries", "bytes"])
+
+    def _count(self, namespace: str, hit: bool):
+        column = "hits" if hit else "misses"
+        self.conn.execute(
+            f"INSERT INTO cache_stats (namespace, {column}) VALUES (?, 1) "
+            f"ON CONFLICT(namespace) DO UPDATE SET {column} = {column} + 1", (namespace,))
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for namespace, key, size in self.conn.execute(
+                "SELECT namespace, key, size FROM cache_entries ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            total -= size
+            evicted += 1
+        logger.info(f"Result cache: evicted {evicted} LRU entries ({total:,} bytes kept).")
+
+    def stats_summary(self) -> Dict[str, Any]:
+        """Totals across namespaces (for logs and the dashboard header)."""
+        df = self.stats()
+        hits, misses = int(df['hits'].sum()), int(df['misses'].sum())
+        return {
+            "hits": hits, "misses": misses,
+            "hit_rate": hits / (hits + misses) * 100 if hits + misses else 0.0,
+            "entries": int(df['entries'].sum()), "bytes": int(df['bytes'].sum()),
+        }
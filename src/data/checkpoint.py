@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class StateCheckpoint:
+    """
+    Crash-safe JSON snapshot of the executor's in-memory state.
+
+    save() writes a temporary file in the same directory, fsyncs it and os.replace()s it
+    over the checkpoint, so a crash at any point leaves either the previous or the new
+    snapshot on disk, never a torn one. load() returns None for a missing or unreadable file.
+    """
+    VERSION = 1
+
+    def __init__(self, path: str = "data/checkpoint.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def save(self, state: Dict[str, Any]):
+        payload = json.dumps({"version": self.VERSION, **state}, separators=(',', ':'), default=str)
+        directory = os.path.dirname(self.path) or "."
+        with self._lock:
+            fd, tmp = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+        if state.get("version") != self.VERSION:
+            logger.warning(f"Ignoring checkpoint {self.path} with version {state.get('version')}")
+            return None
+        return state
+
+    def clear(self):
+        with self._lock:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
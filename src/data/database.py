@@ -1,11 +1,21 @@
 import sqlite3
 import os
+import json
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Order states that can no longer change (partially filled orders are only final once canceled/expired)
+FINAL_ORDER_STATUSES = "'filled', 'canceled', 'expired', 'rejected', 'replaced', 'done_for_day'"
+
+# Strategy that placed an order (trade_logs.order_id holds the Alpaca order id), via idx_trade_logs_order_id
+ORDER_STRATEGY = """COALESCE(
+    (SELECT t.strategy_name FROM trade_logs t WHERE t.order_id = o.id AND t.strategy_name IS NOT NULL LIMIT 1),
+    (SELECT t.strategy_name FROM trade_logs t WHERE t.order_id = o.client_order_id AND t.strategy_name IS NOT NULL LIMIT 1),
+    'Unknown')"""
+
 class DatabaseManager:
     def __init__(self, db_path: str = "data/antigravity.db"):
         self.db_path = db_path
@@ -80,14 +90,202 @@ class DatabaseManager:
                 );
             """)
 
-            # 3. Strategy Parameters Table (Dynamic K)
+            # 3. Strategy Parameters Table (Optimized params + derived daily state)
             self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS strategy_params (
                     date DATE,
                     symbol TEXT,
+                    strategy_name TEXT,
                     k_value REAL,
                     target_price REAL,
-                    PRIMARY KEY (date, symbol)
+                    state_json TEXT, -- BaseStrategy.get_state()
+                    input_hash TEXT, -- BaseStrategy.input_fingerprint()
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (date, symbol, strategy_name)
+                );
+            """)
+
+            # 4. Walk-Forward Optimization Results
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS walk_forward_results (
+                    run_date DATE,
+                    symbol TEXT,
+                    strategy_name TEXT,
+                    params_json TEXT,
+                    train_return REAL,
+                    oos_return REAL,
+                    oos_sharpe REAL,
+                    n_windows INTEGER,
+                    PRIMARY KEY (run_date, symbol, strategy_name)
+                );
+            """)
+
+            # 5. Incremental Performance Analytics (see IncrementalAnalyzer)
+            # Every processed fill (order_id is the dedupe key)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analytics_fills (
+                    order_id TEXT PRIMARY KEY,
+                    timestamp DATETIME,
+                    symbol TEXT,
+                    side TEXT,
+                    qty REAL,
+                    price REAL,
+                    strategy TEXT
+                );
+            """)
+            # Unmatched (open) buy lots, remaining quantity
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analytics_open_lots (
+                    order_id TEXT PRIMARY KEY,
+                    timestamp DATETIME,
+                    symbol TEXT,
+                    qty REAL,
+                    price REAL,
+                    strategy TEXT
+                );
+            """)
+            # FIFO-matched round trips; date is the exit date (US/Eastern)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analytics_round_trips (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date DATE,
+                    symbol TEXT,
+                    strategy TEXT,
+                    exit_strategy TEXT,
+                    entry_time DATETIME,
+                    exit_time DATETIME,
+                    qty REAL,
+                    entry_price REAL,
+                    exit_price REAL,
+                    pnl REAL,
+                    entry_order_id TEXT,
+                    exit_order_id TEXT
+                );
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_round_trips_date ON analytics_round_trips (date)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analytics_daily (
+                    date DATE,
+                    symbol TEXT,
+                    strategy TEXT,
+                    net_pl REAL,
+                    order_count INTEGER,
+                    win INTEGER,
+                    PRIMARY KEY (date, symbol, strategy)
+                );
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analytics_strategy_totals (
+                    strategy TEXT PRIMARY KEY,
+                    net_pl REAL,
+                    total_days INTEGER,
+                    wins INTEGER
+                );
+            """)
+            # Last processed fill
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analytics_cursor (
+                    name TEXT PRIMARY KEY,
+                    last_filled_at DATETIME,
+                    last_order_id TEXT,
+                    processed_orders INTEGER,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+
+            # 6. Local Order History (mirrored from Alpaca by OrderSync)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS orders (
+                    id TEXT PRIMARY KEY,
+                    client_order_id TEXT,
+                    symbol TEXT,
+                    side TEXT,
+                    order_type TEXT,
+                    status TEXT,
+                    qty REAL,
+                    filled_qty REAL,
+                    filled_avg_price REAL,
+                    submitted_at DATETIME,
+                    filled_at DATETIME,
+                    updated_at DATETIME
+                );
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_submitted_at ON orders (submitted_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_filled_at ON orders (filled_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_trade_logs_order_id ON trade_logs (order_id)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS order_sync_state (
+                    name TEXT PRIMARY KEY,
+                    backfill_complete INTEGER DEFAULT 0,
+                    backfill_after DATETIME, -- submitted_at of the last backfilled page
+                    last_synced_at DATETIME
+                );
+            """)
+
+            # 7. Equity / Risk Snapshots (EquityTracker, throttled)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS risk_snapshots (
+                    timestamp DATETIME PRIMARY KEY,
+                    equity REAL,
+                    peak REAL,
+                    drawdown REAL,
+                    max_drawdown REAL,
+                    daily_pl REAL,
+                    daily_return REAL,
+                    sharpe REAL,
+                    sortino REAL,
+                    exposure REAL,
+                    avg_exposure REAL,
+                    realized_pl REAL,
+                    contributions_json TEXT
+                );
+            """)
+            # Latest EquityTracker.get_state() (to resume the running metrics after a restart)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS risk_state (
+                    name TEXT PRIMARY KEY,
+                    state_json TEXT,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+
+            # Virtual per-strategy shares of the single broker position per symbol (OrderManager)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS strategy_positions (
+                    symbol TEXT NOT NULL,
+                    strategy_name TEXT NOT NULL,
+                    qty REAL NOT NULL,
+                    avg_entry_price REAL NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (symbol, strategy_name)
+                );
+            """)
+            # Fill quantity already applied to strategy_positions per order (written in the same
+            # transaction, so a restart never replays a fill twice)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS applied_fills (
+                    order_id TEXT PRIMARY KEY,
+                    filled REAL NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
+            self.conn.execute("DELETE FROM applied_fills WHERE updated_at < datetime('now', '-7 days')")
+
+
+            # Daily pre-market screener output (UniverseScreener), rank 1 = best candidate
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS universe_candidates (
+                    run_date DATE,
+                    rank INTEGER,
+                    symbol TEXT,
+                    price REAL,
+                    volatility REAL,
+                    range_pct REAL,
+                    dollar_volume REAL,
+                    momentum REAL,
+                    score REAL,
+                    PRIMARY KEY (run_date, symbol)
                 );
             """)
             
@@ -114,6 +312,17 @@ class DatabaseManager:
                 logger.info("Migrating schema: Adding strategy_name column to trade_logs")
                 self.conn.execute("ALTER TABLE trade_logs ADD COLUMN strategy_name TEXT")
                 self.conn.commit()
+
+            # strategy_params was keyed by (date, symbol) only and never written to.
+            # The primary key can't be altered in SQLite, so recreate it.
+            cursor = self.conn.execute("PRAGMA table_info(strategy_params)")
+            columns = [row['name'] for row in cursor.fetchall()]
+
+            if columns and 'strategy_name' not in columns:
+                logger.info("Migrating schema: Recreating strategy_params keyed by (date, symbol, strategy_name)")
+                self.conn.execute("DROP TABLE strategy_params")
+                self.conn.commit()
+                self.create_tables()
                 
         except sqlite3.Error as e:
             logger.error(f"Schema migration failed: {e}")
@@ -151,6 +360,363 @@ class DatabaseManager:
         self.execute_update(query, (symbol, side, qty, price, reason, order_id, strategy_name))
         logger.debug(f"Logged trade: {side} {qty} {symbol} @ {price} ({strategy_name})")
 
+    def save_strategy_params(self, records: List[Dict[str, Any]]):
+        """
+        Upserts optimized parameters / daily state for many strategies in one transaction.
+        Each record needs: date, symbol, strategy_name, state (dict), input_hash.
+        """
+        if not records:
+            return
+        if not self.conn:
+            self.connect()
+
+        query = """
+            INSERT OR REPLACE INTO strategy_params
+                (date, symbol, strategy_name, k_value, target_price, state_json, input_hash, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """
+        rows = [(
+            r['date'],
+            r['symbol'],
+            r['strategy_name'],
+            r['state'].get('k'),
+            r['state'].get('target_price'),
+            json.dumps(r['state']),
+            r['input_hash']
+        ) for r in records]
+
+        try:
+            self.conn.executemany(query, rows)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Saving strategy params failed: {e}")
+            self.conn.rollback()
+            raise
+
+    def load_strategy_params(self, date: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Loads all persisted strategy states for a trading date.
+        Returns {(symbol, strategy_name): {'state': dict, 'input_hash': str}}.
+        """
+        rows = self.execute_query(
+            "SELECT symbol, strategy_name, state_json, input_hash FROM strategy_params WHERE date = ?",
+            (date,)
+        )
+        result = {}
+        for row in rows:
+            try:
+                state = json.loads(row['state_json']) if row['state_json'] else {}
+            except ValueError:
+                continue
+            result[(row['symbol'], row['strategy_name'])] = {'state': state, 'input_hash': row['input_hash']}
+        return result
+
+    def save_walk_forward_results(self, run_date: str, results: List[Dict[str, Any]]):
+        """Stores WalkForwardOptimizer.run() output for a trading date."""
+        if not results:
+            return
+        if not self.conn:
+            self.connect()
+
+        query = """
+            INSERT OR REPLACE INTO walk_forward_results
+                (run_date, symbol, strategy_name, params_json, train_return, oos_return, oos_sharpe, n_windows)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        rows = [(run_date, r['symbol'], r['strategy_name'], json.dumps(r['params']),
+                 r['train_return'], r['oos_return'], r['oos_sharpe'], r['n_windows']) for r in results]
+        try:
+            self.conn.executemany(query, rows)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Saving walk-forward results failed: {e}")
+            self.conn.rollback()
+            raise
+
+    def load_walk_forward_results(self, run_date: str) -> List[Dict[str, Any]]:
+        rows = self.execute_query("SELECT * FROM walk_forward_results WHERE run_date = ?", (run_date,))
+        results = []
+        for row in rows:
+            r = dict(row)
+            r['params'] = json.loads(r.pop('params_json'))
+            results.append(r)
+        return results
+
+    def filter_new_order_ids(self, order_ids: List[str]) -> set:
+        """Returns the order ids not yet processed by the analytics."""
+        if not order_ids:
+            return set()
+        if not self.conn:
+            self.connect()
+        seen = set()
+        # Stay under SQLite's host parameter limit
+        for i in range(0, len(order_ids), 900):
+            chunk = order_ids[i:i + 900]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(f"SELECT order_id FROM analytics_fills WHERE order_id IN ({placeholders})", chunk).fetchall()
+            seen.update(row['order_id'] for row in rows)
+        return set(order_ids) - seen
+
+    def load_open_lots(self, symbols: List[str]) -> List[sqlite3.Row]:
+        if not symbols:
+            return []
+        placeholders = ",".join("?" * len(symbols))
+        return self.execute_query(
+            f"SELECT order_id, timestamp, symbol, qty, price, strategy FROM analytics_open_lots "
+            f"WHERE symbol IN ({placeholders}) ORDER BY timestamp", tuple(symbols))
+
+    def get_analytics_cursor(self, name: str = "orders") -> Optional[Dict[str, Any]]:
+        rows = self.execute_query("SELECT * FROM analytics_cursor WHERE name = ?", (name,))
+        return dict(rows[0]) if rows else None
+
+    def save_analytics_increment(self, fills: List[tuple], round_trips: List[tuple], symbols: List[str],
+                                 open_lots: List[tuple], cursor: Dict[str, Any], name: str = "orders"):
+        """
+        Applies one analytics increment in a single transaction:
+        new fills and round trips are appended, open lots of `symbols` replaced, daily aggregates
+        recomputed for the exit dates touched, strategy totals refreshed and the cursor advanced.
+        fills: (order_id, timestamp, symbol, side, qty, price, strategy)
+        round_trips: (date, symbol, strategy, exit_strategy, entry_time, exit_time, qty, entry_price, exit_price, pnl, entry_order_id, exit_order_id)
+        open_lots: (order_id, timestamp, symbol, qty, price, strategy)
+        """
+        if not self.conn:
+            self.connect()
+        dates = sorted({r[0] for r in round_trips})
+        try:
+            self.conn.executemany("INSERT OR IGNORE INTO analytics_fills VALUES (?, ?, ?, ?, ?, ?, ?)", fills)
+            self.conn.executemany("""
+                INSERT INTO analytics_round_trips
+                    (date, symbol, strategy, exit_strategy, entry_time, exit_time, qty, entry_price, exit_price, pnl, entry_order_id, exit_order_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, round_trips)
+
+            self.conn.executemany("DELETE FROM analytics_open_lots WHERE symbol = ?", [(s,) for s in symbols])
+            self.conn.executemany("INSERT OR REPLACE INTO analytics_open_lots VALUES (?, ?, ?, ?, ?, ?)", open_lots)
+
+            if dates:
+                placeholders = ",".join("?" * len(dates))
+                self.conn.execute(f"DELETE FROM analytics_daily WHERE date IN ({placeholders})", dates)
+                self.conn.execute(f"""
+                    INSERT INTO analytics_daily (date, symbol, strategy, net_pl, order_count, win)
+                    SELECT date, symbol, strategy, SUM(pnl),
+                           COUNT(DISTINCT entry_order_id) + COUNT(DISTINCT exit_order_id), SUM(pnl) > 0
+                    FROM analytics_round_trips WHERE date IN ({placeholders})
+                    GROUP BY date, symbol, strategy
+                """, dates)
+                self.conn.execute("DELETE FROM analytics_strategy_totals")
+                self.conn.execute("""
+                    INSERT INTO analytics_strategy_totals (strategy, net_pl, total_days, wins)
+                    SELECT strategy, SUM(net_pl), COUNT(*), SUM(win) FROM analytics_daily GROUP BY strategy
+                """)
+
+            self.conn.execute("""
+                INSERT INTO analytics_cursor (name, last_filled_at, last_order_id, processed_orders, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(name) DO UPDATE SET
+                    last_filled_at = MAX(COALESCE(last_filled_at, ''), excluded.last_filled_at),
+                    last_order_id = excluded.last_order_id,
+                    processed_orders = processed_orders + excluded.processed_orders,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (name, cursor['last_filled_at'], cursor['last_order_id'], cursor['processed_orders']))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Saving analytics increment failed: {e}")
+            self.conn.rollback()
+            raise
+
+    def upsert_orders(self, rows: List[tuple]) -> int:
+        """
+        Inserts or updates mirrored orders. Rows follow the orders table column order.
+        Returns the number of rows that were new or changed.
+        """
+        if not rows:
+            return 0
+        if not self.conn:
+            self.connect()
+        query = """
+            INSERT INTO orders (id, client_order_id, symbol, side, order_type, status, qty, filled_qty,
+                                filled_avg_price, submitted_at, filled_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                status = excluded.status, qty = excluded.qty, filled_qty = excluded.filled_qty,
+                filled_avg_price = excluded.filled_avg_price, filled_at = excluded.filled_at,
+                updated_at = excluded.updated_at
+            WHERE excluded.updated_at IS NOT orders.updated_at
+        """
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(query, rows)
+            self.conn.commit()
+            return self.conn.total_changes - before
+        except sqlite3.Error as e:
+            logger.error(f"Saving orders failed: {e}")
+            self.conn.rollback()
+            raise
+
+    def get_order_sync_state(self, name: str = "alpaca") -> Dict[str, Any]:
+        rows = self.execute_query("SELECT * FROM order_sync_state WHERE name = ?", (name,))
+        return dict(rows[0]) if rows else {'name': name, 'backfill_complete': 0, 'backfill_after': None, 'last_synced_at': None}
+
+    def save_order_sync_state(self, state: Dict[str, Any]):
+        self.execute_update("""
+            INSERT OR REPLACE INTO order_sync_state (name, backfill_complete, backfill_after, last_synced_at)
+            VALUES (?, ?, ?, ?)
+        """, (state['name'], state['backfill_complete'], state['backfill_after'], state['last_synced_at']))
+
+    def oldest_open_order_submitted_at(self) -> Optional[str]:
+        """submitted_at of the oldest order that can still change (not in a final state)."""
+        rows = self.execute_query(f"""
+            SELECT MIN(submitted_at) AS submitted_at FROM orders
+            WHERE status NOT IN ({FINAL_ORDER_STATUSES})
+        """)
+        return rows[0]['submitted_at'] if rows else None
+
+    def load_orders(self, limit: int = 50, status: Optional[str] = None) -> List[sqlite3.Row]:
+        """Most recent orders with the strategy that placed them (from trade_logs)."""
+        query = f"""
+            SELECT o.*, {ORDER_STRATEGY} AS strategy_name
+            FROM orders o
+        """
+        params: list = []
+        if status:
+            query += " WHERE o.status = ?"
+            params.append(status)
+        query += " ORDER BY o.submitted_at DESC LIMIT ?"
+        params.append(limit)
+        return self.execute_query(query, tuple(params))
+
+    def load_order_fills(self, after: Optional[str] = None) -> List[sqlite3.Row]:
+        """
+        Final orders with executed quantity filled after `after` (ISO UTC), oldest first,
+        in the analyzer's fill layout (timestamp, symbol, side, qty, price, order_id, strategy).
+        """
+        query = f"""
+            SELECT o.filled_at AS timestamp, o.symbol, o.side, o.filled_qty AS qty, o.filled_avg_price AS price,
+                   o.id AS order_id, {ORDER_STRATEGY} AS strategy
+            FROM orders o
+            WHERE o.filled_qty > 0 AND o.filled_avg_price IS NOT NULL AND o.filled_at IS NOT NULL
+              AND o.status IN ({FINAL_ORDER_STATUSES})
+        """
+        params: tuple = ()
+        if after:
+            query += " AND o.filled_at > ?"
+            params = (after,)
+        query += " ORDER BY o.filled_at"
+        return self.execute_query(query, params)
+
+    def save_risk_snapshot(self, snapshot: Dict[str, Any], state: Optional[Dict[str, Any]] = None):
+        """Appends an EquityTracker snapshot (and replaces the stored tracker state) in one transaction."""
+        if not self.conn:
+            self.connect()
+        try:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO risk_snapshots
+                    (timestamp, equity, peak, drawdown, max_drawdown, daily_pl, daily_return, sharpe, sortino,
+                     exposure, avg_exposure, realized_pl, contributions_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (snapshot['timestamp'], snapshot['equity'], snapshot['peak'], snapshot['drawdown'],
+                  snapshot['max_drawdown'], snapshot['daily_pl'], snapshot['daily_return'], snapshot['sharpe'],
+                  snapshot['sortino'], snapshot['exposure'], snapshot['avg_exposure'], snapshot['realized_pl'],
+                  json.dumps(snapshot['contributions'])))
+            if state is not None:
+                self.conn.execute("INSERT OR REPLACE INTO risk_state (name, state_json, updated_at) VALUES ('equity', ?, CURRENT_TIMESTAMP)",
+                                  (json.dumps(state),))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Saving risk snapshot failed: {e}")
+            self.conn.rollback()
+            raise
+
+    def load_latest_risk_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Newest snapshot with contributions decoded; None if there is none."""
+        rows = self.execute_query("SELECT * FROM risk_snapshots ORDER BY timestamp DESC LIMIT 1")
+        if not rows:
+            return None
+        snapshot = dict(rows[0])
+        snapshot['contributions'] = json.loads(snapshot.pop('contributions_json') or '{}')
+        return snapshot
+
+    def load_risk_state(self) -> Optional[Dict[str, Any]]:
+        rows = self.execute_query("SELECT state_json FROM risk_state WHERE name = 'equity'")
+        return json.loads(rows[0]['state_json']) if rows and rows[0]['state_json'] else None
+
+    def load_risk_snapshots(self, since: Optional[str] = None) -> List[sqlite3.Row]:
+        """Equity curve rows (timestamp, equity, drawdown, exposure) since an ISO timestamp."""
+        query = "SELECT timestamp, equity, drawdown, exposure FROM risk_snapshots"
+        params: tuple = ()
+        if since:
+            query += " WHERE timestamp >= ?"
+            params = (since,)
+        return self.execute_query(query + " ORDER BY timestamp", params)
+
+    def load_strategy_positions(self) -> Dict[Tuple[str, str], Tuple[float, float]]:
+        """{(symbol, strategy_name): (qty, avg_entry_price)}."""
+        rows = self.execute_query("SELECT symbol, strategy_name, qty, avg_entry_price FROM strategy_positions")
+        return {(r['symbol'], r['strategy_name']): (r['qty'], r['avg_entry_price']) for r in rows}
+
+    def save_strategy_positions(self, positions: Dict[Tuple[str, str], Tuple[float, float]],
+                                applied_fills: Optional[Dict[str, float]] = None):
+        """
+        Upserts sub-positions in one transaction; zero quantities are deleted. `applied_fills`
+        ({order_id: total filled qty applied}) is recorded in the same transaction.
+        """
+        if not positions and not applied_fills:
+            return
+        if not self.conn:
+            self.connect()
+        try:
+            for order_id, filled in (applied_fills or {}).items():
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO applied_fills (order_id, filled, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                """, (order_id, filled))
+            for (symbol, strategy_name), (qty, avg) in positions.items():
+                if abs(qty) < 1e-9:
+                    self.conn.execute("DELETE FROM strategy_positions WHERE symbol = ? AND strategy_name = ?",
+                                      (symbol, strategy_name))
+                else:
+                    self.conn.execute("""
+                        INSERT OR REPLACE INTO strategy_positions (symbol, strategy_name, qty, avg_entry_price, updated_at)
+                        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    """, (symbol, strategy_name, qty, avg))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Saving strategy positions failed: {e}")
+            self.conn.rollback()
+            raise
+
+    def load_applied_fills(self, order_ids: List[str]) -> Dict[str, float]:
+        """{order_id: filled qty applied to strategy_positions} for the known ids."""
+        if not order_ids:
+            return {}
+        placeholders = ",".join("?" * len(order_ids))
+        rows = self.execute_query(f"SELECT order_id, filled FROM applied_fills WHERE order_id IN ({placeholders})",
+                                  tuple(order_ids))
+        return {r['order_id']: r['filled'] for r in rows}
+
+    def save_universe_candidates(self, run_date: str, candidates: List[Dict[str, Any]]):
+        """Replaces a date's screener candidates (rows in rank order)."""
+        if not self.conn:
+            self.connect()
+        rows = [(run_date, rank, c['symbol'], c['price'], c['volatility'], c['range_pct'], c['dollar_volume'],
+                 c['momentum'], c['score']) for rank, c in enumerate(candidates, start=1)]
+        try:
+            self.conn.execute("DELETE FROM universe_candidates WHERE run_date = ?", (run_date,))
+            self.conn.executemany("""
+                INSERT INTO universe_candidates
+                    (run_date, rank, symbol, price, volatility, range_pct, dollar_volume, momentum, score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Saving universe candidates failed: {e}")
+            self.conn.rollback()
+            raise
+
+    def load_universe_candidates(self, run_date: str) -> List[Dict[str, Any]]:
+        rows = self.execute_query("SELECT * FROM universe_candidates WHERE run_date = ? ORDER BY rank", (run_date,))
+        return [dict(row) for row in rows]
+
 if __name__ == "__main__":
     # Test initialization
     db = DatabaseManager()
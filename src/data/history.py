@@ -0,0 +1,63 @@
+import logging
+from typing import List, Dict, Optional
+import pandas as pd
+from src.data.database import DatabaseManager
+from src.data.market_calendar import REGULAR_CLOSE, REGULAR_OPEN
+
+logger = logging.getLogger(__name__)
+
+def load_minute_bars(db: DatabaseManager, symbol: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """
+    Loads 1-minute bars for a symbol from ohlcv_data, indexed by (UTC) timestamp.
+    start/end are inclusive/exclusive ISO date strings.
+    """
+    query = "SELECT timestamp, open, high, low, close, volume FROM ohlcv_data WHERE symbol = ?"
+    params = [symbol]
+    if start:
+        query += " AND timestamp >= ?"
+        params.append(start)
+    if end:
+        query += " AND timestamp < ?"
+        params.append(end)
+    query += " ORDER BY timestamp ASC"
+
+    if not db.conn:
+        db.connect()
+    df = pd.read_sql_query(query, db.conn, params=params)
+    if df.empty:
+        return df
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, format='mixed')
+    df.set_index('timestamp', inplace=True)
+    return df
+
+def regular_session(df: pd.DataFrame) -> pd.DataFrame:
+    """Drops pre-market and after-hours bars (keeps 9:30 <= US/Eastern time < 16:00)."""
+    if df.empty:
+        return df
+    index = df.index.tz_convert('US/Eastern') if df.index.tz is not None else df.index.tz_localize('UTC').tz_convert('US/Eastern')
+    minute = index.hour * 60 + index.minute
+    mask = (minute >= REGULAR_OPEN.hour * 60 + REGULAR_OPEN.minute) & (minute < REGULAR_CLOSE.hour * 60 + REGULAR_CLOSE.minute)
+    return df if mask.all() else df[mask]
+
+def resample_daily(df: pd.DataFrame) -> pd.DataFrame:
+    """Minute bars -> daily OHLCV bars (same aggregation as the executor)."""
+    if df.empty:
+        return df
+    agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
+    if 'volume' in df.columns:
+        agg['volume'] = 'sum'
+    return df.resample('D').agg(agg).dropna()
+
+def load_daily_bars(db: DatabaseManager, symbols: List[str], start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Loads daily bars for many symbols. Symbols without data are omitted."""
+    result = {}
+    for symbol in symbols:
+        try:
+            daily = resample_daily(load_minute_bars(db, symbol, start, end))
+        except Exception as e:
+            logger.error(f"Failed to load history for {symbol}: {e}")
+            continue
+        if not daily.empty:
+            result[symbol] = daily
+    return result
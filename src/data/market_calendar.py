@@ -0,0 +1,163 @@
+import bisect
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import pytz
+from src.data.alpaca_interface import AlpacaInterface
+from src.data.checkpoint import StateCheckpoint
+
+logger = logging.getLogger(__name__)
+
+EASTERN = pytz.timezone('US/Eastern')
+
+# Regular session: only assumed (on weekdays) when neither the broker nor the cache has a calendar
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+
+# Sessions kept around today: back for restarts after a long weekend, ahead for next_session()
+DAYS_BACK = 7
+DAYS_AHEAD = 30
+
+Session = Tuple[datetime, datetime]
+
+class TradingCalendar:
+    """
+    Local copy of the broker's market calendar (holidays, early closes) behind a session
+    clock that needs no network call: is_open(), time_to_close(), session_minutes(), ...
+
+    load() runs once a day: the cache file is used if it was fetched today, otherwise the
+    broker calendar for DAYS_BACK..DAYS_AHEAD around today is fetched and written to the
+    cache (shared by every process, e.g. the shards). If the broker is unreachable a stale
+    cache is used, and without one weekdays with regular 9:30-16:00 hours are assumed.
+    Queries bisect the sorted session opens/closes; the first query on a new day reloads.
+    """
+    def __init__(self, alpaca: Optional[AlpacaInterface] = None, path: Optional[str] = "data/calendar.json",
+                 clock: Optional[Callable[[], datetime]] = None):
+        self.alpaca = alpaca or AlpacaInterface()
+        self.cache = StateCheckpoint(path) if path else None
+        self.clock = clock or (lambda: datetime.now(EASTERN))
+        self.opens: List[datetime] = []
+        self.closes: List[datetime] = []
+        self.by_date: Dict[date, Session] = {}
+        self.loaded_on: Optional[date] = None
+        self.source: Optional[str] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ loading
+
+    def load(self, force: bool = False) -> str:
+        """(Re)loads the sessions around today; returns where they came from."""
+        with self._lock:
+            today = self.clock().astimezone(EASTERN).date()
+            if not force and self.loaded_on == today:
+                return self.source
+            state = self.cache.load() if self.cache else None
+            cached = self._decode(state) if state else []
+            if not force and state and state.get('fetched') == today.isoformat() and cached:
+                sessions, source = cached, "cache"
+            else:
+                sessions, source = self._fetch(today), "broker"
+                if sessions:
+                    self._save(today, sessions)
+                elif any(o.date() >= today for o, _ in cached):
+                    sessions, source = cached, "stale cache"
+                else:
+                    sessions, source = self._regular(today), "regular hours"
+                    logger.warning("No market calendar available: assuming regular hours on weekdays.")
+            self.opens = [o for o, _ in sessions]
+            self.closes = [c for _, c in sessions]
+            self.by_date = {o.date(): (o, c) for o, c in sessions}
+            self.loaded_on = today
+            self.source = source
+        logger.info(f"📅 Market calendar: {len(sessions)} sessions from {source}")
+        return source
+
+    def _fetch(self, today: date) -> List[Session]:
+        try:
+            days = self.alpaca.get_calendar(today - timedelta(days=DAYS_BACK), today + timedelta(days=DAYS_AHEAD))
+            sessions = [(EASTERN.localize(day.open), EASTERN.localize(day.close)) for day in days]
+        except Exception as e:
+            logger.error(f"Error fetching the market calendar: {e}")
+            return []
+        return sorted(sessions)
+
+    def _save(self, today: date, sessions: List[Session]):
+        if self.cache is None:
+            return
+        try:
+            self.cache.save({'fetched': today.isoformat(),
+                             'sessions': [[o.isoformat(), c.isoformat()] for o, c in sessions]})
+        except OSError as e:
+            logger.error(f"Error writing the calendar cache: {e}")
+
+    @staticmethod
+    def _decode(state: dict) -> List[Session]:
+        try:
+            return [(datetime.fromisoformat(o), datetime.fromisoformat(c)) for o, c in state['sessions']]
+        except (KeyError, TypeError, ValueError):
+            return []
+
+    @staticmethod
+    def _regular(today: date) -> List[Session]:
+        sessions = []
+        for offset in range(-DAYS_BACK, DAYS_AHEAD + 1):
+            day = today + timedelta(days=offset)
+            if day.weekday() < 5:
+                sessions.append((EASTERN.localize(datetime.combine(day, REGULAR_OPEN)),
+                                 EASTERN.localize(datetime.combine(day, REGULAR_CLOSE))))
+        return sessions
+
+    @property
+    def stale(self) -> bool:
+        """True until load() ran today (the next query would load on the caller's thread)."""
+        return self.loaded_on != self.clock().astimezone(EASTERN).date()
+
+    def _now(self, now: Optional[datetime]) -> datetime:
+        if self.stale:
+            self.load()
+        now = now or self.clock()
+        return now if now.tzinfo is not None else EASTERN.localize(now)
+
+    # ------------------------------------------------------------------ session clock
+
+    def session(self, now: Optional[datetime] = None) -> Optional[Session]:
+        """(open, close) of the session in progress, None while the market is closed."""
+        now = self._now(now)
+        i = bisect.bisect_right(self.opens, now) - 1
+        if i >= 0 and now < self.closes[i]:
+            return self.opens[i], self.closes[i]
+        return None
+
+    def next_session(self, now: Optional[datetime] = None) -> Optional[Session]:
+        """The session in progress or else the next one (None past the loaded range)."""
+        now = self._now(now)
+        i = bisect.bisect_right(self.closes, now)
+        return (self.opens[i], self.closes[i]) if i < len(self.opens) else None
+
+    def session_on(self, day: Optional[date] = None) -> Optional[Session]:
+        """(open, close) on a date (default: today), None on weekends and holidays."""
+        now = self._now(None)
+        return self.by_date.get(day or now.astimezone(EASTERN).date())
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        return self.session(now) is not None
+
+    def time_to_close(self, now: Optional[datetime] = None) -> float:
+        """Seconds until the close of the session in progress (0 while closed)."""
+        now = self._now(now)
+        session = self.session(now)
+        return (session[1] - now).total_seconds() if session else 0.0
+
+    def time_to_open(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Seconds until the next open (0 while open, None if no session is loaded ahead)."""
+        now = self._now(now)
+        session = self.next_session(now)
+        if session is None:
+            return None
+        return max(0.0, (session[0] - now).total_seconds())
+
+    def session_minutes(self, day: Optional[date] = None) -> int:
+        """Length of the day's session in minutes (390 regular, 210 on early closes, 0 when closed)."""
+        session = self.session_on(day)
+        return int((session[1] - session[0]).total_seconds() // 60) if session else 0
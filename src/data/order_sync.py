@@ -0,0 +1,129 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from src.data.alpaca_interface import AlpacaInterface
+from src.data.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Orders submitted shortly before the last sync may still have changed (fills, cancels)
+SYNC_OVERLAP = timedelta(days=1)
+
+def to_iso(value: Optional[datetime]) -> Optional[str]:
+    """UTC ISO-8601 with microseconds (sortable as text in SQLite)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+
+def _enum(value) -> Optional[str]:
+    return getattr(value, 'value', value)
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+def order_row(o) -> tuple:
+    """Alpaca order -> orders table row."""
+    return (
+        str(o.id), str(o.client_order_id) if o.client_order_id else None, o.symbol,
+        _enum(o.side), _enum(o.order_type), _enum(o.status),
+        _float(o.qty), _float(o.filled_qty) or 0.0, _float(o.filled_avg_price),
+        to_iso(o.submitted_at), to_iso(o.filled_at), to_iso(o.updated_at),
+    )
+
+class OrderSync:
+    """
+    Mirrors the Alpaca order history into the local `orders` table.
+
+    The first run pages through the complete history (oldest first, resumable via
+    order_sync_state.backfill_after). Afterwards each sync only requests orders submitted since
+    the last sync (minus SYNC_OVERLAP) or since the oldest order still open locally, and
+    upserts the ones whose updated_at changed.
+    """
+    def __init__(self, alpaca: AlpacaInterface = None, db: DatabaseManager = None, page_size: int = 500):
+        self.alpaca = alpaca or AlpacaInterface()
+        self.db = db or DatabaseManager()
+        self.db.create_tables()
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _fetch_pages(self, after: Optional[datetime], on_page=None) -> int:
+        """Pages through all orders submitted after `after`, oldest first. Returns rows changed."""
+        from alpaca.trading.requests import GetOrdersRequest
+        from alpaca.trading.enums import QueryOrderStatus
+        changed = 0
+        while True:
+            req = GetOrdersRequest(status=QueryOrderStatus.ALL, after=after, direction='asc', limit=self.page_size)
+            page = self.alpaca.trading_client.get_orders(filter=req)
+            changed += self.db.upsert_orders([order_row(o) for o in page])
+            if page:
+                # `after` is exclusive: step back one tick so orders sharing the last timestamp
+                # (cut off by `limit`) come with the next page; re-fetched rows upsert unchanged
+                cursor = page[-1].submitted_at - timedelta(microseconds=1)
+                if after is not None and cursor <= after:
+                    # A full page within one tick would repeat forever: move past it
+                    logger.warning(f"More than {self.page_size} orders submitted at {page[-1].submitted_at}; "
+                                   f"orders tied with the last one may be skipped.")
+                    cursor = page[-1].submitted_at
+                after = cursor
+                if on_page:
+                    on_page(after)
+            if len(page) < self.page_size:
+                return changed
+
+    def sync(self) -> int:
+        """Backfills once, then fetches incrementally. Returns the number of new/changed orders."""
+        with self._lock:
+            state = self.db.get_order_sync_state()
+            started = datetime.now(timezone.utc)
+
+            if not state['backfill_complete']:
+                after = datetime.fromisoformat(state['backfill_after']) if state['backfill_after'] else None
+                logger.info(f"Backfilling order history{f' from {after}' if after else ''}...")
+
+                def checkpoint(page_after: datetime):
+                    state['backfill_after'] = to_iso(page_after)
+                    self.db.save_order_sync_state(state)
+
+                changed = self._fetch_pages(after, on_page=checkpoint)
+                state['backfill_complete'] = 1
+            else:
+                after = datetime.fromisoformat(state['last_synced_at']) - SYNC_OVERLAP
+                oldest_open = self.db.oldest_open_order_submitted_at()
+                if oldest_open:
+                    after = min(after, datetime.fromisoformat(oldest_open) - timedelta(microseconds=1))
+                changed = self._fetch_pages(after)
+
+            state['last_synced_at'] = to_iso(started)
+            self.db.save_order_sync_state(state)
+        if changed:
+            logger.info(f"Order sync: {changed} new/updated orders.")
+        return changed
+
+    def start(self, interval: float = 60.0):
+        """Runs sync() every `interval` seconds on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error(f"Order sync failed: {e}")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name="order-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    OrderSync().sync()
@@ -0,0 +1,271 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from src.data.alpaca_interface import AlpacaInterface
+
+logger = logging.getLogger(__name__)
+
+# Trade-update events after which an order can no longer fill
+CLOSED_EVENTS = {'fill', 'canceled', 'expired', 'rejected', 'replaced', 'done_for_day'}
+OPEN_EVENTS = {'new', 'accepted', 'pending_new', 'partial_fill', 'pending_cancel', 'pending_replace', 'restated'}
+
+def _value(x) -> Any:
+    return getattr(x, 'value', x)
+
+def _float(x) -> float:
+    return float(x) if x is not None else 0.0
+
+def _remember(recent: deque, members: set, value: str):
+    """Bounded membership set: the oldest entry is forgotten once `recent` is full."""
+    if len(recent) == recent.maxlen:
+        members.discard(recent[0])
+    recent.append(value)
+    members.add(value)
+
+class BookPosition:
+    """Same attribute names as Alpaca's Position (qty, avg_entry_price), as floats."""
+    __slots__ = ('symbol', 'qty', 'avg_entry_price')
+
+    def __init__(self, symbol: str, qty: float, avg_entry_price: float):
+        self.symbol = symbol
+        self.qty = qty
+        self.avg_entry_price = avg_entry_price
+
+    def __repr__(self):
+        return f"BookPosition({self.symbol}, qty={self.qty}, avg_entry_price={self.avg_entry_price})"
+
+class PositionBook:
+    """
+    In-memory positions and open orders, kept current by Alpaca's trade_updates websocket
+    (fills, partial fills, cancels) and periodically reconciled against REST.
+
+    Lookups are O(1) dict reads. Each fill carries the broker's resulting position_qty,
+    which overrides the locally computed quantity (and counts as drift when they differ).
+    reconcile() replaces the book with the broker's positions / open orders and reports
+    every symbol that had drifted; symbols and orders with stream events after its REST
+    snapshot was requested keep their (newer) book state. Until the first reconcile
+    `synced` is False and callers should fall back to REST.
+    """
+    def __init__(self, alpaca: AlpacaInterface = None):
+        self.alpaca = alpaca or AlpacaInterface()
+        self.positions: Dict[str, BookPosition] = {}
+        # order_id -> {'symbol', 'side', 'qty', 'filled_qty'}
+        self.open_orders: Dict[str, Dict[str, Any]] = {}
+        self.synced = False
+        self.last_reconciled: Optional[datetime] = None
+        self.drift_count = 0
+        self._seen_executions: deque = deque(maxlen=10000)
+        self._seen_set = set()
+        # Orders already closed on the stream (a late track_order() must not reopen them)
+        self._closed_orders: deque = deque(maxlen=10000)
+        self._closed_set = set()
+        # Event sequence: symbols/orders touched since the last reconcile -> seq of their latest event
+        self._seq = 0
+        self._symbol_seq: Dict[str, int] = {}
+        self._order_seq: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._stream = None
+        self._threads = []
+        # callback(event, order_id, qty, price) after each applied fill and order close (e.g. OrderManager)
+        self.listeners = []
+
+    # ------------------------------------------------------------------ lookups
+
+    def get_position(self, symbol: str) -> Optional[BookPosition]:
+        return self.positions.get(symbol)
+
+    def get_positions(self) -> Dict[str, BookPosition]:
+        with self._lock:
+            return dict(self.positions)
+
+    def pending_qty(self, symbol: str, side: str) -> float:
+        """Unfilled quantity of open orders for symbol/side ('buy' or 'sell')."""
+        with self._lock:
+            return sum(o['qty'] - o['filled_qty'] for o in self.open_orders.values()
+                       if o['symbol'] == symbol and o['side'] == side)
+
+    # ------------------------------------------------------------------ updates
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def track_order(self, order):
+        """Registers a just-submitted order (REST response) before its stream events arrive."""
+        if order is None or not hasattr(order, 'id'):
+            return
+        with self._lock:
+            if str(order.id) in self._closed_set:
+                return
+            self._seq += 1
+            self._order_seq[str(order.id)] = self._seq
+            self.open_orders.setdefault(str(order.id), {
+                'symbol': order.symbol, 'side': _value(order.side),
+                'qty': _float(order.qty), 'filled_qty': _float(getattr(order, 'filled_qty', None)),
+            })
+
+    def on_trade_update(self, update):
+        """Applies one trade_updates event (alpaca TradeUpdate or an object with the same fields)."""
+        event = _value(update.event)
+        order = update.order
+        order_id = str(order.id)
+        notify = False
+        with self._lock:
+            self._seq += 1
+            self._order_seq[order_id] = self._seq
+            if event in ('fill', 'partial_fill'):
+                execution_id = str(update.execution_id) if getattr(update, 'execution_id', None) else None
+                if execution_id:
+                    if execution_id in self._seen_set:
+                        return
+                    _remember(self._seen_executions, self._seen_set, execution_id)
+                self._symbol_seq[order.symbol] = self._seq
+                self._apply_fill(order.symbol, _value(order.side), _float(update.qty), _float(update.price),
+                                 update.position_qty)
+
+            if event in CLOSED_EVENTS:
+                self.open_orders.pop(order_id, None)
+                if order_id not in self._closed_set:
+                    _remember(self._closed_orders, self._closed_set, order_id)
+                notify = True
+            elif event in OPEN_EVENTS:
+                self.open_orders[order_id] = {
+                    'symbol': order.symbol, 'side': _value(order.side),
+                    'qty': _float(order.qty), 'filled_qty': _float(order.filled_qty),
+                }
+            notify = notify or event == 'partial_fill'
+
+        if notify:
+            for callback in self.listeners:
+                callback(event, order_id, _float(update.qty), _float(update.price))
+
+    def _apply_fill(self, symbol: str, side: str, qty: float, price: float, position_qty):
+        pos = self.positions.get(symbol)
+        old_qty = pos.qty if pos else 0.0
+        old_avg = pos.avg_entry_price if pos else 0.0
+
+        if side == 'buy':
+            new_qty = old_qty + qty
+            new_avg = (old_qty * old_avg + qty * price) / new_qty if new_qty > 0 else 0.0
+        else:
+            new_qty = old_qty - qty
+            new_avg = old_avg
+
+        if position_qty is not None:
+            broker_qty = float(position_qty)
+            if abs(broker_qty - new_qty) > 1e-9:
+                self.drift_count += 1
+                logger.warning(f"Position drift on {symbol} fill: book {new_qty} vs broker {broker_qty}")
+                new_qty = broker_qty
+                if side == 'buy' and old_qty <= 0:
+                    new_avg = price
+
+        if abs(new_qty) < 1e-9:
+            self.positions.pop(symbol, None)
+        else:
+            self.positions[symbol] = BookPosition(symbol, new_qty, new_avg)
+
+    # ------------------------------------------------------------------ reconciliation
+
+    def reconcile(self) -> Dict[str, tuple]:
+        """
+        Replaces the book with the broker's positions and open orders.
+        Returns {symbol: (book_qty, broker_qty)} for every position that disagreed (empty on the first sync).
+
+        The REST calls run outside the lock, so stream events can land between the snapshot
+        and the swap: positions of symbols filled and orders updated after `snapshot` keep
+        the book's state (the REST view of them may predate those events).
+        """
+        from alpaca.trading.requests import GetOrdersRequest
+        from alpaca.trading.enums import QueryOrderStatus
+        with self._lock:
+            snapshot = self._seq
+        broker_positions = self.alpaca.get_positions()
+        broker_orders = self.alpaca.trading_client.get_orders(
+            filter=GetOrdersRequest(status=QueryOrderStatus.OPEN, limit=500))
+
+        with self._lock:
+            newer_symbols = {s for s, seq in self._symbol_seq.items() if seq > snapshot}
+            newer_orders = {o for o, seq in self._order_seq.items() if seq > snapshot}
+            drift = {}
+            # Before the first sync the book is empty by construction, not drifted
+            for symbol in ((set(self.positions) | set(broker_positions)) - newer_symbols) if self.synced else ():
+                book_qty = self.positions[symbol].qty if symbol in self.positions else 0.0
+                broker_qty = float(broker_positions[symbol].qty) if symbol in broker_positions else 0.0
+                if abs(book_qty - broker_qty) > 1e-9:
+                    drift[symbol] = (book_qty, broker_qty)
+
+            positions = {
+                symbol: BookPosition(symbol, float(p.qty), float(p.avg_entry_price))
+                for symbol, p in broker_positions.items() if symbol not in newer_symbols
+            }
+            positions.update({s: self.positions[s] for s in newer_symbols if s in self.positions})
+            open_orders = {
+                str(o.id): {'symbol': o.symbol, 'side': _value(o.side), 'qty': _float(o.qty), 'filled_qty': _float(o.filled_qty)}
+                for o in broker_orders if str(o.id) not in newer_orders and str(o.id) not in self._closed_set
+            }
+            open_orders.update({o: self.open_orders[o] for o in newer_orders if o in self.open_orders})
+            self.positions = positions
+            self.open_orders = open_orders
+            # Everything is now as of this swap; the next reconcile takes a new snapshot
+            self._symbol_seq.clear()
+            self._order_seq.clear()
+            if drift:
+                self.drift_count += len(drift)
+                logger.warning(f"Position book drift corrected: {drift}")
+            self.synced = True
+            self.last_reconciled = datetime.now(timezone.utc)
+        return drift
+
+    # ------------------------------------------------------------------ background
+
+    def start(self, reconcile_interval: float = 60.0):
+        """Runs the trade_updates stream and periodic reconcile() on daemon threads."""
+        if self._threads and any(t.is_alive() for t in self._threads):
+            return
+        from alpaca.trading.stream import TradingStream
+        self._stop.clear()
+        try:
+            self.reconcile()
+        except Exception as e:
+            logger.error(f"Initial position reconcile failed: {e}")
+
+        self._stream = TradingStream(self.alpaca.api_key, self.alpaca.secret_key, paper=True)
+
+        async def handler(update):
+            try:
+                self.on_trade_update(update)
+            except Exception as e:
+                logger.error(f"Error applying trade update: {e}")
+
+        self._stream.subscribe_trade_updates(handler)
+
+        def run_stream():
+            try:
+                self._stream.run()
+            except Exception as e:
+                logger.error(f"Trade updates stream stopped: {e}")
+
+        def reconcile_loop():
+            while not self._stop.wait(reconcile_interval):
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    logger.error(f"Position reconcile failed: {e}")
+
+        self._threads = [
+            threading.Thread(target=run_stream, name="trade-updates", daemon=True),
+            threading.Thread(target=reconcile_loop, name="position-reconcile", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._stream:
+            try:
+                self._stream.stop()
+            except Exception as e:
+                logger.error(f"Error stopping trade updates stream: {e}")
@@ -0,0 +1,204 @@
+import logging
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.data.alpaca_interface import AlpacaInterface
+from src.data.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Symbols per batched bars / snapshot request
+BATCH_SIZE = 200
+# Primary listing exchanges kept by the screener (OTC and crypto are excluded)
+EXCHANGES = {'NYSE', 'NASDAQ', 'ARCA', 'AMEX', 'BATS'}
+RANK_FIELDS = ('volatility', 'range_pct', 'dollar_volume', 'momentum')
+# Bars come from the IEX feed, whose volume is a few percent of the consolidated tape:
+# 1M$/day on IEX is roughly 30M$+ consolidated
+MIN_DOLLAR_VOLUME = 1e6
+
+def compute_metrics(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+                    window: int = 20, trend_window: int = 50) -> Dict[str, np.ndarray]:
+    """
+    Per-symbol screening metrics from (n_symbols, n_days) daily arrays (NaN = no bar),
+    oldest day first. All metrics use the last `window` days:
+      volatility    annualized stdev of daily log returns
+      range_pct     mean (high - low) / previous close (what a breakout K is applied to)
+      dollar_volume mean close * volume
+      momentum      close / close `window` days ago - 1
+      trend         close / SMA(trend_window) - 1
+      valid_days    days with a close in the trend window
+    """
+    last = close[:, -1]
+    trend_closes = close[:, -trend_window:]
+    # All-NaN rows (no bars) just yield NaN metrics
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        log_returns = np.diff(np.log(close), axis=1)[:, -window:]
+        day_range = (high[:, -window:] - low[:, -window:]) / close[:, -window - 1:-1]
+        return {
+            'volatility': np.nanstd(log_returns, axis=1, ddof=1) * np.sqrt(252),
+            'range_pct': np.nanmean(day_range, axis=1),
+            'dollar_volume': np.nanmean(close[:, -window:] * volume[:, -window:], axis=1),
+            'momentum': last / close[:, -window - 1] - 1,
+            'trend': last / np.nanmean(trend_closes, axis=1) - 1,
+            'valid_days': np.isfinite(trend_closes).sum(axis=1),
+        }
+
+def to_matrices(bars: pd.DataFrame, symbols: List[str]) -> Tuple[Dict[str, np.ndarray], pd.DatetimeIndex]:
+    """(symbol, timestamp) MultiIndex daily bars -> {'open'/'high'/'low'/'close'/'volume': (n_symbols, n_days)}."""
+    flat = bars.reset_index()
+    days = pd.DatetimeIndex(sorted(flat['timestamp'].unique()))
+    row = pd.Index(symbols).get_indexer(flat['symbol'])
+    col = days.get_indexer(flat['timestamp'])
+    keep = row >= 0
+    matrices = {}
+    for field in ('open', 'high', 'low', 'close', 'volume'):
+        m = np.full((len(symbols), len(days)), np.nan)
+        m[row[keep], col[keep]] = flat[field].to_numpy(dtype=float)[keep]
+        matrices[field] = m
+    return matrices, days
+
+class UniverseScreener:
+    """
+    Pre-market screener over the whole tradable US equity universe.
+
+    Daily bars and snapshots are fetched in batched multi-symbol requests (a few threads
+    in parallel), packed into (symbols x days) arrays, and every metric is computed for
+    all symbols at once in NumPy. Liquidity, price and trend filters are applied and the
+    top-N by `rank_by` are written to universe_candidates for the executor.
+    """
+    def __init__(self, alpaca: Optional[AlpacaInterface] = None, db: Optional[DatabaseManager] = None,
+                 lookback_days: int = 90, window: int = 20, trend_window: int = 50, max_workers: int = 4):
+        self.alpaca = alpaca or AlpacaInterface()
+        self.db = db or DatabaseManager()
+        self.lookback_days = lookback_days
+        self.window = window
+        self.trend_window = trend_window
+        self.max_workers = max_workers
+
+    # ------------------------------------------------------------------ data
+
+    def tradable_symbols(self) -> List[str]:
+        """Active, tradable US equities on the main exchanges (plain tickers only)."""
+        from alpaca.trading.requests import GetAssetsRequest
+        from alpaca.trading.enums import AssetClass, AssetStatus
+        assets = self.alpaca.trading_client.get_all_assets(
+            GetAssetsRequest(status=AssetStatus.ACTIVE, asset_class=AssetClass.US_EQUITY))
+        return sorted(a.symbol for a in assets
+                      if a.tradable and getattr(a.exchange, 'value', a.exchange) in EXCHANGES and a.symbol.isalpha())
+
+    def fetch_daily_bars(self, symbols: List[str]) -> pd.DataFrame:
+        """Daily bars for all symbols, BATCH_SIZE symbols per request."""
+        from alpaca.data.requests import StockBarsRequest
+        from alpaca.data.timeframe import TimeFrame
+        end = datetime.now()
+        start = end - timedelta(days=self.lookback_days)
+
+        def fetch(batch: List[str]) -> Optional[pd.DataFrame]:
+            try:
+                bars = self.alpaca.data_client.get_stock_bars(StockBarsRequest(
+                    symbol_or_symbols=batch, timeframe=TimeFrame.Day, start=start, end=end, feed='iex'))
+                return bars.df
+            except Exception as e:
+                logger.error(f"Error fetching daily bars for {len(batch)} symbols ({batch[0]}...): {e}")
+                return None
+
+        frames = self._batched(fetch, symbols)
+        frames = [f for f in frames if f is not None and not f.empty]
+        return pd.concat(frames) if frames else pd.DataFrame()
+
+    def fetch_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Latest trade price per symbol from batched snapshots (pre-market: last extended-hours trade)."""
+        from alpaca.data.requests import StockSnapshotRequest
+
+        def fetch(batch: List[str]) -> Dict[str, float]:
+            try:
+                snapshots = self.alpaca.data_client.get_stock_snapshot(
+                    StockSnapshotRequest(symbol_or_symbols=batch, feed='iex'))
+            except Exception as e:
+                logger.error(f"Error fetching snapshots for {len(batch)} symbols ({batch[0]}...): {e}")
+                return {}
+            return {s: snap.latest_trade.price for s, snap in snapshots.items()
+                    if snap is not None and snap.latest_trade is not None}
+
+        prices: Dict[str, float] = {}
+        for batch_prices in self._batched(fetch, symbols):
+            prices.update(batch_prices)
+        return prices
+
+    def _batched(self, fetch, symbols: List[str]) -> list:
+        batches = [symbols[i:i + BATCH_SIZE] for i in range(0, len(symbols), BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="screener") as pool:
+            return list(pool.map(fetch, batches))
+
+    # ------------------------------------------------------------------ screening
+
+    def rank(self, bars: pd.DataFrame, prices: Optional[Dict[str, float]] = None, top_n: int = 12,
+             rank_by: str = 'volatility', min_price: float = 5.0, max_price: Optional[float] = None,
+             min_dollar_volume: float = MIN_DOLLAR_VOLUME, uptrend_only: bool = True) -> pd.DataFrame:
+        """Metrics, filters and ranking over daily bars ((symbol, timestamp) MultiIndex)."""
+        if rank_by not in RANK_FIELDS:
+            raise ValueError(f"Unknown rank_by '{rank_by}', expected one of {RANK_FIELDS}")
+        if bars.empty:
+            return pd.DataFrame(columns=['symbol', 'price', *RANK_FIELDS, 'trend', 'score'])
+        symbols = sorted(bars.index.get_level_values('symbol').unique())
+        matrices, _ = to_matrices(bars, symbols)
+        metrics = compute_metrics(matrices['close'], matrices['high'], matrices['low'], matrices['volume'],
+                                  self.window, self.trend_window)
+
+        df = pd.DataFrame(metrics, index=pd.Index(symbols, name='symbol'))
+        last_close = pd.Series(matrices['close'][:, -1], index=df.index)
+        df['price'] = pd.Series(prices or {}, dtype=float).reindex(df.index).fillna(last_close)
+
+        mask = (df['valid_days'] >= self.trend_window * 0.9) & (df['price'] >= min_price) \
+            & (df['dollar_volume'] >= min_dollar_volume) & df[rank_by].notna()
+        if max_price is not None:
+            mask &= df['price'] <= max_price
+        if uptrend_only:
+            mask &= df['trend'] > 0
+        df = df[mask].copy()
+        df['score'] = df[rank_by]
+        df = df.sort_values('score', ascending=False).head(top_n)
+        return df.reset_index()[['symbol', 'price', *RANK_FIELDS, 'trend', 'score']]
+
+    def run(self, top_n: int = 12, symbols: Optional[List[str]] = None, run_date: Optional[str] = None,
+            **filters) -> pd.DataFrame:
+        """Screens the universe (or `symbols`) and stores the top-N for `run_date` (default: today, US/Eastern)."""
+        t_start = time.perf_counter()
+        symbols = symbols or self.tradable_symbols()
+        t_assets = time.perf_counter()
+        bars = self.fetch_daily_bars(symbols)
+        prices = self.fetch_prices(symbols)
+        t_fetch = time.perf_counter()
+        candidates = self.rank(bars, prices, top_n=top_n, **filters)
+        t_rank = time.perf_counter()
+
+        run_date = run_date or pd.Timestamp.now(tz='US/Eastern').strftime('%Y-%m-%d')
+        self.db.save_universe_candidates(run_date, candidates.to_dict('records'))
+        logger.info(f"🔎 Screened {len(symbols)} symbols in {t_rank - t_start:.1f}s (assets {t_assets - t_start:.1f}s, "
+                    f"data {t_fetch - t_assets:.1f}s, metrics {t_rank - t_fetch:.2f}s): "
+                    f"{', '.join(candidates['symbol'])}")
+        return candidates
+
+def load_universe(db: DatabaseManager, run_date: str) -> List[str]:
+    """Symbols screened for `run_date`, best first (empty if the screener has not run)."""
+    return [c['symbol'] for c in db.load_universe_candidates(run_date)]
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Pre-market universe screener")
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--rank-by", default="volatility", choices=RANK_FIELDS)
+    parser.add_argument("--min-price", type=float, default=5.0)
+    parser.add_argument("--min-dollar-volume", type=float, default=MIN_DOLLAR_VOLUME)
+    args = parser.parse_args()
+    db = DatabaseManager()
+    db.create_tables()
+    result = UniverseScreener(db=db).run(top_n=args.top, rank_by=args.rank_by, min_price=args.min_price,
+                                         min_dollar_volume=args.min_dollar_volume)
+    print(result.to_string(index=False))
@@ -1,30 +1,136 @@
+import hashlib
+import json
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, List
+
+import numpy as np
+
+# Action codes returned by generate_signals()
+HOLD = 0
+BUY = 1
+SELL = -1
+ACTION_NAMES = {BUY: 'BUY', SELL: 'SELL'}
 
 class BaseStrategy(ABC):
+    # Bump when the signal/initialization logic changes so persisted state is invalidated.
+    VERSION = 1
+    # Tunable inputs that influence the derived daily state (part of the input fingerprint).
+    PARAM_FIELDS: Tuple[str, ...] = ()
+    # Derived daily state persisted to strategy_params and restored on restart.
+    STATE_FIELDS: Tuple[str, ...] = ()
+    # Extra compute_signals() arguments after (prices, positions, avg_entry_prices), in order.
+    # Names found in STATE_FIELDS are read from the strategy, others are real-time inputs.
+    SIGNAL_INPUTS: Tuple[str, ...] = ()
+    # Search space for parameter optimization (see src/backtest/optimizer.py).
+    PARAM_GRID: Dict[str, List[Any]] = {}
+
     def __init__(self, symbol: str, name: str):
         self.symbol = symbol
         self.name = name
 
     @abstractmethod
-    def generate_signal(self, market_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def generate_signal(self, current_price: float, current_position: int = 0, avg_entry_price: float = 0.0, **kwargs) -> Optional[Dict[str, Any]]:
         """
-        Analyzes market data and returns a trading signal.
-        
+        Analyzes the current price against the strategy state and returns a trading signal.
+
         Args:
-            market_data: A dictionary containing 'current_price', 'ohlcv', etc.
-            
+            current_price: Latest trade price.
+            current_position: Shares currently held.
+            avg_entry_price: Average entry price of the position (0 if flat).
+            kwargs: Strategy specific real-time inputs (e.g. current_rsi).
+
         Returns:
-            A dictionary with 'action' ('BUY'/'SELL'), 'quantity', 'reason' or None.
+            A dictionary with 'action' ('BUY'/'SELL'), 'price', 'reason' or None.
         """
         pass
 
+    def generate_signals(self, prices, positions=0, avg_entry_prices=0.0, **indicators) -> np.ndarray:
+        """
+        Batch version of generate_signal over NumPy arrays (broadcast against each other).
+        Keyword arrays are strategy specific per-bar inputs (NaN = not set), see subclasses.
+
+        Returns:
+            int8 array of actions: BUY (1), SELL (-1) or HOLD (0).
+
+        The default implementation loops over generate_signal; subclasses override it
+        with a vectorized equivalent that matches the scalar method bar for bar.
+        """
+        prices, positions, avg_entry_prices = np.broadcast_arrays(
+            np.asarray(prices, dtype=np.float64), np.asarray(positions, dtype=np.float64), np.asarray(avg_entry_prices, dtype=np.float64)
+        )
+        actions = np.zeros(prices.shape, dtype=np.int8)
+        for i in np.ndindex(prices.shape):
+            kwargs = {k: _to_scalar(np.broadcast_to(v, prices.shape)[i]) for k, v in indicators.items()}
+            signal = self.generate_signal(prices[i], positions[i], avg_entry_prices[i], **kwargs)
+            if signal:
+                actions[i] = BUY if signal['action'] == 'BUY' else SELL
+        return actions
+
     @abstractmethod
-    def on_market_open(self):
-        """Called when the market opens."""
+    def on_market_open(self, daily_ohlcv):
+        """Called before the market opens with the daily OHLCV history."""
         pass
 
     @abstractmethod
     def on_market_close(self):
         """Called when the market closes."""
         pass
+
+    def get_params(self) -> Dict[str, Any]:
+        """Returns the tunable parameters of this strategy."""
+        return {f: _to_builtin(getattr(self, f, None)) for f in self.PARAM_FIELDS}
+
+    def set_params(self, params: Dict[str, Any]):
+        """Applies optimized parameters. Only keys from PARAM_GRID are accepted."""
+        for key, value in params.items():
+            if key in self.PARAM_GRID:
+                setattr(self, key, value)
+
+    @classmethod
+    def daily_returns(cls, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                      cost: float = 0.0, **params) -> np.ndarray:
+        """
+        Vectorized daily simulation used for parameter search.
+        Returns one strategy return per day (0 on days without a trade), net of `cost` per round trip.
+        """
+        raise NotImplementedError(f"{cls.__name__} does not support daily simulation")
+
+    def get_state(self) -> Dict[str, Any]:
+        """Returns a JSON-serializable snapshot of the derived daily state."""
+        return {f: _to_builtin(getattr(self, f, None)) for f in self.STATE_FIELDS}
+
+    def set_state(self, state: Dict[str, Any]):
+        """Restores state produced by get_state(). Unknown keys are ignored."""
+        for f in self.STATE_FIELDS:
+            if f in state:
+                setattr(self, f, state[f])
+
+    def input_fingerprint(self, daily_ohlcv, extra: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Hash of everything the daily state is derived from:
+        strategy class/version, tunable params, `extra` inputs (e.g. externally tuned params)
+        and the daily OHLC history.
+        """
+        h = hashlib.sha1()
+        header = {"class": type(self).__name__, "version": self.VERSION, "params": self.get_params(), "extra": extra}
+        h.update(json.dumps(header, sort_keys=True).encode())
+        if daily_ohlcv is not None and not daily_ohlcv.empty:
+            h.update(np.asarray(daily_ohlcv.index.astype('int64')).tobytes())
+            h.update(np.ascontiguousarray(daily_ohlcv[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)).tobytes())
+        return h.hexdigest()
+
+def indicator_array(value) -> np.ndarray:
+    """Strategy state / indicator -> float array, with None mapped to NaN."""
+    if value is None:
+        return np.array(np.nan)
+    return np.asarray(value, dtype=np.float64)
+
+def _to_scalar(value):
+    value = _to_builtin(value)
+    return None if isinstance(value, float) and np.isnan(value) else value
+
+def _to_builtin(value):
+    """Converts numpy scalars to plain Python values (JSON-safe)."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
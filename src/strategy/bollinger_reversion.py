@@ -2,11 +2,17 @@ import logging
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, Optional
-from src.strategy.base import BaseStrategy
+from src.strategy.base import BaseStrategy, BUY, SELL, HOLD, indicator_array
+from src.strategy.indicators import rolling_mean, rolling_std, shift
 
 logger = logging.getLogger(__name__)
 
 class BollingerReversionStrategy(BaseStrategy):
+    PARAM_FIELDS = ('period', 'std_dev')
+    STATE_FIELDS = ('period', 'std_dev', 'sma', 'upper_band', 'lower_band')
+    SIGNAL_INPUTS = ('sma', 'upper_band', 'lower_band')
+    PARAM_GRID = {'period': [10, 15, 20, 25, 30], 'std_dev': [1.5, 2.0, 2.5, 3.0]}
+
     def __init__(self, symbol: str, period: int = 20, std_dev: float = 2.0):
         super().__init__(symbol, "BollingerReversion")
         self.period = period
@@ -33,7 +39,7 @@ class BollingerReversionStrategy(BaseStrategy):
         
         logger.info(f"[{self.symbol}] {self.name} Initialized. SMA={self.sma:.2f}, Upper={self.upper_band:.2f}, Lower={self.lower_band:.2f}")
 
-    def generate_signal(self, current_price: float, current_position: int = 0, avg_entry_price: float = 0.0) -> Optional[Dict[str, Any]]:
+    def generate_signal(self, current_price: float, current_position: int = 0, avg_entry_price: float = 0.0, **kwargs) -> Optional[Dict[str, Any]]:
         """
         Buy: Price touches/breaks Lower Band
         Sell: Price touches/breaks Upper Band or SMA (Mean Reversion)
@@ -75,6 +81,54 @@ class BollingerReversionStrategy(BaseStrategy):
 
         return None
 
+    def generate_signals(self, prices, positions=0, avg_entry_prices=0.0, sma=None, upper_band=None, lower_band=None) -> np.ndarray:
+        """Vectorized generate_signal. Band arguments default to the current state."""
+        return self.compute_signals(
+            prices, positions, avg_entry_prices,
+            indicator_array(self.sma if sma is None else sma),
+            indicator_array(self.upper_band if upper_band is None else upper_band),
+            indicator_array(self.lower_band if lower_band is None else lower_band)
+        )
+
+    @staticmethod
+    def compute_signals(prices, positions, avg_entry_prices, sma, upper_band, lower_band) -> np.ndarray:
+        """Array form of the band reversion rules (NaN bands = not initialized)."""
+        prices = np.asarray(prices, dtype=np.float64)
+        positions = np.asarray(positions, dtype=np.float64)
+        avg_entry_prices = np.asarray(avg_entry_prices, dtype=np.float64)
+        sma = np.asarray(sma, dtype=np.float64)
+        ready = ~np.isnan(np.asarray(upper_band, dtype=np.float64)) & ~np.isnan(np.asarray(lower_band, dtype=np.float64))
+
+        # BUY (Oversold)
+        buy = ready & (positions == 0) & (prices <= lower_band)
+
+        # SELL (Mean Reverted or Stop Loss -5%)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            loss_pct = (prices - avg_entry_prices) / avg_entry_prices
+        stop = (avg_entry_prices > 0) & (loss_pct <= -0.05)
+        sell = ready & (positions > 0) & ((prices >= sma) | stop)
+
+        return np.where(sell, SELL, np.where(buy, BUY, HOLD)).astype(np.int8)
+
+    @classmethod
+    def daily_returns(cls, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                      cost: float = 0.0, period: int = 20, std_dev: float = 2.0) -> np.ndarray:
+        """
+        Daily approximation: bands from closes up to yesterday.
+        Buy at the lower band (or the open if it gaps below), exit at the -5% stop,
+        else at the SMA if reached, else at the close (intraday, flat at EOD).
+        """
+        sma = shift(rolling_mean(close, period))
+        lower = sma - shift(rolling_std(close, period)) * std_dev
+
+        entry = np.minimum(open_, lower)
+        is_entry = low <= lower
+        stop = entry * 0.95
+        exit_price = np.where(low <= stop, stop, np.where(high >= sma, np.maximum(sma, entry), close))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.where(is_entry, (exit_price - entry) / entry - cost, 0.0)
+        return returns
+
     def on_market_close(self):
         self.upper_band = None
         self.lower_band = None
@@ -0,0 +1,50 @@
+import numpy as np
+
+# Vectorized (NumPy) equivalents of the pandas indicators used by the strategies.
+# All functions work along the last axis (so a 2-D input is one series per row), return an
+# array aligned with the input, NaN until the window is full, and match pandas'
+# rolling(...).mean()/std() and RSIMomentumStrategy.calculate_rsi.
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if window <= 0 or values.shape[-1] < window:
+        return out
+    zeros = np.zeros(values.shape[:-1] + (1,))
+    csum = np.cumsum(np.concatenate([zeros, values], axis=-1), axis=-1)
+    out[..., window - 1:] = (csum[..., window:] - csum[..., :-window]) / window
+    return out
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Sample standard deviation (ddof=1), like pandas."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if window <= 1 or values.shape[-1] < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+    out[..., window - 1:] = windows.std(axis=-1, ddof=1)
+    return out
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Simple-moving-average RSI, identical to RSIMomentumStrategy.calculate_rsi per bar."""
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.diff(close, axis=-1, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = rolling_mean(gain, period)
+    avg_loss = rolling_mean(loss, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """pandas-style shift along the last axis (fills with NaN)."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if periods == 0:
+        return values.copy()
+    if periods > 0:
+        out[..., periods:] = values[..., :-periods]
+    else:
+        out[..., :periods] = values[..., -periods:]
+    return out
@@ -2,11 +2,17 @@ import logging
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, Optional
-from src.strategy.base import BaseStrategy
+from src.strategy.base import BaseStrategy, BUY, SELL, HOLD, indicator_array
+from src.strategy.indicators import rolling_mean, rsi, shift
 
 logger = logging.getLogger(__name__)
 
 class RSIMomentumStrategy(BaseStrategy):
+    PARAM_FIELDS = ('rsi_period', 'sma_period')
+    STATE_FIELDS = ('rsi_period', 'sma_period', 'daily_sma', 'rsi', 'prev_rsi')
+    SIGNAL_INPUTS = ('current_rsi', 'daily_sma')
+    PARAM_GRID = {'rsi_period': [7, 10, 14, 21], 'sma_period': [10, 20, 50]}
+
     def __init__(self, symbol: str, rsi_period: int = 14, sma_period: int = 20):
         super().__init__(symbol, "RSIMomentum")
         self.rsi_period = rsi_period
@@ -37,7 +43,7 @@ class RSIMomentumStrategy(BaseStrategy):
         
         logger.info(f"[{self.symbol}] {self.name} Initialized. SMA={self.daily_sma:.2f}, PrevRSI={self.prev_rsi:.2f}")
 
-    def generate_signal(self, current_price: float, current_position: int = 0, avg_entry_price: float = 0.0, current_rsi: float = None) -> Optional[Dict[str, Any]]:
+    def generate_signal(self, current_price: float, current_position: int = 0, avg_entry_price: float = 0.0, current_rsi: float = None, **kwargs) -> Optional[Dict[str, Any]]:
         """
         Buy: Price > SMA20 (Uptrend) AND RSI < 50 (Dip)
         Sell: RSI > 70 (Overbought) OR 5% Profit
@@ -90,5 +96,51 @@ class RSIMomentumStrategy(BaseStrategy):
 
         return None
 
+    def generate_signals(self, prices, positions=0, avg_entry_prices=0.0, current_rsi=None, daily_sma=None) -> np.ndarray:
+        """Vectorized generate_signal. current_rsi is required per bar (NaN = unknown)."""
+        return self.compute_signals(
+            prices, positions, avg_entry_prices,
+            indicator_array(current_rsi),
+            indicator_array(self.daily_sma if daily_sma is None else daily_sma)
+        )
+
+    @staticmethod
+    def compute_signals(prices, positions, avg_entry_prices, current_rsi, daily_sma) -> np.ndarray:
+        """Array form of the RSI dip / take profit / overbought rules (NaN = not available)."""
+        prices = np.asarray(prices, dtype=np.float64)
+        positions = np.asarray(positions, dtype=np.float64)
+        avg_entry_prices = np.asarray(avg_entry_prices, dtype=np.float64)
+        current_rsi = np.asarray(current_rsi, dtype=np.float64)
+        daily_sma = np.asarray(daily_sma, dtype=np.float64)
+        ready = ~np.isnan(current_rsi) & ~np.isnan(daily_sma)
+
+        # BUY (Dip in Uptrend)
+        buy = ready & (positions == 0) & (prices > daily_sma) & (current_rsi >= 40) & (current_rsi <= 50)
+
+        # SELL (Target 5% or RSI Overbought)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profit_pct = (prices - avg_entry_prices) / avg_entry_prices
+        target_hit = (avg_entry_prices > 0) & (profit_pct >= 0.05)
+        sell = ready & (positions > 0) & (target_hit | (current_rsi >= 70))
+
+        return np.where(sell, SELL, np.where(buy, BUY, HOLD)).astype(np.int8)
+
+    @classmethod
+    def daily_returns(cls, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                      cost: float = 0.0, rsi_period: int = 14, sma_period: int = 20) -> np.ndarray:
+        """
+        Daily approximation: buy at the open when it is above yesterday's SMA and
+        yesterday's RSI is in the 40-50 dip zone. Exit at +5% if reached, else at the close.
+        """
+        sma = shift(rolling_mean(close, sma_period))
+        prev_rsi = shift(rsi(close, rsi_period))
+
+        is_entry = (open_ > sma) & (prev_rsi >= 40) & (prev_rsi <= 50)
+        target = open_ * 1.05
+        exit_price = np.where(high >= target, target, close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.where(is_entry, (exit_price - open_) / open_ - cost, 0.0)
+        return returns
+
     def on_market_close(self):
         self.daily_sma = None
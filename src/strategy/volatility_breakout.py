@@ -3,17 +3,24 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
-from src.strategy.base import BaseStrategy
+from src.strategy.base import BaseStrategy, BUY, SELL, HOLD, indicator_array
+from src.strategy.indicators import shift
+from src.data.cache import ResultCache, fingerprint
 
 logger = logging.getLogger(__name__)
 
 class VolatilityBreakoutStrategy(BaseStrategy):
+    STATE_FIELDS = ('k', 'prev_close', 'range_k', 'sma_20', 'target_price')
+    SIGNAL_INPUTS = ('target_price', 'sma_20')
+    PARAM_GRID = {'k': [x * 0.1 for x in range(3, 10)]} # 0.3 ~ 0.9
+
     def __init__(self, symbol: str, initial_k: float = 0.5):
         super().__init__(symbol, "VolatilityBreakout")
         self.k = initial_k
         self.target_price = None
         self.prev_close = None
         self.range_k = None  # Fix: Initialize to avoid AttributeError
+        self.sma_20 = None
         
     def on_market_open(self, daily_ohlcv: pd.DataFrame):
         """
@@ -58,7 +65,7 @@ class VolatilityBreakoutStrategy(BaseStrategy):
         self.target_price = current_open + self.range_k
         logger.info(f"[{self.symbol}] Target Price Set: {self.target_price:.2f} (Open: {current_open} + Range*K: {self.range_k})")
 
-    def generate_signal(self, current_price: float, current_position: int = 0, avg_entry_price: float = 0.0) -> Optional[Dict[str, Any]]:
+    def generate_signal(self, current_price: float, current_position: int = 0, avg_entry_price: float = 0.0, **kwargs) -> Optional[Dict[str, Any]]:
         """
         Checks if current price breaks out the target OR hits stop loss.
         """
@@ -105,46 +112,86 @@ class VolatilityBreakoutStrategy(BaseStrategy):
             
         return None
 
-    def optimize_k(self, history: pd.DataFrame) -> float:
+    def generate_signals(self, prices, positions=0, avg_entry_prices=0.0, target_price=None, sma_20=None) -> np.ndarray:
+        """
+        Vectorized generate_signal. target_price / sma_20 default to the current state
+        and may be per-bar arrays (e.g. a different target per day when replaying).
+        """
+        return self.compute_signals(
+            prices, positions, avg_entry_prices,
+            indicator_array(self.target_price if target_price is None else target_price),
+            indicator_array(self.sma_20 if sma_20 is None else sma_20)
+        )
+
+    @staticmethod
+    def compute_signals(prices, positions, avg_entry_prices, target_price, sma_20) -> np.ndarray:
+        """Array form of the breakout / stop loss / take profit rules (NaN target = not set)."""
+        prices = np.asarray(prices, dtype=np.float64)
+        positions = np.asarray(positions, dtype=np.float64)
+        avg_entry_prices = np.asarray(avg_entry_prices, dtype=np.float64)
+        target_price = np.asarray(target_price, dtype=np.float64)
+        sma_20 = np.nan_to_num(np.asarray(sma_20, dtype=np.float64), nan=0.0)
+
+        # 1. STOP LOSS (-3%) & TAKE PROFIT (+5%)
+        has_entry = (positions > 0) & (avg_entry_prices > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profit_pct = (prices - avg_entry_prices) / avg_entry_prices
+        sell = has_entry & ((profit_pct <= -0.03) | (profit_pct >= 0.05))
+
+        # 2. BUY (Breakout + Trend Filter)
+        below_trend = (sma_20 > 0) & (prices < sma_20)
+        buy = (positions == 0) & (prices >= target_price) & ~below_trend
+
+        return np.where(sell, SELL, np.where(buy, BUY, HOLD)).astype(np.int8)
+
+    @classmethod
+    def daily_returns(cls, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                      cost: float = 0.0, k: float = 0.5) -> np.ndarray:
+        """
+        Simple vector backtest: buy AT target (Open + yesterday's range * K) on breakout days, sell at close.
+        """
+        # Shift data to align "Yesterday" with "Today"
+        price_range = shift(high) - shift(low)
+        target = open_ + price_range * k
+
+        # Condition: Did price hit target? (NaN targets on the first day never trigger)
+        # So profit = (Close - Target) / Target
+        is_breakout = high >= target
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.where(is_breakout, (close - target) / target - cost, 0.0)
+        return returns
+
+    def optimize_k(self, history: pd.DataFrame, cache: Optional[ResultCache] = None) -> float:
         """
         Finds the best K value (0.3 to 0.9) based on recent history (e.g., 20 days).
-        Returns the optimal K.
+        Returns the optimal K. With a `cache`, identical histories reuse the previous search.
         """
-        best_k = 0.5
-        best_return = -float('inf')
-        
-        # Simple grid search 
-        # Range updated: 0.3 ~ 0.9 (Avoid noise 0.1, 0.2)
-        for k in [x * 0.1 for x in range(3, 10)]: # 0.3 ~ 0.9
-            total_return = 1.0
-            
-            # Simple vector backtest
-            # Shift data to align "Yesterday" with "Today"
-            df = history.copy()
-            df['prev_high'] = df['high'].shift(1)
-            df['prev_low'] = df['low'].shift(1)
-            df['range'] = df['prev_high'] - df['prev_low']
-            df['target'] = df['open'] + df['range'] * k
-            
-            # Identify breakout days: High > Target
-            # Return = (Close - Target) / Target if High > Target else 0 (assuming buy at Target)
-            # Make sure we don't divide by zero or look ahead
-            
-            # Condition: Did price hit target?
-            # We assume we buy AT target price, and sell at close.
-            # So profit = (Close - Target) / Target
-            
-            df['is_breakout'] = df['high'] >= df['target']
-            df['daily_return'] = np.where(df['is_breakout'], (df['close'] - df['target']) / df['target'], 0)
-            
-            # Cumulative return
-            # fee adjustment could be added here
-            cum_ret = (1 + df['daily_return']).prod()
-            
-            if cum_ret > best_return:
-                best_return = cum_ret
-                best_k = k
-                
+        open_ = history['open'].to_numpy(dtype=np.float64)
+        high = history['high'].to_numpy(dtype=np.float64)
+        low = history['low'].to_numpy(dtype=np.float64)
+        close = history['close'].to_numpy(dtype=np.float64)
+
+        def search():
+            best_k = 0.5
+            best_return = -float('inf')
+            # Simple grid search 
+            # Range updated: 0.3 ~ 0.9 (Avoid noise 0.1, 0.2)
+            for k in self.PARAM_GRID['k']:
+                # Cumulative return
+                # fee adjustment could be added here
+                cum_ret = np.prod(1 + self.daily_returns(open_, high, low, close, k=k))
+
+                if cum_ret > best_return:
+                    best_return = cum_ret
+                    best_k = k
+            return best_k, float(best_return)
+
+        if cache is not None:
+            key = fingerprint(type(self), self.PARAM_GRID, np.vstack([open_, high, low, close]))
+            best_k, best_return = cache.get_or_compute("optimize_k", key, search)
+        else:
+            best_k, best_return = search()
+
         logger.info(f"[{self.symbol}] Optimized K: {best_k} (Return: {best_return:.2%})")
         self.k = best_k
         return best_k
@@ -0,0 +1,121 @@
+import unittest
+import tempfile
+import sys
+import os
+import time
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.backtest.analyzer import PerformanceAnalyzer, IncrementalAnalyzer
+from src.data.database import DatabaseManager
+
+def make_order(order_id, symbol, side, qty, price, filled_at, filled_qty=None, status='filled'):
+    return SimpleNamespace(
+        id=order_id, client_order_id=f"c-{order_id}", symbol=symbol, side=side, status=status,
+        qty=str(qty), filled_qty=str(qty if filled_qty is None else filled_qty),
+        filled_avg_price=str(price), filled_at=pd.Timestamp(filled_at, tz='US/Eastern').to_pydatetime())
+
+class TestAnalyzer(unittest.TestCase):
+    def test_fifo_across_days_and_partial_fills(self):
+        orders = [
+            make_order('b1', 'AAA', 'buy', 10, 100.0, '2024-01-02 10:00'),
+            make_order('b2', 'AAA', 'buy', 10, 110.0, '2024-01-02 11:00', filled_qty=5, status='canceled'),
+            # Held overnight, sold in two pieces the next day
+            make_order('s1', 'AAA', 'sell', 12, 120.0, '2024-01-03 10:00'),
+            make_order('s2', 'AAA', 'sell', 3, 90.0, '2024-01-03 11:00'),
+            # Sell of a position opened before this order window: unmatched
+            make_order('s0', 'BBB', 'sell', 5, 50.0, '2024-01-02 09:45'),
+            make_order('b3', 'BBB', 'buy', 5, 50.0, '2024-01-02 10:00'),
+            make_order('s3', 'BBB', 'sell', 5, 49.0, '2024-01-02 15:55'),
+        ]
+        strategy_map = {'b1': 'VolatilityBreakout', 'b2': 'RSIMomentum', 'b3': 'BollingerReversion'}
+        trips = PerformanceAnalyzer.match_round_trips(PerformanceAnalyzer.orders_to_fills(orders, strategy_map))
+
+        aaa = trips[trips['symbol'] == 'AAA'].reset_index(drop=True)
+        self.assertEqual(list(zip(aaa['entry_order_id'], aaa['exit_order_id'], aaa['qty'])),
+                         [('b1', 's1', 10), ('b2', 's1', 2), ('b2', 's2', 3)])
+        self.assertEqual(list(aaa['pnl']), [200.0, 20.0, -60.0])
+        self.assertEqual(aaa['holding_time'][0], pd.Timedelta(days=1))
+        bbb = trips[trips['symbol'] == 'BBB']
+        self.assertEqual(list(zip(bbb['entry_order_id'], bbb['exit_order_id'], bbb['pnl'])), [('b3', 's3', -5.0)])
+
+        daily = PerformanceAnalyzer.calculate_daily_performance(orders, strategy_map)
+        self.assertEqual(list(daily.columns), ['Date', 'Symbol', 'Strategy', 'Net_PL', 'Order_Count', 'Win'])
+        pl = daily.set_index(['Date', 'Symbol', 'Strategy'])['Net_PL']
+        self.assertEqual(pl[('2024-01-03', 'AAA', 'VolatilityBreakout')], 200.0)
+        self.assertEqual(pl[('2024-01-03', 'AAA', 'RSIMomentum')], -40.0)
+        self.assertEqual(pl[('2024-01-02', 'BBB', 'BollingerReversion')], -5.0)
+
+    def test_matches_reference_fifo_at_scale(self):
+        rng = np.random.default_rng(0)
+        n = 100_000
+        fills = pd.DataFrame({
+            'timestamp': pd.Timestamp('2024-01-02', tz='UTC') + pd.to_timedelta(np.arange(n), unit='s'),
+            'symbol': rng.choice(['AAA', 'BBB', 'CCC', 'DDD'], n),
+            'side': rng.choice(['buy', 'sell'], n),
+            'qty': rng.integers(1, 20, n).astype(float),
+            'price': rng.uniform(90, 110, n),
+            'order_id': [f"o{i}" for i in range(n)],
+            'strategy': 'VolatilityBreakout',
+        })
+        t_start = time.perf_counter()
+        trips = PerformanceAnalyzer.match_round_trips(fills)
+        elapsed = time.perf_counter() - t_start
+        self.assertLess(elapsed, 2.0)
+
+        # Reference: explicit FIFO queue per symbol on a sample symbol
+        sample = fills[fills['symbol'] == 'AAA']
+        queue, pnl = [], 0.0
+        for side, qty, price in zip(sample['side'], sample['qty'], sample['price']):
+            if side == 'buy':
+                queue.append([qty, price])
+                continue
+            while qty > 0 and queue:
+                lot = min(qty, queue[0][0])
+                pnl += (price - queue[0][1]) * lot
+                qty -= lot
+                queue[0][0] -= lot
+                if queue[0][0] == 0:
+                    queue.pop(0)
+        self.assertAlmostEqual(trips.loc[trips['symbol'] == 'AAA', 'pnl'].sum(), pnl, places=4)
+        self.assertTrue((trips['exit_time'] >= trips['entry_time']).all())
+
+    def test_incremental_matches_full_recompute(self):
+        rng = np.random.default_rng(1)
+        n = 2000
+        fills = pd.DataFrame({
+            'timestamp': pd.Timestamp('2024-01-02 14:30', tz='UTC') + pd.to_timedelta(np.arange(n) * 600, unit='s'),
+            'symbol': rng.choice(['AAA', 'BBB'], n),
+            'side': rng.choice(['buy', 'sell'], n),
+            'qty': rng.integers(1, 20, n).astype(float),
+            'price': rng.uniform(90, 110, n),
+            'order_id': [f"o{i}" for i in range(n)],
+            'strategy': rng.choice(['VolatilityBreakout', 'RSIMomentum'], n),
+        })
+        full = PerformanceAnalyzer.calculate_daily_performance(fills)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, "test.db"))
+            analytics = IncrementalAnalyzer(db)
+            processed = 0
+            for chunk in np.array_split(np.arange(n), 7):
+                # Overlapping re-deliveries are ignored
+                processed += analytics.update(fills.iloc[max(0, chunk[0] - 50):chunk[-1] + 1])
+            self.assertEqual(processed, n)
+            self.assertEqual(analytics.update(fills), 0)
+            self.assertEqual(analytics.cursor(), fills['timestamp'].iloc[-1].to_pydatetime())
+
+            daily = analytics.daily_performance()
+            pd.testing.assert_frame_equal(daily[['Date', 'Symbol', 'Strategy', 'Order_Count', 'Win']],
+                                          full[['Date', 'Symbol', 'Strategy', 'Order_Count', 'Win']], check_dtype=False)
+            np.testing.assert_allclose(daily['Net_PL'], full['Net_PL'], atol=1e-6)
+            by_strategy = PerformanceAnalyzer.get_metrics_by_strategy(full).set_index('Strategy')
+            np.testing.assert_allclose(analytics.strategy_metrics().set_index('Strategy')['Net_PL'], by_strategy['Net_PL'], atol=1e-6)
+            db.close()
+
+if __name__ == '__main__':
+    unittest.main()
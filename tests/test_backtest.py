@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.backtest.engine import BacktestEngine, SimulatedBroker
+from src.backtest.vectorized import VectorizedBacktester
+
+def make_minute_bars(n_days, seed, start='2024-01-02'):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, periods=n_days)
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(d + pd.Timedelta(hours=9, minutes=30), periods=390, freq='min').values for d in days
+    ])).tz_localize('US/Eastern').tz_convert('UTC')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    return pd.DataFrame({
+        'open': open_, 'high': np.maximum(open_, close) * 1.0005, 'low': np.minimum(open_, close) * 0.9995,
+        'close': close, 'volume': 100
+    }, index=index)
+
+def with_extended_hours(bars):
+    """Adds pre-market (4:00-9:29) and after-hours (16:00-19:59) bars far from the session prices."""
+    days = bars.index.tz_convert('US/Eastern').normalize().unique()
+    index = pd.DatetimeIndex(np.concatenate([
+        np.concatenate([pd.date_range(d + pd.Timedelta(hours=4), periods=330, freq='min').values,
+                        pd.date_range(d + pd.Timedelta(hours=16), periods=240, freq='min').values])
+        for d in days.tz_localize(None)
+    ])).tz_localize('US/Eastern').tz_convert('UTC')
+    extra = pd.DataFrame({'open': 50.0, 'high': 150.0, 'low': 50.0, 'close': 150.0, 'volume': 10}, index=index)
+    return pd.concat([bars, extra]).sort_index()
+
+class TestBacktest(unittest.TestCase):
+    def test_broker_slippage_and_fees(self):
+        broker = SimulatedBroker(initial_cash=10000, slippage_bps=10, fee_per_share=0.01)
+        broker.submit_order("AAA", 10, 'buy', 100.0, 0, "VolatilityBreakout")
+        self.assertEqual(broker.get_position("AAA"), (10, 100.1))
+        fill = broker.submit_order("AAA", 50, 'sell', 110.0, 1, "BollingerReversion")
+        # Capped at held qty, attributed to the opening strategy
+        self.assertEqual(fill[3], 10)
+        self.assertEqual(fill[6], "VolatilityBreakout")
+        self.assertAlmostEqual(fill[8], (109.89 - 100.1) * 10 - 0.1)
+        self.assertEqual(broker.get_position("AAA"), (0, 0.0))
+        self.assertAlmostEqual(broker.cash, 10000 + fill[8] - 0.1)
+
+    def test_flat_at_time_cut(self):
+        bars = {"AAA": make_minute_bars(45, 1), "BBB": make_minute_bars(45, 2)}
+        result = BacktestEngine(["AAA", "BBB"]).run(start='2024-02-12', bars=bars)
+        fills = result['fills']
+
+        self.assertGreater(result['n_trades'], 0)
+        self.assertGreater(result['bars_per_sec'], 0)
+        et = fills['timestamp'].dt.tz_convert('US/Eastern')
+        self.assertTrue(((et.dt.hour * 60 + et.dt.minute) <= 15 * 60 + 55).all())
+        # Every day ends flat: buys and sells net out per symbol and date
+        signed = np.where(fills['side'] == 'buy', fills['qty'], -fills['qty'])
+        net = pd.Series(signed).groupby([fills['symbol'], et.dt.date]).sum()
+        self.assertTrue((net == 0).all())
+        self.assertAlmostEqual(result['total_pl'], result['daily_pl'].sum())
+
+    def test_extended_hours_bars_are_ignored(self):
+        bars = {"AAA": make_minute_bars(30, 1)}
+        extended = {"AAA": with_extended_hours(bars["AAA"])}
+        regular = BacktestEngine(["AAA"]).run(start='2024-01-29', bars=bars)
+        result = BacktestEngine(["AAA"]).run(start='2024-01-29', bars=extended)
+
+        self.assertEqual(result['n_trades'], regular['n_trades'])
+        self.assertAlmostEqual(result['total_pl'], regular['total_pl'], places=6)
+        et = result['fills']['timestamp'].dt.tz_convert('US/Eastern')
+        self.assertTrue(((et.dt.hour * 60 + et.dt.minute) >= 9 * 60 + 30).all())
+
+        vectorized = VectorizedBacktester(["AAA"])
+        vectorized.prepare(start='2024-01-29', bars=extended)
+        summary = vectorized.run([{}])['summary'].iloc[0]
+        self.assertEqual(summary['n_trades'], regular['n_trades'])
+        self.assertAlmostEqual(summary['total_pl'], regular['total_pl'], places=6)
+
+    def test_vectorized_matches_event_engine(self):
+        bars = {"AAA": make_minute_bars(45, 1), "BBB": make_minute_bars(45, 2)}
+        params = {'VolatilityBreakout': {'k': 0.3}, 'BollingerReversion': {'period': 10, 'std_dev': 1.5}}
+        vectorized = VectorizedBacktester(["AAA", "BBB"], fee_per_share=0.01)
+        vectorized.prepare(start='2024-02-12', bars=bars)
+
+        for combo in [{}, params]:
+            event = BacktestEngine(["AAA", "BBB"], fee_per_share=0.01, strategy_params=combo).run(start='2024-02-12', bars=bars)
+            summary = vectorized.run([combo])['summary'].iloc[0]
+            self.assertAlmostEqual(summary['total_pl'], event['total_pl'], places=6)
+            self.assertEqual(summary['n_trades'], event['n_trades'])
+            self.assertAlmostEqual(summary['fees'], event['fees'], places=6)
+
+        self.assertTrue(vectorized.cross_check(sample_days=3, strategy_params=params)['match'].all())
+        sweep = vectorized.sweep({'VolatilityBreakout': {'k': [0.3, 0.5]}, 'RSIMomentum': {'rsi_period': [7, 14]}})
+        self.assertEqual(len(sweep), 4)
+        self.assertTrue(sweep['total_pl'].is_monotonic_decreasing)
+
+    def test_cross_check_with_a_strategy_subset(self):
+        bars = {"AAA": make_minute_bars(45, 1)}
+        for names in (["BollingerReversion"], ["VolatilityBreakout"], ["RSIMomentum"]):
+            vectorized = VectorizedBacktester(["AAA"], strategies=names)
+            vectorized.prepare(start='2024-02-12', bars=bars)
+            self.assertTrue(vectorized.cross_check(sample_days=3)['match'].all(), names)
+
+if __name__ == '__main__':
+    unittest.main()
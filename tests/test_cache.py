@@ -0,0 +1,80 @@
+import unittest
+import tempfile
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.cache import ResultCache, fingerprint
+from src.backtest.optimizer import WalkForwardOptimizer
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+
+def make_daily(n_days, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+    open_ = close * (1 + rng.normal(0, 0.005, n_days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n_days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n_days))
+    index = pd.date_range('2021-01-01', periods=n_days, freq='D')
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close}, index=index)
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprint_is_content_addressed(self):
+        a = make_daily(30, 1)
+        self.assertEqual(fingerprint(VolatilityBreakoutStrategy, {'k': 0.5}, a), fingerprint(VolatilityBreakoutStrategy, {'k': 0.5}, a.copy()))
+        b = a.copy()
+        b.iloc[-1, 0] += 0.01
+        self.assertNotEqual(fingerprint(VolatilityBreakoutStrategy, a), fingerprint(VolatilityBreakoutStrategy, b))
+        self.assertNotEqual(fingerprint(VolatilityBreakoutStrategy, {'k': 0.5}, a), fingerprint(VolatilityBreakoutStrategy, {'k': 0.6}, a))
+
+    def test_lru_eviction_and_stats(self):
+        cache = ResultCache(self.path, max_bytes=2500)
+        blob = np.zeros(100)  # ~1 KB pickled
+        cache.put("bt", "a", blob)
+        cache.put("bt", "b", blob)
+        self.assertIsNotNone(cache.get("bt", "a"))  # "b" is now least recently used
+        cache.put("bt", "c", blob)
+
+        self.assertIsNone(cache.get("bt", "b"))
+        self.assertIsNotNone(cache.get("bt", "a"))
+        self.assertIsNotNone(cache.get("bt", "c"))
+        stats = cache.stats().set_index('namespace').loc['bt']
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (3, 1, 2))
+        self.assertAlmostEqual(stats['hit_rate'], 75.0)
+        cache.close()
+
+        # Counters persist for other processes (e.g. the dashboard)
+        self.assertEqual(ResultCache(self.path).stats_summary()['hits'], 3)
+
+    def test_optimize_k_and_walk_forward_reuse(self):
+        cache = ResultCache(self.path)
+        history = make_daily(30, 2)
+        strat = VolatilityBreakoutStrategy("TEST")
+        k = strat.optimize_k(history, cache=cache)
+        self.assertEqual(strat.optimize_k(history, cache=cache), k)
+        self.assertEqual(VolatilityBreakoutStrategy("TEST").optimize_k(history), k)
+
+        history = {"AAA": make_daily(200, 3), "BBB": make_daily(200, 4)}
+        optimizer = WalkForwardOptimizer(db=object(), train_days=60, test_days=20, max_workers=1, cache=cache)
+        first = sorted(optimizer.run(["AAA", "BBB"], history=history), key=lambda r: (r['symbol'], r['strategy_name']))
+        second = sorted(optimizer.run(["AAA", "BBB"], history=history), key=lambda r: (r['symbol'], r['strategy_name']))
+        self.assertEqual(first, second)
+
+        stats = cache.stats().set_index('namespace')
+        self.assertEqual(stats.loc['optimize_k', 'hits'], 1)
+        self.assertEqual(stats.loc['walk_forward', 'hits'], 6)
+        self.assertEqual(stats.loc['walk_forward', 'misses'], 6)
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import tempfile
+import sqlite3
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.database import DatabaseManager
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "test.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_strategy_params_roundtrip(self):
+        db = DatabaseManager(self.db_path)
+        db.create_tables()
+        db.save_strategy_params([{
+            'date': '2024-01-02',
+            'symbol': 'NVDA',
+            'strategy_name': 'VolatilityBreakout',
+            'state': {'k': 0.6, 'range_k': 1.5, 'target_price': None},
+            'input_hash': 'abc'
+        }])
+
+        loaded = db.load_strategy_params('2024-01-02')
+        self.assertEqual(loaded[('NVDA', 'VolatilityBreakout')]['input_hash'], 'abc')
+        self.assertEqual(loaded[('NVDA', 'VolatilityBreakout')]['state']['k'], 0.6)
+        self.assertEqual(db.load_strategy_params('2024-01-03'), {})
+        db.close()
+
+    def test_legacy_strategy_params_migrated(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE strategy_params (date DATE, symbol TEXT, k_value REAL, target_price REAL, PRIMARY KEY (date, symbol))")
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(self.db_path)
+        db.create_tables()
+        columns = [row['name'] for row in db.conn.execute("PRAGMA table_info(strategy_params)")]
+        self.assertIn('strategy_name', columns)
+        self.assertIn('input_hash', columns)
+        db.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import tempfile
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.backtest.equity import EquityTracker
+from src.data.database import DatabaseManager
+
+def session_samples(closes, start=datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)):
+    """One intraday sample plus the close per day (timestamps during the US session)."""
+    prev = closes[0]
+    for d, close in enumerate(closes):
+        t = start + timedelta(days=d)
+        yield t, (prev + close) / 2
+        yield t + timedelta(hours=5), close
+        prev = close
+
+class TestEquityTracker(unittest.TestCase):
+    def test_rolling_metrics_match_reference(self):
+        rng = np.random.default_rng(0)
+        closes = 100_000 * np.cumprod(1 + rng.normal(0.001, 0.01, 60))
+        tracker = EquityTracker(window=20)
+        for t, equity in session_samples(closes):
+            tracker.on_equity(t, equity, market_value=equity * 0.5)
+
+        # Completed days: returns close-to-close (each day opens at the previous close)
+        returns = closes[1:-1] / closes[:-2] - 1
+        window = returns[-20:]
+        self.assertEqual(len(tracker.returns), 20)
+        self.assertAlmostEqual(tracker.sharpe, window.mean() / window.std(ddof=1) * np.sqrt(252), places=6)
+        downside = np.sqrt(np.mean(np.minimum(window, 0) ** 2))
+        self.assertAlmostEqual(tracker.sortino, window.mean() / downside * np.sqrt(252), places=6)
+
+        peak = np.maximum.accumulate(closes)
+        self.assertAlmostEqual(tracker.drawdown, closes[-1] / peak[-1] - 1)
+        self.assertAlmostEqual(tracker.max_drawdown, (closes / peak - 1).min())
+        self.assertAlmostEqual(tracker.avg_exposure, 0.5)
+
+    def test_daily_loss_and_contributions(self):
+        tracker = EquityTracker()
+        t = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)
+        tracker.on_equity(t, 99_000, day_open_equity=100_000)
+        self.assertFalse(tracker.daily_loss_breached(0.02))
+        tracker.on_equity(t + timedelta(minutes=5), 97_900)
+        self.assertTrue(tracker.daily_loss_breached(0.02))
+        self.assertAlmostEqual(tracker.daily_pl, -2_100)
+
+        tracker.on_fill('VolatilityBreakout', 150.0)
+        tracker.on_fill('RSIMomentum', -50.0)
+        tracker.on_fill('VolatilityBreakout', 25.0)
+        self.assertEqual(tracker.contributions, {'VolatilityBreakout': 175.0, 'RSIMomentum': -50.0})
+        self.assertAlmostEqual(tracker.realized_pl, 125.0)
+
+    def test_state_survives_restart(self):
+        rng = np.random.default_rng(1)
+        closes = 50_000 * np.cumprod(1 + rng.normal(0, 0.02, 30))
+        tracker = EquityTracker()
+        for t, equity in session_samples(closes):
+            tracker.on_equity(t, equity, market_value=equity * 0.3)
+        tracker.on_fill('BollingerReversion', 42.0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, "test.db"))
+            db.create_tables()
+            db.save_risk_snapshot(tracker.snapshot(), tracker.get_state())
+
+            latest = db.load_latest_risk_snapshot()
+            self.assertAlmostEqual(latest['sharpe'], tracker.sharpe)
+            self.assertEqual(latest['contributions'], {'BollingerReversion': 42.0})
+            self.assertEqual(len(db.load_risk_snapshots()), 1)
+
+            restored = EquityTracker()
+            restored.set_state(db.load_risk_state())
+            db.close()
+
+        self.assertEqual(restored.snapshot(), tracker.snapshot())
+        t = datetime(2024, 3, 1, 15, 0, tzinfo=timezone.utc)
+        tracker.on_equity(t, 55_000)
+        restored.on_equity(t, 55_000)
+        self.assertAlmostEqual(restored.sharpe, tracker.sharpe)
+
+if __name__ == '__main__':
+    unittest.main()
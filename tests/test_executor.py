@@ -0,0 +1,270 @@
+import unittest
+import asyncio
+import tempfile
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.executor import TradingExecutor
+from src.agent.risk import KillSwitch
+from src.data.market_calendar import EASTERN, TradingCalendar
+from src.data.database import DatabaseManager
+from src.data.position_book import PositionBook
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+
+def open_calendar(tmp: str) -> TradingCalendar:
+    """A calendar whose only session is in progress (opened an hour ago, closes in an hour)."""
+    now = datetime.now(EASTERN).replace(tzinfo=None)
+    alpaca = MagicMock()
+    alpaca.get_calendar.return_value = [SimpleNamespace(date=now.date(), open=now - timedelta(hours=1),
+                                                        close=now + timedelta(hours=1))]
+    return TradingCalendar(alpaca, path=os.path.join(tmp, "calendar.json"))
+
+def make_executor(tmp: str, symbols, with_book: bool = False, **kwargs) -> TradingExecutor:
+    kwargs.setdefault('checkpoint_path', os.path.join(tmp, "checkpoint.json"))
+    kwargs.setdefault('calendar', open_calendar(tmp))
+    kwargs.setdefault('kill_switch', KillSwitch(os.path.join(tmp, "KILL_SWITCH")))
+    alpaca = MagicMock()
+    alpaca.get_market_status.return_value = SimpleNamespace(is_open=True)
+    alpaca.get_account_info.return_value = SimpleNamespace(equity="100000", long_market_value="0", last_equity="100000")
+    alpaca.get_positions.return_value = {}
+    ids = iter(range(1, 1000))
+    alpaca.submit_order.side_effect = lambda symbol, qty, side: SimpleNamespace(
+        id=f"o{next(ids)}", symbol=symbol, side=side, qty=str(qty), filled_qty="0")
+    if with_book:
+        alpaca.trading_client.get_orders.return_value = []
+        kwargs['position_book'] = PositionBook(alpaca)
+        kwargs['position_book'].reconcile()
+    db = DatabaseManager(os.path.join(tmp, "test.db"))
+    db.create_tables()
+    with patch('src.agent.executor.AlpacaInterface', return_value=alpaca), \
+         patch('src.agent.executor.DatabaseManager', return_value=db):
+        executor = TradingExecutor(symbols, investment_per_symbol=1000, **kwargs)
+    for strategy in executor.strategies:
+        if isinstance(strategy, VolatilityBreakoutStrategy):
+            strategy.sma_20 = 0
+            strategy.target_price = 100.0
+    return executor
+
+class TestEventExecutor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_prices_are_not_queued(self):
+        executor = make_executor(self.tmp.name, ["AAA"])
+        executor.price_queue = asyncio.Queue()
+        executor.on_price("AAA", 99.0)
+        executor.on_price("AAA", 99.0)
+        executor.on_price("AAA", 99.5)
+        self.assertEqual(executor.price_queue.qsize(), 2)
+        batch = executor._drain(executor.price_queue.get_nowait())
+        self.assertEqual(batch["AAA"]["price"], 99.5)
+        executor.db.close()
+
+    def test_breakout_triggers_order_with_latency(self):
+        executor = make_executor(self.tmp.name, ["AAA", "BBB"], evaluation_mode="event", poll_interval=0.01)
+        alpaca = executor.alpaca
+        ticks = iter([{"AAA": 99.0, "BBB": 99.0}, {"AAA": 99.0, "BBB": 99.0}, {"AAA": 101.0, "BBB": 99.0}])
+        alpaca.get_latest_prices.side_effect = lambda symbols: next(ticks, {"AAA": 101.0, "BBB": 99.0})
+
+        submit_order = alpaca.submit_order.side_effect
+
+        def submit(symbol, qty, side):
+            executor.stop()
+            return submit_order(symbol, qty, side)
+        alpaca.submit_order.side_effect = submit
+
+        evaluated = []
+        evaluate = executor._evaluate_prices
+        executor._evaluate_prices = lambda prices, received=None: (evaluated.append(set(prices)), evaluate(prices, received))
+
+        asyncio.run(asyncio.wait_for(executor.run_loop(), timeout=5))
+
+        alpaca.submit_order.assert_called_once_with("AAA", 9, 'buy')
+        # First batch has both symbols; afterwards only the symbol whose price moved
+        self.assertEqual(evaluated[0], {"AAA", "BBB"})
+        self.assertEqual(evaluated[-1], {"AAA"})
+        latency = executor.latency_summary()
+        self.assertEqual(latency['count'], 1)
+        self.assertGreater(latency['p50'], 0)
+        executor.db.close()
+
+    def test_failed_batch_is_evaluated_again_at_an_unchanged_price(self):
+        executor = make_executor(self.tmp.name, ["AAA"], evaluation_mode="event", poll_interval=0.01)
+        alpaca = executor.alpaca
+        # Already above target on the first poll, and the price never changes
+        alpaca.get_latest_prices.return_value = {"AAA": 101.0}
+        fetches = iter([TimeoutError("positions request timed out")])
+
+        def get_positions():
+            error = next(fetches, None)
+            if error:
+                raise error
+            return {}
+        alpaca.get_positions.side_effect = get_positions
+        submit_order = alpaca.submit_order.side_effect
+
+        def submit(symbol, qty, side):
+            executor.stop()
+            return submit_order(symbol, qty, side)
+        alpaca.submit_order.side_effect = submit
+
+        asyncio.run(asyncio.wait_for(executor.run_loop(), timeout=5))
+        alpaca.submit_order.assert_called_once_with("AAA", 9, 'buy')
+        self.assertEqual(alpaca.get_positions.call_count, 2)
+        executor.db.close()
+
+class TestPositionBookIntegration(unittest.TestCase):
+    def test_positions_from_book_and_no_duplicate_orders(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = make_executor(tmp, ["AAA"], with_book=True)
+            alpaca = executor.alpaca
+            alpaca.get_positions.reset_mock()
+
+            executor._evaluate_prices({"AAA": 101.0})
+            executor._evaluate_prices({"AAA": 101.5})
+            # Second breakout: the buy is still in flight (no fill on the stream yet)
+            alpaca.submit_order.assert_called_once_with("AAA", 9, 'buy')
+            alpaca.get_positions.assert_not_called()
+            alpaca.get_open_position.assert_not_called()
+            executor.db.close()
+
+class TestConcurrentLoop(unittest.TestCase):
+    def test_slow_symbol_does_not_block_others(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = make_executor(tmp, ["SLOW", "AAA", "BBB"], symbol_timeout=0.2)
+            alpaca = executor.alpaca
+
+            def latest_price(symbol):
+                if symbol == "SLOW":
+                    time.sleep(1.0)
+                return 101.0
+            alpaca.get_latest_price.side_effect = latest_price
+            alpaca.get_open_position.return_value = None
+
+            async def two_ticks():
+                t_start = time.perf_counter()
+                await executor._concurrent_tick()
+                first = time.perf_counter() - t_start
+                await executor._concurrent_tick()
+                return first
+
+            first_tick = asyncio.run(two_ticks())
+            self.assertLess(first_tick, 0.8)
+            # The fast symbols bought once (their orders were still in flight on the second tick).
+            # SLOW's first evaluation finished in the background; the second tick skipped it while it ran
+            bought = [c.args[0] for c in alpaca.submit_order.call_args_list]
+            self.assertEqual(sorted(bought), ["AAA", "BBB", "SLOW"])
+            self.assertEqual(len(executor.db.execute_query("SELECT * FROM trade_logs")), 3)
+            executor.db.close()
+
+class TestDailyInitialization(unittest.TestCase):
+    def test_parallel_initialization_and_restore(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = make_executor(tmp, ["AAA", "BBB"])
+            executor.alpaca.get_account_info.return_value = SimpleNamespace(buying_power="20000", equity="10000", last_equity="10000")
+            # 40 sessions of 30 minute bars per symbol, ending yesterday
+            today = pd.Timestamp(executor.trading_date())
+            rng = np.random.default_rng(0)
+            rows = []
+            for symbol in ["AAA", "BBB"]:
+                price = 100.0
+                for day in pd.bdate_range(end=today - pd.Timedelta(days=1), periods=40):
+                    for minute in range(30):
+                        price *= 1 + rng.normal(0, 0.002)
+                        t = (day + pd.Timedelta(hours=14, minutes=30 + minute)).to_pydatetime()
+                        rows.append((symbol, t, price, price * 1.001, price * 0.999, price, 1000))
+            executor.db.connect()
+            executor.db.conn.executemany("INSERT INTO ohlcv_data (symbol, timestamp, open, high, low, close, volume) "
+                                         "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            executor.db.conn.commit()
+
+            asyncio.run(executor.initialize_day())
+            self.assertEqual(executor.investment_per_symbol, 9000)
+            self.assertEqual(set(executor.init_timings),
+                             {"allocation", "reconcile", "history", "calendar", "optimize", "persist", "total"})
+            # Full history window (not just the last few minute bars) reaches the strategies
+            for strategy in executor.strategies:
+                if isinstance(strategy, VolatilityBreakoutStrategy):
+                    self.assertIsNotNone(strategy.sma_20)
+                    self.assertIsNotNone(strategy.range_k)
+            state = {s.name + s.symbol: s.get_state() for s in executor.strategies}
+            self.assertEqual(len(executor.db.load_strategy_params(executor.trading_date())), 6)
+
+            # Second run restores everything from strategy_params with identical state
+            asyncio.run(executor.initialize_day())
+            self.assertEqual({s.name + s.symbol: s.get_state() for s in executor.strategies}, state)
+            executor.db.close()
+
+class TestCheckpoint(unittest.TestCase):
+    def test_warm_restart_restores_targets_and_inflight_fills(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = make_executor(tmp, ["AAA"], with_book=True)
+            executor._evaluate_prices({"AAA": 101.0})  # breakout buy, no fill on the stream yet
+            executor.stop()
+            executor.db.close()
+            self.assertTrue(os.path.exists(os.path.join(tmp, "checkpoint.json")))
+            self.assertEqual([f for f in os.listdir(tmp) if f.startswith(".checkpoint")], [])
+
+            # Restart: fresh strategies, the buy filled while the agent was down
+            restarted = make_executor(tmp, ["AAA"], with_book=True)
+            vb = next(s for s in restarted.strategies if isinstance(s, VolatilityBreakoutStrategy))
+            vb.target_price = None
+            restarted.alpaca.trading_client.get_order_by_id.return_value = SimpleNamespace(
+                status="filled", filled_qty="9", filled_avg_price="101.2")
+
+            self.assertTrue(restarted.restore_checkpoint())
+            self.assertEqual(vb.target_price, 100.0)
+            self.assertEqual(restarted.order_manager.position("AAA", vb.name), (9.0, 101.2))
+            self.assertFalse(restarted.order_manager.in_flight("AAA"))
+            restarted.db.close()
+
+    def test_fills_after_the_checkpoint_are_not_applied_twice(self):
+        for with_book in (True, False):
+            with self.subTest(with_book=with_book), tempfile.TemporaryDirectory() as tmp:
+                executor = make_executor(tmp, ["AAA"], with_book=with_book)
+                executor._evaluate_prices({"AAA": 101.0})
+                executor.save_checkpoint()
+                vb = next(s for s in executor.strategies if isinstance(s, VolatilityBreakoutStrategy))
+                if with_book:
+                    # The fill lands after the checkpoint, then the agent crashes (no further checkpoint)
+                    order = SimpleNamespace(id="o1", symbol="AAA", side="buy", qty="9", filled_qty="9")
+                    executor.position_book.on_trade_update(SimpleNamespace(
+                        event='fill', order=order, qty=9, price=101.0, position_qty=9, execution_id="e1"))
+                before = executor.order_manager.position("AAA", vb.name)
+                self.assertEqual(before, (9.0, 101.0))
+                executor.db.close()
+
+                restarted = make_executor(tmp, ["AAA"], with_book=with_book)
+                restarted.alpaca.trading_client.get_order_by_id.return_value = SimpleNamespace(
+                    status="filled", filled_qty="9", filled_avg_price="101.0")
+                self.assertTrue(restarted.restore_checkpoint())
+                self.assertEqual(restarted.order_manager.position("AAA", vb.name), before)
+                self.assertFalse(restarted.order_manager.in_flight("AAA"))
+                restarted.db.close()
+
+    def test_stale_or_torn_checkpoint_is_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = make_executor(tmp, ["AAA"])
+            self.assertFalse(executor.restore_checkpoint())
+            with open(os.path.join(tmp, "checkpoint.json"), "w") as f:
+                f.write('{"version": 1, "date": "')
+            self.assertFalse(executor.restore_checkpoint())
+            executor.save_checkpoint()
+            with patch.object(executor, 'trading_date', return_value="1999-01-01"):
+                self.assertFalse(executor.restore_checkpoint())
+            executor.db.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import threading
+import time
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.liquidator import Liquidator
+
+class FakeBroker:
+    """Positions that close when a (slow) market order is accepted; FAIL's first submission errors."""
+    def __init__(self, positions):
+        self.positions = dict(positions)
+        self.submitted = []
+        self.lock = threading.Lock()
+        self.alpaca = MagicMock()
+        self.alpaca.get_positions.side_effect = lambda: {
+            s: SimpleNamespace(symbol=s, qty=str(q)) for s, q in self.positions.items()}
+        self.alpaca.trading_client.get_orders.return_value = []
+        self.alpaca.submit_order.side_effect = self.submit_order
+
+    def submit_order(self, symbol, qty, side):
+        time.sleep(0.1)
+        with self.lock:
+            self.submitted.append((symbol, qty, side))
+            if symbol == "FAIL" and sum(s == "FAIL" for s, _, _ in self.submitted) == 1:
+                raise RuntimeError("rejected")
+            self.positions[symbol] += -qty if side == 'sell' else qty
+            if abs(self.positions[symbol]) < 1e-9:
+                del self.positions[symbol]
+        return SimpleNamespace(id=f"{symbol}-{len(self.submitted)}")
+
+class TestLiquidator(unittest.TestCase):
+    def test_concurrent_close_with_retry(self):
+        positions = {f"S{i}": 10 + i for i in range(11)}
+        positions.update({"FAIL": 5, "SHORT": -3})
+        broker = FakeBroker(positions)
+
+        report = Liquidator(broker.alpaca, poll_interval=0.01, settle=0.05).run()
+
+        broker.alpaca.trading_client.cancel_orders.assert_called_once()
+        self.assertTrue(report['flat'])
+        self.assertEqual(broker.positions, {})
+        # 13 orders at 100ms each went out together, not one after another
+        self.assertLess(report['submit_seconds'], 0.6)
+        self.assertEqual((report['orders'], report['failures']), (13, 1))
+        self.assertIn(("SHORT", 3, 'buy'), broker.submitted)
+        self.assertEqual([s for s in broker.submitted if s[0] == "FAIL"], [("FAIL", 5, 'sell')] * 2)
+        self.assertGreaterEqual(report['time_to_flat'], report['submit_seconds'])
+
+    def test_gives_up_after_retries(self):
+        broker = FakeBroker({"AAA": 10})
+        broker.alpaca.submit_order.side_effect = RuntimeError("market closed")
+
+        report = Liquidator(broker.alpaca, retries=2, poll_interval=0.01, settle=0.0).run()
+
+        self.assertFalse(report['flat'])
+        self.assertIsNone(report['time_to_flat'])
+        self.assertEqual(report['remaining'], {"AAA": 10.0})
+        self.assertEqual(broker.alpaca.submit_order.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import asyncio
+import tempfile
+import sys
+import os
+from datetime import date, datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.scheduler import AgentScheduler
+from src.data.market_calendar import EASTERN, TradingCalendar
+
+def day(d: str, open_: str = "09:30", close: str = "16:00"):
+    return SimpleNamespace(date=date.fromisoformat(d), open=datetime.fromisoformat(f"{d} {open_}"),
+                           close=datetime.fromisoformat(f"{d} {close}"))
+
+# Thanksgiving week 2024: closed on the 28th, early close on the 29th
+THANKSGIVING = [day("2024-11-26"), day("2024-11-27"), day("2024-11-29", close="13:00"), day("2024-12-02")]
+
+def at(text: str) -> datetime:
+    return EASTERN.localize(datetime.fromisoformat(text))
+
+class TestTradingCalendar(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "calendar.json")
+        self.alpaca = MagicMock()
+        self.alpaca.get_calendar.return_value = THANKSGIVING
+        self.now = at("2024-11-29 10:00")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def calendar(self, alpaca=None) -> TradingCalendar:
+        return TradingCalendar(alpaca or self.alpaca, path=self.path, clock=lambda: self.now)
+
+    def test_half_day_and_holiday_without_network_calls(self):
+        calendar = self.calendar()
+        self.assertTrue(calendar.is_open())
+        self.assertEqual(calendar.time_to_close(), 3 * 3600)
+        self.assertEqual(calendar.session_minutes(), 210)
+        self.assertEqual(calendar.session_minutes(date(2024, 11, 28)), 0)
+        self.assertEqual(calendar.session_minutes(date(2024, 11, 27)), 390)
+        self.assertFalse(calendar.is_open(at("2024-11-29 13:00")))
+        self.assertFalse(calendar.is_open(at("2024-11-28 12:00")))
+        # Wednesday after the close: next open is Friday, skipping the holiday
+        self.assertEqual(calendar.time_to_open(at("2024-11-27 16:30")), (at("2024-11-29 09:30") - at("2024-11-27 16:30")).total_seconds())
+        self.assertEqual(calendar.next_session(at("2024-11-29 14:00"))[0], at("2024-12-02 09:30"))
+        self.assertEqual(self.alpaca.get_calendar.call_count, 1)
+
+        # Other processes (shards) read today's cache instead of asking the broker
+        offline = MagicMock()
+        offline.get_calendar.side_effect = RuntimeError("offline")
+        cached = self.calendar(offline)
+        self.assertEqual(cached.load(), "cache")
+        self.assertEqual(cached.session_on(), calendar.session_on())
+        offline.get_calendar.assert_not_called()
+
+        # Next day the cache is stale: reloaded once, and kept when the broker is unreachable
+        self.now = at("2024-11-30 08:00")
+        self.assertFalse(cached.is_open())
+        self.assertEqual(cached.source, "stale cache")
+        self.assertEqual(cached.next_session()[0], at("2024-12-02 09:30"))
+
+    def test_regular_hours_fallback(self):
+        offline = MagicMock()
+        offline.get_calendar.side_effect = RuntimeError("offline")
+        calendar = self.calendar(offline)
+        self.assertEqual(calendar.load(), "regular hours")
+        self.assertEqual(calendar.session_minutes(), 390)  # half-day unknown offline
+        self.assertIsNone(calendar.session_on(date(2024, 11, 30)))
+
+class TestSessionSchedule(unittest.TestCase):
+    def test_jobs_follow_the_real_open_and_close(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            alpaca = MagicMock()
+            alpaca.get_calendar.return_value = THANKSGIVING
+            now = {'t': at("2024-11-29 04:00")}
+            calendar = TradingCalendar(alpaca, path=os.path.join(tmp, "calendar.json"), clock=lambda: now['t'])
+            with patch('src.agent.scheduler.DataCollector'):
+                scheduler = AgentScheduler(SimpleNamespace(calendar=calendar))
+
+            asyncio.run(scheduler.plan_day())
+            run_at = {job.id: job.trigger.run_date for job in scheduler.scheduler.get_jobs()}
+            self.assertEqual(run_at, {'daily_initialization': at("2024-11-29 09:00"),
+                                      'start_trading': at("2024-11-29 09:29"),
+                                      'liquidate_all': at("2024-11-29 12:55")})
+
+            # Thanksgiving: nothing new is scheduled
+            now['t'] = at("2024-11-28 04:00")
+            scheduler.scheduler.remove_all_jobs()
+            self.assertIsNone(asyncio.run(scheduler.plan_day()))
+            self.assertEqual(scheduler.scheduler.get_jobs(), [])
+
+if __name__ == '__main__':
+    unittest.main()
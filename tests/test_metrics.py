@@ -0,0 +1,57 @@
+import unittest
+import tempfile
+import sys
+import os
+import urllib.request
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.metrics import Histogram, MetricsRegistry
+from tests.test_executor import make_executor
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets_and_quantiles(self):
+        hist = Histogram(buckets=(0.01, 0.1, 1.0))
+        for value in [0.005] * 90 + [0.05] * 9 + [5.0]:
+            hist.observe(value)
+        self.assertEqual(hist.counts, [90, 9, 0, 1])
+        self.assertEqual(hist.count, 100)
+        self.assertEqual(hist.quantile(0.5), 0.01)
+        self.assertEqual(hist.quantile(0.95), 0.1)
+        self.assertEqual(hist.quantile(1.0), float('inf'))
+
+    def test_endpoint_renders_prometheus_text(self):
+        metrics = MetricsRegistry()
+        metrics.describe("stage_seconds", "histogram", "Time spent per tick stage")
+        metrics.observe("stage_seconds", 0.003, stage="price_fetch")
+        metrics.observe("stage_seconds", 0.2, stage="price_fetch")
+        metrics.inc("orders", side="buy")
+        server = metrics.serve(port=0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            body = urllib.request.urlopen(url, timeout=5).read().decode()
+        finally:
+            metrics.shutdown()
+
+        self.assertIn("# TYPE trading_stage_seconds histogram", body)
+        self.assertIn('trading_stage_seconds_bucket{stage="price_fetch",le="0.005"} 1', body)
+        self.assertIn('trading_stage_seconds_bucket{stage="price_fetch",le="+Inf"} 2', body)
+        self.assertIn('trading_stage_seconds_count{stage="price_fetch"} 2', body)
+        self.assertIn('trading_orders_total{side="buy"} 1.0', body)
+
+    def test_executor_records_tick_stages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = make_executor(tmp, ["AAA", "BBB"], evaluation_mode="vectorized")
+            executor.alpaca.get_latest_prices.return_value = {"AAA": 101.0, "BBB": 99.0}
+            executor._vectorized_tick()
+            executor.db.close()
+
+        stages = executor.metrics.stage_summary()
+        for stage in ("price_fetch", "position_fetch", "signal_eval", "order_submit", "db_log"):
+            self.assertGreaterEqual(stages[stage]['count'], 1, stage)
+        self.assertEqual(executor.metrics.counter("orders", side="buy"), 1)
+        self.assertEqual(executor.metrics.histogram("order_latency_seconds").count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
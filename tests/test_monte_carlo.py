@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.backtest.monte_carlo import MonteCarloAnalyzer, returns_from_round_trips
+
+class TestMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        self.returns = np.random.default_rng(0).normal(0.002, 0.02, 250)
+
+    def test_permutation_preserves_terminal_equity(self):
+        mc = MonteCarloAnalyzer(n_sims=500, method='permutation', seed=1).run(self.returns, initial_equity=1000.0)
+        # Same trades in a different order: identical terminal equity, varying drawdowns
+        np.testing.assert_allclose(mc['terminal'], 1000.0 * np.prod(1 + self.returns))
+        self.assertGreater(mc['max_drawdown'].std(), 0)
+        self.assertTrue((mc['max_drawdown'] <= 0).all())
+
+    def test_bootstrap_batch_and_pool_agree(self):
+        t_start = time.perf_counter()
+        single = MonteCarloAnalyzer(n_sims=20000, batch_size=5000, seed=7).run(self.returns)
+        self.assertLess(time.perf_counter() - t_start, 5.0)
+        pooled = MonteCarloAnalyzer(n_sims=20000, batch_size=5000, max_workers=2, seed=7).run(self.returns)
+        np.testing.assert_array_equal(single['terminal'], pooled['terminal'])
+        self.assertEqual(len(single['terminal']), 20000)
+        self.assertEqual(list(single['summary'].index), ['p5', 'p25', 'p50', 'p75', 'p95'])
+        self.assertTrue(single['summary']['terminal_equity'].is_monotonic_increasing)
+
+    def test_risk_of_ruin(self):
+        losing = np.full(20, -0.05)
+        self.assertEqual(MonteCarloAnalyzer(n_sims=100, ruin_threshold=0.3, seed=0).run(losing)['risk_of_ruin'], 1.0)
+        self.assertEqual(MonteCarloAnalyzer(n_sims=100, fraction=0.1, ruin_threshold=0.3, seed=0).run(losing)['risk_of_ruin'], 0.0)
+
+    def test_returns_from_round_trips(self):
+        trips = pd.DataFrame({
+            'exit_time': pd.to_datetime(['2024-01-03', '2024-01-02']),
+            'qty': [10.0, 5.0], 'entry_price': [100.0, 50.0], 'pnl': [200.0, -5.0],
+        })
+        np.testing.assert_allclose(returns_from_round_trips(trips), [-0.02, 0.2])
+
+if __name__ == '__main__':
+    unittest.main()
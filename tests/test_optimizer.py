@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.backtest.optimizer import WalkForwardOptimizer
+from src.strategy import indicators
+from src.strategy.rsi_momentum import RSIMomentumStrategy
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+
+def make_daily(n_days, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+    open_ = close * (1 + rng.normal(0, 0.005, n_days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n_days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n_days))
+    index = pd.date_range('2021-01-01', periods=n_days, freq='D')
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close}, index=index)
+
+class TestOptimizer(unittest.TestCase):
+    def test_indicators_match_pandas(self):
+        close = make_daily(80, 1)['close']
+        np.testing.assert_allclose(indicators.rolling_mean(close.values, 20), close.rolling(20).mean().values, rtol=1e-9)
+        np.testing.assert_allclose(indicators.rolling_std(close.values, 20), close.rolling(20).std().values, rtol=1e-9)
+        strat = RSIMomentumStrategy("TEST")
+        self.assertAlmostEqual(indicators.rsi(close.values, 14)[-1], strat.calculate_rsi(close, 14), places=9)
+
+    def test_optimize_k_unchanged(self):
+        history = make_daily(30, 2)
+        # Reference: the original pandas grid search
+        best_k, best_return = 0.5, -float('inf')
+        for k in [x * 0.1 for x in range(3, 10)]:
+            df = history.copy()
+            df['range'] = df['high'].shift(1) - df['low'].shift(1)
+            df['target'] = df['open'] + df['range'] * k
+            df['daily_return'] = np.where(df['high'] >= df['target'], (df['close'] - df['target']) / df['target'], 0)
+            cum_ret = (1 + df['daily_return']).prod()
+            if cum_ret > best_return:
+                best_return, best_k = cum_ret, k
+        self.assertEqual(VolatilityBreakoutStrategy("TEST").optimize_k(history), best_k)
+
+    def test_walk_forward_serial_and_pool_agree(self):
+        history = {s: make_daily(400, i) for i, s in enumerate(["AAA", "BBB"])}
+        serial = WalkForwardOptimizer(db=object(), max_workers=1).run(["AAA", "BBB"], history=history)
+        pooled = WalkForwardOptimizer(db=object(), max_workers=2).run(["AAA", "BBB"], history=history)
+
+        self.assertEqual(len(serial), 6)
+        key = lambda r: (r['symbol'], r['strategy_name'])
+        for a, b in zip(sorted(serial, key=key), sorted(pooled, key=key)):
+            self.assertEqual(a['params'], b['params'])
+            self.assertAlmostEqual(a['oos_return'], b['oos_return'])
+            self.assertEqual(a['n_windows'], 14)  # (400 - 120) / 20
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import tempfile
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.order_manager import OrderManager
+from src.data.database import DatabaseManager
+from src.data.position_book import PositionBook
+from src.strategy.bollinger_reversion import BollingerReversionStrategy
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+
+def signal(action):
+    return {'action': action, 'price': 0.0, 'reason': f"test {action}"}
+
+def fill(order, qty, price, position_qty, execution_id, event='fill'):
+    return SimpleNamespace(event=event, order=order, qty=qty, price=price, position_qty=position_qty,
+                           execution_id=execution_id)
+
+class TestOrderManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "test.db"))
+        self.db.create_tables()
+        self.alpaca = MagicMock()
+        self.alpaca.get_positions.return_value = {}
+        self.alpaca.trading_client.get_orders.return_value = []
+        ids = iter(range(1, 100))
+        self.alpaca.submit_order.side_effect = lambda symbol, qty, side: SimpleNamespace(
+            id=f"o{next(ids)}", symbol=symbol, side=side, qty=str(qty), filled_qty="0")
+        self.book = PositionBook(self.alpaca)
+        self.book.reconcile()
+        self.realized = []
+        self.manager = OrderManager(self.alpaca, self.db, self.book, on_realized=lambda s, pl: self.realized.append((s, pl)))
+        self.vb, self.bb = VolatilityBreakoutStrategy("AAA"), BollingerReversionStrategy("AAA")
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_same_tick_buys_net_into_one_capped_order(self):
+        order = self.manager.submit("AAA", [(self.vb, signal('BUY')), (self.bb, signal('BUY'))], 100.0, max_qty=10)
+        self.alpaca.submit_order.assert_called_once_with("AAA", 10, 'buy')
+        # In flight: a repeat signal is suppressed until the fill arrives
+        self.assertIsNone(self.manager.submit("AAA", [(self.bb, signal('BUY'))], 100.0, max_qty=10))
+
+        # Partial then full fill move the sub-position pro rata
+        self.book.on_trade_update(fill(order, 4, 99.0, 4, "e1", 'partial_fill'))
+        self.assertEqual(self.manager.position("AAA", self.vb.name), (4.0, 99.0))
+        self.book.on_trade_update(fill(order, 6, 101.0, 10, "e2"))
+        qty, avg = self.manager.position("AAA", self.vb.name)
+        self.assertEqual(qty, 10.0)
+        self.assertAlmostEqual(avg, 100.2)
+        self.assertEqual(self.manager.position("AAA", self.bb.name), (0.0, 0.0))
+        self.assertEqual(self.manager.inflight, {})
+
+    def test_fill_before_submit_returns(self):
+        # The stream delivers the fill while submit_order() is still waiting for its response
+        def submit_and_fill(symbol, qty, side):
+            order = SimpleNamespace(id="fast", symbol=symbol, side=side, qty=str(qty), filled_qty=str(qty))
+            self.book.on_trade_update(fill(order, qty, 100.0, qty, "e1"))
+            return order
+        self.alpaca.submit_order.side_effect = submit_and_fill
+        self.manager.submit("AAA", [(self.vb, signal('BUY'))], 100.0, max_qty=10)
+        self.assertEqual(self.manager.position("AAA", self.vb.name), (10.0, 100.0))
+        self.assertEqual(self.manager.inflight, {})
+        self.assertEqual(self.book.open_orders, {})
+
+    def test_sell_closes_own_shares_and_opposite_signals_cross(self):
+        self.manager._apply("AAA", {self.vb.name: 6, self.bb.name: 4}, 100.0, 1.0)
+
+        # BB's exit sells only its 4 shares, not the symbol's whole 10
+        order = self.manager.submit("AAA", [(self.bb, signal('SELL'))], 105.0, max_qty=10)
+        self.alpaca.submit_order.assert_called_once_with("AAA", 4, 'sell')
+        self.book.on_trade_update(fill(order, 4, 105.0, 6, "e1"))
+        self.assertEqual(self.manager.position("AAA", self.vb.name), (6.0, 100.0))
+        self.assertEqual(self.realized, [(self.bb.name, 20.0)])
+
+        # VB exits while BB re-enters on the same tick: BB takes the 6 freed shares, nothing is sent
+        self.alpaca.submit_order.reset_mock()
+        self.assertIsNone(self.manager.submit("AAA", [(self.vb, signal('SELL')), (self.bb, signal('BUY'))], 110.0, max_qty=6))
+        self.alpaca.submit_order.assert_not_called()
+        self.assertEqual(self.manager.position("AAA", self.bb.name), (6.0, 110.0))
+        self.assertEqual(self.realized[-1], (self.vb.name, 60.0))
+        logged = self.db.execute_query("SELECT strategy_name, side, quantity FROM trade_logs ORDER BY id")
+        self.assertEqual([tuple(r) for r in logged][-2:], [(self.vb.name, 'SELL', 6.0), (self.bb.name, 'BUY', 6.0)])
+
+        # Sub-positions survive a restart and are trimmed to what the broker holds
+        restored = OrderManager(self.alpaca, self.db)
+        self.assertEqual(restored.position("AAA", self.bb.name), (6.0, 110.0))
+        restored.reconcile({})
+        self.assertEqual(restored.positions(), {})
+        self.assertEqual(self.db.load_strategy_positions(), {})
+
+if __name__ == '__main__':
+    unittest.main()
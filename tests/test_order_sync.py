@@ -0,0 +1,90 @@
+import unittest
+import tempfile
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.database import DatabaseManager
+from src.data.order_sync import OrderSync
+from src.backtest.analyzer import IncrementalAnalyzer
+
+class FakeTradingClient:
+    """Serves orders like Alpaca's GET /orders: submitted strictly after `after`, ascending, `limit` per page."""
+    def __init__(self, orders):
+        self.orders = orders
+        self.requests = []
+
+    def get_orders(self, filter):
+        self.requests.append(filter)
+        after = filter.after or datetime.min.replace(tzinfo=timezone.utc)
+        matching = sorted((o for o in self.orders if o.submitted_at > after), key=lambda o: o.submitted_at)
+        return matching[:filter.limit]
+
+def make_order(i, side, status='filled', filled_qty=10, price=100.0):
+    t0 = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc) + timedelta(hours=i)
+    return SimpleNamespace(
+        id=f"o{i}", client_order_id=f"c{i}", symbol="AAA", side=side, order_type="market", status=status,
+        qty="10", filled_qty=str(filled_qty), filled_avg_price=str(price) if filled_qty else None,
+        submitted_at=t0, filled_at=t0 + timedelta(seconds=1) if filled_qty else None, updated_at=t0 + timedelta(seconds=1))
+
+class TestOrderSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "test.db"))
+        self.db.create_tables()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_backfill_then_incremental(self):
+        orders = [make_order(i, 'buy' if i % 2 == 0 else 'sell', price=100.0 + i) for i in range(25)]
+        client = FakeTradingClient(orders)
+        sync = OrderSync(alpaca=SimpleNamespace(trading_client=client), db=self.db, page_size=10)
+        self.db.log_trade("AAA", "BUY", 10, 100.0, "Strategy", "o0", "VolatilityBreakout")
+
+        self.assertEqual(sync.sync(), 25)
+        self.assertEqual(len(client.requests), 3)  # 10 + 10 + 5
+        self.assertEqual(self.db.get_order_sync_state()['backfill_complete'], 1)
+        recent = self.db.load_orders(limit=50)
+        self.assertEqual(len(recent), 25)
+        self.assertEqual({r['id']: r['strategy_name'] for r in recent}['o0'], 'VolatilityBreakout')
+
+        # A new order that is still working, then gets filled
+        working = make_order(25, 'buy', status='partially_filled', filled_qty=4)
+        working.submitted_at = datetime.now(timezone.utc)
+        client.orders.append(working)
+        client.requests.clear()
+        self.assertEqual(sync.sync(), 1)
+        # Incremental: bounded by the last sync, not the full history
+        self.assertGreater(client.requests[0].after, orders[24].submitted_at)
+
+        # Partially filled orders are not final, so the analyzer waits for them
+        analytics = IncrementalAnalyzer(self.db)
+        self.assertEqual(analytics.update_from_orders(), 25)
+        working.status, working.filled_qty = 'filled', '10'
+        working.filled_at = working.updated_at = working.submitted_at + timedelta(seconds=5)
+        self.assertEqual(sync.sync(), 1)
+        self.assertEqual(sync.sync(), 0)
+        self.assertEqual(analytics.update_from_orders(), 1)
+
+        daily = analytics.daily_performance()
+        self.assertAlmostEqual(daily['Net_PL'].sum(), 12 * 10.0)
+        self.assertIn('VolatilityBreakout', set(daily['Strategy']))
+
+    def test_backfill_keeps_orders_tied_across_a_page_boundary(self):
+        orders = [make_order(i, 'buy') for i in range(12)]
+        for o in orders[9:11]:
+            o.submitted_at = orders[9].submitted_at  # o9 ends page 1, o10 shares its timestamp
+        client = FakeTradingClient(orders)
+        sync = OrderSync(alpaca=SimpleNamespace(trading_client=client), db=self.db, page_size=10)
+
+        self.assertEqual(sync.sync(), 12)
+        self.assertEqual({r['id'] for r in self.db.load_orders(limit=50)}, {f"o{i}" for i in range(12)})
+
+if __name__ == '__main__':
+    unittest.main()
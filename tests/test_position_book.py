@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.position_book import PositionBook
+
+def order(order_id, symbol, side, qty, filled_qty=0):
+    return SimpleNamespace(id=order_id, symbol=symbol, side=side, qty=str(qty), filled_qty=str(filled_qty))
+
+def update(event, o, qty=None, price=None, position_qty=None, execution_id=None):
+    return SimpleNamespace(event=event, order=o, qty=qty, price=price, position_qty=position_qty, execution_id=execution_id)
+
+class TestPositionBook(unittest.TestCase):
+    def setUp(self):
+        self.alpaca = MagicMock()
+        self.alpaca.get_positions.return_value = {}
+        self.alpaca.trading_client.get_orders.return_value = []
+        self.book = PositionBook(self.alpaca)
+        self.book.reconcile()
+
+    def test_fills_partial_fills_and_cancels(self):
+        book = self.book
+        book.track_order(order("o1", "AAA", "buy", 10))
+        self.assertEqual(book.pending_qty("AAA", "buy"), 10)
+
+        book.on_trade_update(update("partial_fill", order("o1", "AAA", "buy", 10, 4), 4, 100.0, 4, "e1"))
+        book.on_trade_update(update("partial_fill", order("o1", "AAA", "buy", 10, 4), 4, 100.0, 4, "e1"))  # replay
+        self.assertEqual(book.get_position("AAA").qty, 4)
+        self.assertEqual(book.pending_qty("AAA", "buy"), 6)
+
+        book.on_trade_update(update("fill", order("o1", "AAA", "buy", 10, 10), 6, 110.0, 10, "e2"))
+        pos = book.get_position("AAA")
+        self.assertEqual((pos.qty, pos.avg_entry_price), (10, 106.0))
+        self.assertEqual(book.pending_qty("AAA", "buy"), 0)
+
+        book.on_trade_update(update("new", order("o2", "AAA", "sell", 10)))
+        book.on_trade_update(update("canceled", order("o2", "AAA", "sell", 10)))
+        self.assertEqual(book.open_orders, {})
+
+        book.on_trade_update(update("fill", order("o3", "AAA", "sell", 10, 10), 10, 120.0, 0, "e3"))
+        self.assertIsNone(book.get_position("AAA"))
+        self.assertEqual(book.drift_count, 0)
+
+    def test_broker_position_qty_and_reconcile_correct_drift(self):
+        book = self.book
+        # A fill the stream missed: the next fill's position_qty exposes it
+        book.on_trade_update(update("fill", order("o1", "AAA", "buy", 5, 5), 5, 50.0, 15, "e1"))
+        self.assertEqual(book.get_position("AAA").qty, 15)
+        self.assertEqual(book.drift_count, 1)
+
+        self.alpaca.get_positions.return_value = {
+            "AAA": SimpleNamespace(qty="15", avg_entry_price="50"),
+            "BBB": SimpleNamespace(qty="3", avg_entry_price="20"),
+        }
+        self.alpaca.trading_client.get_orders.return_value = [order("o9", "BBB", "sell", 3)]
+        self.assertEqual(book.reconcile(), {"BBB": (0.0, 3.0)})
+        self.assertEqual(book.get_position("BBB").avg_entry_price, 20.0)
+        self.assertEqual(book.pending_qty("BBB", "sell"), 3)
+        self.assertEqual(book.drift_count, 2)
+
+    def test_fill_during_reconcile_is_not_overwritten(self):
+        book = self.book
+        book.on_trade_update(update("fill", order("o1", "AAA", "buy", 5, 5), 5, 50.0, 5, "e1"))
+        book.track_order(order("o2", "AAA", "buy", 5))
+        stale = {"AAA": SimpleNamespace(qty="5", avg_entry_price="50")}
+
+        def fetch_then_fill():
+            # The o2 fill reaches the stream after REST built its (stale) snapshot
+            book.on_trade_update(update("fill", order("o2", "AAA", "buy", 5, 5), 5, 60.0, 10, "e2"))
+            return stale
+        self.alpaca.get_positions.side_effect = fetch_then_fill
+        self.alpaca.trading_client.get_orders.return_value = [order("o2", "AAA", "buy", 5)]
+
+        self.assertEqual(book.reconcile(), {})
+        pos = book.get_position("AAA")
+        self.assertEqual((pos.qty, pos.avg_entry_price), (10, 55.0))
+        self.assertEqual(book.pending_qty("AAA", "buy"), 0)
+        self.assertEqual(book.drift_count, 0)
+
+        # The next reconcile takes the broker's view again
+        self.alpaca.get_positions.side_effect = None
+        self.alpaca.get_positions.return_value = {"AAA": SimpleNamespace(qty="10", avg_entry_price="55")}
+        self.alpaca.trading_client.get_orders.return_value = []
+        self.assertEqual(book.reconcile(), {})
+
+if __name__ == '__main__':
+    unittest.main()
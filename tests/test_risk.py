@@ -0,0 +1,110 @@
+import unittest
+import tempfile
+import time
+import sys
+import os
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.risk import KillSwitch, RiskGate
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+from tests.test_executor import make_executor
+
+def buy_signal():
+    return {'action': 'BUY', 'price': 0.0, 'reason': "test BUY"}
+
+class TestRiskGate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.gate = RiskGate(KillSwitch(os.path.join(self.tmp.name, "KILL_SWITCH"), refresh=0.0),
+                             max_orders_per_minute=1000)
+        self.gate.on_equity(100_000.0, 100_000.0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_position_and_exposure_limits_with_reservations(self):
+        gate = self.gate
+        self.assertEqual(gate.max_shares(100.0), 100)
+        self.assertEqual(gate.check("AAA", 'buy', 101, 100.0), 'position')
+        self.assertIsNone(gate.check("AAA", 'buy', 100, 100.0))
+        # The in-flight order counts: a second buy on the symbol exceeds the cap until it is released
+        self.assertEqual(gate.check("AAA", 'buy', 1, 100.0), 'position')
+        gate.on_fill("AAA", 100, 100.0)
+        self.assertEqual(gate.pending, {})
+        self.assertAlmostEqual(gate.gross, 10_000.0)
+
+        # Nine more full positions fill the 1x gross cap; a mark-up then blocks the tenth
+        for i in range(9):
+            self.assertIsNone(gate.check(f"S{i}", 'buy', 100, 100.0))
+        gate.on_price("AAA", 101.0)
+        self.assertEqual(gate.check("ZZZ", 'buy', 10, 100.0), 'exposure')
+        gate.release("S0")
+        self.assertIsNone(gate.check("ZZZ", 'buy', 10, 100.0))
+        self.assertEqual(gate.rejections, {'position': 2, 'exposure': 1})
+
+    def test_daily_loss_is_reduce_only_and_halt_engages_kill_switch(self):
+        gate = self.gate
+        gate.on_position("AAA", 200, 50.0)
+        # -2.2% intraday on marks alone (no new equity sample yet)
+        gate.on_price("AAA", 39.0)
+        self.assertAlmostEqual(gate.daily_return, -0.022)
+        self.assertEqual(gate.check("BBB", 'buy', 1, 10.0), 'daily_loss')
+        self.assertIsNone(gate.check("AAA", 'sell', 100, 39.0))
+        self.assertIsNone(gate.pop_trip())
+
+        gate.on_equity(96_900.0, 100_000.0)
+        reason = gate.pop_trip()
+        self.assertIn("halt", reason)
+        self.assertIsNone(gate.pop_trip())
+        self.assertEqual(gate.check("AAA", 'sell', 100, 39.0), 'kill_switch')
+
+    def test_kill_switch_is_shared_through_the_file(self):
+        path = os.path.join(self.tmp.name, "KILL_SWITCH")
+        dashboard = KillSwitch(path)
+        self.assertTrue(dashboard.engage("manual"))
+        self.assertFalse(KillSwitch(path).engage("again"))
+        self.assertEqual(self.gate.check("AAA", 'buy', 1, 10.0), 'kill_switch')
+        self.assertEqual(dashboard.info()['reason'], "manual")
+        dashboard.release()
+        self.assertIsNone(self.gate.check("AAA", 'buy', 1, 10.0))
+
+    def test_check_is_sub_millisecond(self):
+        gate = self.gate
+        gate.kill_switch.refresh = 0.25
+        for i in range(500):
+            gate.on_position(f"S{i:03d}", 10, 50.0)
+        n = 20_000
+        t_start = time.perf_counter()
+        for i in range(n):
+            symbol = f"S{i % 500:03d}"
+            gate.check(symbol, 'buy', 1, 50.0)
+            gate.release(symbol)
+        per_check = (time.perf_counter() - t_start) / n
+        self.assertLess(per_check, 1e-3)
+
+class TestExecutorRisk(unittest.TestCase):
+    def test_halt_flattens_once_and_blocks_orders(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = make_executor(tmp, ["AAA"])
+            executor.risk.kill_switch.refresh = 0.0
+            executor.alpaca.get_latest_prices.return_value = {}
+            executor.sample_equity()
+            vb = next(s for s in executor.strategies if isinstance(s, VolatilityBreakoutStrategy))
+
+            executor.alpaca.get_account_info.return_value = SimpleNamespace(
+                equity="96000", long_market_value="0", last_equity="100000")
+            executor._heartbeat()
+            executor._heartbeat()
+            executor.alpaca.trading_client.cancel_orders.assert_called_once()
+            self.assertTrue(os.path.exists(os.path.join(tmp, "KILL_SWITCH")))
+
+            executor._submit("AAA", [(vb, buy_signal())], 100.0)
+            executor.alpaca.submit_order.assert_not_called()
+            self.assertEqual(executor.risk.rejections, {'kill_switch': 1})
+            executor.db.close()
+
+if __name__ == '__main__':
+    unittest.main()
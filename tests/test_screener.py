@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+import time
+import sys
+import os
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.database import DatabaseManager
+from src.data.screener import UniverseScreener, compute_metrics, load_universe
+
+def make_bars(n_symbols: int, n_days: int = 60, seed: int = 0) -> pd.DataFrame:
+    """Random-walk daily bars; symbol i has daily volatility ~ 0.5% * (1 + i % 5), every 4th trends down."""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range("2024-01-02", periods=n_days, tz="UTC")
+    frames = []
+    for i in range(n_symbols):
+        drift = -0.004 if i % 4 == 3 else 0.002
+        close = 50 * np.cumprod(1 + drift + rng.normal(0, 0.005 * (1 + i % 5), n_days))
+        frames.append(pd.DataFrame({
+            'symbol': f"S{i:04d}", 'timestamp': days, 'open': close, 'high': close * 1.01, 'low': close * 0.99,
+            'close': close, 'volume': 100_000.0 * (1 + i % 3),
+        }))
+    return pd.concat(frames).set_index(['symbol', 'timestamp'])
+
+class TestScreener(unittest.TestCase):
+    def test_metrics_match_pandas(self):
+        bars = make_bars(3)
+        screener = UniverseScreener(alpaca=MagicMock(), db=MagicMock())
+        ranked = screener.rank(bars, top_n=3, min_price=0, min_dollar_volume=0, uptrend_only=False)
+        close = bars.loc["S0001", 'close']
+        row = ranked.set_index('symbol').loc["S0001"]
+        self.assertAlmostEqual(row['volatility'], np.log(close).diff().iloc[-20:].std() * np.sqrt(252))
+        self.assertAlmostEqual(row['range_pct'], (0.02 * close / close.shift()).iloc[-20:].mean())
+        self.assertAlmostEqual(row['dollar_volume'], (close * 200_000).iloc[-20:].mean())
+        self.assertAlmostEqual(row['trend'], close.iloc[-1] / close.iloc[-50:].mean() - 1)
+
+        # Symbols without bars in the window yield NaN, not errors
+        empty = np.full((1, 60), np.nan)
+        self.assertTrue(np.isnan(compute_metrics(empty, empty, empty, empty)['volatility'][0]))
+
+    def test_filters_rank_and_storage(self):
+        bars = make_bars(40)
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, "test.db"))
+            db.create_tables()
+            screener = UniverseScreener(alpaca=MagicMock(), db=db)
+            screener.fetch_daily_bars = lambda symbols: bars
+            screener.fetch_prices = lambda symbols: {"S0004": 2.0}  # below min_price now
+
+            candidates = screener.run(top_n=5, symbols=sorted(bars.index.get_level_values(0).unique()),
+                                      run_date="2024-03-29", min_price=5.0)
+            stored = load_universe(db, "2024-03-29")
+            db.close()
+
+        self.assertEqual(stored, candidates['symbol'].tolist())
+        self.assertEqual(len(stored), 5)
+        self.assertNotIn("S0004", stored)
+        self.assertTrue((candidates['trend'] > 0).all())
+        self.assertTrue(candidates['volatility'].is_monotonic_decreasing)
+
+    def test_thousands_of_symbols_screen_quickly(self):
+        bars = make_bars(3000)
+        screener = UniverseScreener(alpaca=MagicMock(), db=MagicMock())
+        t_start = time.perf_counter()
+        ranked = screener.rank(bars, top_n=20)
+        self.assertLess(time.perf_counter() - t_start, 5.0)
+        self.assertEqual(len(ranked), 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import asyncio
+import queue
+import tempfile
+import time
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.executor import TradingExecutor
+from src.agent.gateway import GatewayClient, OrderGateway, TokenBucket
+from src.agent.risk import KillSwitch
+from src.agent.shards import ShardCoordinator, partition
+from src.data.database import DatabaseManager
+
+def fake_alpaca():
+    alpaca = MagicMock()
+    alpaca.get_market_status.return_value = SimpleNamespace(is_open=True)
+    alpaca.get_account_info.return_value = SimpleNamespace(equity="100000", long_market_value="0",
+                                                           last_equity="100000", buying_power="100000")
+    alpaca.get_positions.return_value = {}
+    alpaca.submit_order.side_effect = lambda symbol, qty, side: SimpleNamespace(
+        id=f"{symbol}-1", symbol=symbol, side=side, qty=str(qty), filled_qty="0")
+    return alpaca
+
+class TestGateway(unittest.TestCase):
+    def setUp(self):
+        self.alpaca = fake_alpaca()
+        self.requests, replies = queue.Queue(), {0: queue.Queue()}
+        self.gateway = OrderGateway(self.alpaca, self.requests, replies)
+        self.gateway.start()
+        self.client = GatewayClient(self.requests, replies[0], shard_id=0, timeout=5)
+
+    def tearDown(self):
+        self.gateway.stop()
+
+    def test_calls_are_forwarded_and_errors_propagate(self):
+        order = self.client.submit_order("AAA", 5, 'buy')
+        self.assertEqual((order.symbol, order.qty), ("AAA", "5"))
+        self.alpaca.trading_client.get_order_by_id.return_value = SimpleNamespace(status="filled")
+        self.assertEqual(self.client.trading_client.get_order_by_id("AAA-1").status, "filled")
+        self.alpaca.trading_client.get_order_by_id.assert_called_once_with("AAA-1")
+
+        self.alpaca.get_latest_price.side_effect = ValueError("no trades")
+        with self.assertRaises(ValueError):
+            self.client.get_latest_price("AAA")
+
+        # Account-wide reads are cached across shards
+        for _ in range(3):
+            self.assertTrue(self.client.get_market_status().is_open)
+        self.alpaca.get_market_status.assert_called_once()
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate_per_minute=600, burst=2)  # 10 requests/s
+        t_start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - t_start, 0.28)
+
+class TestShardCoordinator(unittest.TestCase):
+    def test_partition_is_balanced(self):
+        symbols = [f"S{i}" for i in range(10)]
+        shards = partition(symbols, 3)
+        self.assertEqual([len(s) for s in shards], [4, 3, 3])
+        self.assertEqual(sorted(sum(shards, [])), sorted(symbols))
+        self.assertEqual(len(partition(symbols[:2], 4)), 2)
+
+    def test_feed_fans_out_changed_prices_to_owning_shard(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+             patch('src.agent.shards.DatabaseManager', return_value=DatabaseManager(os.path.join(tmp, "test.db"))):
+            coordinator = ShardCoordinator(["AAA", "BBB", "CCC"], 2, alpaca=fake_alpaca())
+            coordinator._fan_out({"AAA": 1.0, "BBB": 2.0, "CCC": 3.0})
+            coordinator._fan_out({"AAA": 1.0, "BBB": 2.5, "CCC": 3.0})
+            first = coordinator.price_feeds[0].get(timeout=1)
+            self.assertEqual(first, {'prices': {"AAA": 1.0, "CCC": 3.0}})
+            self.assertEqual(coordinator.price_feeds[1].get(timeout=1), {'prices': {"BBB": 2.0}})
+            self.assertEqual(coordinator.price_feeds[1].get(timeout=1), {'prices': {"BBB": 2.5}})
+            self.assertTrue(coordinator.price_feeds[0].empty())
+
+    def test_shard_processes_answer_through_the_gateway(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)  # shards use data/ under the working directory
+            try:
+                alpaca = fake_alpaca()
+                coordinator = ShardCoordinator(["AAA", "BBB", "CCC"], 2, alpaca=alpaca, command_timeout=60)
+                coordinator.start()
+                try:
+                    self.assertFalse(coordinator.restore_checkpoint())  # no checkpoint yet
+                    asyncio.run(coordinator.initialize_day())
+                    # Universe-wide allocation from one account request; shards don't ask for their own
+                    self.assertAlmostEqual(coordinator.investment_per_symbol, 30000)
+                    self.assertIn('slowest_shard', coordinator.init_timings)
+                finally:
+                    coordinator.shutdown()
+                self.assertTrue(all(not p.is_alive() for p in coordinator.processes))
+                self.assertEqual(alpaca.get_account_info.call_count, 1)
+            finally:
+                os.chdir(cwd)
+
+    def test_equity_is_tracked_once_for_all_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, "test.db"))
+            db.create_tables()
+            # A shard's executor reports realized P&L and persists no equity state of its own
+            reported = []
+            with patch('src.agent.executor.DatabaseManager', return_value=db):
+                shard = TradingExecutor(["AAA"], alpaca=fake_alpaca(), calendar=MagicMock(), checkpoint_path=None,
+                                        kill_switch=KillSwitch(os.path.join(tmp, "KILL_SWITCH")),
+                                        on_realized=lambda strategy, pl: reported.append((strategy, pl)))
+            shard.sample_equity()
+            shard.order_manager.on_realized("VolatilityBreakout", 10.0)
+            self.assertEqual(shard.risk.equity, 100000.0)
+            self.assertEqual(reported, [("VolatilityBreakout", 10.0)])
+            self.assertEqual(shard.equity.realized_pl, 0.0)
+            self.assertIsNone(db.load_risk_state())
+            self.assertEqual(len(db.load_risk_snapshots()), 0)
+
+            with patch('src.agent.shards.DatabaseManager', return_value=db):
+                coordinator = ShardCoordinator(["AAA", "BBB"], 2, alpaca=fake_alpaca())
+            coordinator.realized = queue.Queue()
+            for fill in [("VolatilityBreakout", 10.0), ("BollingerReversion", -4.0), ("VolatilityBreakout", 5.0)]:
+                coordinator.realized.put(fill)  # from both shards
+            coordinator.sample_equity()
+            snapshot = db.load_latest_risk_snapshot()
+            self.assertEqual(snapshot['contributions'], {"VolatilityBreakout": 15.0, "BollingerReversion": -4.0})
+            self.assertEqual(snapshot['realized_pl'], 11.0)
+            self.assertEqual(db.load_risk_state()['realized_pl'], 11.0)
+            db.close()
+
+if __name__ == '__main__':
+    unittest.main()
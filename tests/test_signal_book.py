@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.signal_book import SignalBook
+from src.strategy.bollinger_reversion import BollingerReversionStrategy
+from src.strategy.rsi_momentum import RSIMomentumStrategy
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
+
+class TestSignalBook(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.symbols = [f"S{i}" for i in range(50)]
+        self.strategies = []
+        for symbol in self.symbols:
+            daily = pd.DataFrame({'close': rng.normal(100, 3, 30)}, index=pd.date_range('2024-01-01', periods=30))
+            daily['open'] = daily['close'] + rng.normal(0, 1, 30)
+            daily['high'] = daily[['open', 'close']].max(axis=1) + 1
+            daily['low'] = daily[['open', 'close']].min(axis=1) - 1
+            vb, bb, rsi = VolatilityBreakoutStrategy(symbol), BollingerReversionStrategy(symbol), RSIMomentumStrategy(symbol)
+            for strat in (vb, bb, rsi):
+                strat.on_market_open(daily)
+            if rng.random() < 0.7:
+                vb.update_target(daily['close'].iloc[-1])
+            self.strategies += [vb, bb, rsi]
+        self.rng = rng
+
+    def test_evaluate_matches_scalar_loop(self):
+        book = SignalBook(self.strategies)
+        for _ in range(20):
+            prices = self.rng.uniform(90, 110, len(self.symbols))
+            qty = self.rng.choice([0.0, 5.0], len(self.symbols))
+            entry = np.where(qty > 0, self.rng.uniform(90, 110, len(self.symbols)), 0.0)
+            rsi = self.rng.uniform(30, 80, len(self.symbols))
+
+            fired = {(sym, s.name, action) for sym, s, action in book.evaluate(prices, qty, entry, {'current_rsi': rsi})}
+            expected = set()
+            for s in self.strategies:
+                i = book.symbol_index[s.symbol]
+                signal = s.generate_signal(prices[i], qty[i], entry[i], current_rsi=rsi[i])
+                if signal:
+                    expected.add((s.symbol, s.name, signal['action']))
+            self.assertEqual(fired, expected)
+
+    def test_update_single_strategy(self):
+        book = SignalBook(self.strategies)
+        vb = self.strategies[0]
+        vb.sma_20 = 0
+        vb.update_target(50.0)
+        book.update(vb)
+        prices = book.vector({vb.symbol: 60.0})
+        fired = book.evaluate(prices, np.zeros(len(self.symbols)), np.zeros(len(self.symbols)))
+        self.assertIn((vb.symbol, vb, 'BUY'), fired)
+
+if __name__ == '__main__':
+    unittest.main()
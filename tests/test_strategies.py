@@ -1,4 +1,6 @@
 import unittest
+import json
+import numpy as np
 import pandas as pd
 import sys
 import os
@@ -8,6 +10,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.strategy.bollinger_reversion import BollingerReversionStrategy
 from src.strategy.rsi_momentum import RSIMomentumStrategy
+from src.strategy.volatility_breakout import VolatilityBreakoutStrategy
 
 class TestStrategies(unittest.TestCase):
     def setUp(self):
@@ -77,5 +80,60 @@ class TestStrategies(unittest.TestCase):
         self.assertIsNotNone(signal)
         self.assertEqual(signal['action'], 'SELL')
 
+    def test_state_roundtrip_and_fingerprint(self):
+        strat = BollingerReversionStrategy("TEST", period=20, std_dev=2.0)
+        fingerprint = strat.input_fingerprint(self.mock_data)
+        strat.on_market_open(self.mock_data)
+
+        # Fingerprint depends on inputs only, not on derived state
+        self.assertEqual(fingerprint, strat.input_fingerprint(self.mock_data))
+        self.assertNotEqual(fingerprint, BollingerReversionStrategy("TEST", std_dev=2.5).input_fingerprint(self.mock_data))
+        self.assertNotEqual(fingerprint, strat.input_fingerprint(self.mock_data.iloc[:-1]))
+
+        restored = BollingerReversionStrategy("TEST")
+        restored.set_state(json.loads(json.dumps(strat.get_state())))
+        self.assertAlmostEqual(restored.lower_band, strat.lower_band)
+        self.assertAlmostEqual(restored.upper_band, strat.upper_band)
+        self.assertEqual(
+            restored.generate_signal(strat.lower_band - 1.0, current_position=0)['action'], 'BUY'
+        )
+
+    def test_generate_signals_matches_scalar(self):
+        rng = np.random.default_rng(7)
+        n = 2000
+        prices = rng.uniform(90, 110, n)
+        positions = rng.choice([0, 0, 10], n)
+        entries = np.where(positions > 0, rng.uniform(90, 110, n), rng.choice([0.0, 100.0], n))
+        rsi = np.where(rng.random(n) < 0.1, np.nan, rng.uniform(20, 80, n))
+        targets = np.where(rng.random(n) < 0.1, np.nan, rng.uniform(95, 105, n))
+
+        def scalar_actions(strat, per_bar_state=None, **kwargs):
+            actions = []
+            for i in range(n):
+                for attr, values in (per_bar_state or {}).items():
+                    setattr(strat, attr, None if np.isnan(values[i]) else values[i])
+                bar_kwargs = {k: (None if np.isnan(v[i]) else v[i]) for k, v in kwargs.items()}
+                signal = strat.generate_signal(prices[i], positions[i], entries[i], **bar_kwargs)
+                actions.append(0 if signal is None else (1 if signal['action'] == 'BUY' else -1))
+            return np.array(actions)
+
+        vb = VolatilityBreakoutStrategy("TEST")
+        vb.on_market_open(self.mock_data)
+        np.testing.assert_array_equal(
+            vb.generate_signals(prices, positions, entries, target_price=targets),
+            scalar_actions(vb, {'target_price': targets})
+        )
+
+        bb = BollingerReversionStrategy("TEST")
+        bb.on_market_open(self.mock_data)
+        np.testing.assert_array_equal(bb.generate_signals(prices, positions, entries), scalar_actions(bb))
+
+        rsi_strat = RSIMomentumStrategy("TEST")
+        rsi_strat.on_market_open(self.mock_data)
+        np.testing.assert_array_equal(
+            rsi_strat.generate_signals(prices, positions, entries, current_rsi=rsi),
+            scalar_actions(rsi_strat, current_rsi=rsi)
+        )
+
 if __name__ == '__main__':
     unittest.main()
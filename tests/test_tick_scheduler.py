@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.metrics import MetricsRegistry
+from src.agent.tick_scheduler import TickScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestTickScheduler(unittest.TestCase):
+    def test_work_time_is_subtracted_from_the_wait(self):
+        clock = FakeClock()
+        ticks = TickScheduler(1.0, clock=clock)
+        starts = []
+        for work in [0.3, 0.7, 0.1, 0.95]:
+            ticks.start()
+            starts.append(clock.now)
+            clock.now += work
+            clock.now += ticks.delay()
+        # Fixed 1s cadence regardless of how long each tick worked
+        self.assertEqual([round(t - starts[0], 9) for t in starts], [0.0, 1.0, 2.0, 3.0])
+        self.assertEqual(ticks.overruns, 0)
+
+    def test_overrun_skips_missed_ticks_and_sheds_heartbeat(self):
+        clock = FakeClock()
+        metrics = MetricsRegistry()
+        ticks = TickScheduler(1.0, max_defer=3.0, metrics=metrics, clock=clock)
+        ticks.start()
+        self.assertTrue(ticks.due("heartbeat", 10))
+
+        clock.now += 2.5  # overruns by 1.5s: the 2s grid point is skipped
+        self.assertEqual(ticks.delay(), 0.0)
+        self.assertTrue(ticks.overran)
+        self.assertEqual((ticks.overruns, ticks.skipped), (1, 1))
+        self.assertEqual(metrics.counter("tick_overruns"), 1)
+
+        # The late tick gets the remainder of the grid period (deadline at +3s)
+        clock.now += 0.2
+        self.assertAlmostEqual(ticks.delay(), 0.3)
+        self.assertFalse(ticks.overran)
+
+        # Heartbeat due at +10s is shed while ticks overrun, but not beyond max_defer periods
+        clock.now = 1000.0 + 12.0
+        ticks.overran = True
+        self.assertFalse(ticks.due("heartbeat", 10))
+        self.assertEqual(metrics.counter("jobs_shed", job="heartbeat"), 1)
+        clock.now = 1000.0 + 31.0
+        self.assertTrue(ticks.due("heartbeat", 10))
+
+if __name__ == '__main__':
+    unittest.main()